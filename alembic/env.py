@@ -20,7 +20,22 @@ config = context.config
 # This line sets up loggers basically.
 fileConfig(config.config_file_name)
 
-target_metadata = None
+# Use the application's database rather than the placeholder in alembic.ini
+if os.getenv("DATABASE_URL"):
+    config.set_main_option("sqlalchemy.url", os.environ["DATABASE_URL"].replace("%", "%%"))
+
+# Model metadata for autogenerate; importing app.models registers every table
+from app.core.database import Base
+from app.core.partitions import MONTHLY_PARTITIONED_TABLES
+import app.models  # noqa: F401
+
+target_metadata = Base.metadata
+
+def include_name(name, type_, parent_names) -> bool:
+    """Keep autogenerate from dropping partitions created by app.core.partitions"""
+    if type_ == "table" and name not in target_metadata.tables:
+        return not any(name.startswith(f"{table}_") for table in MONTHLY_PARTITIONED_TABLES)
+    return True
 
 # Other values from the config, defined by the needs of env.py,
 # can be acquired:
@@ -43,6 +58,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -66,7 +82,9 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            include_name=include_name
         )
 
         with context.begin_transaction():
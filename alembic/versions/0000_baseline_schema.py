@@ -0,0 +1,290 @@
+"""Baseline: the schema Base.metadata.create_all built before the revision series
+
+Every statement is IF NOT EXISTS, so a database that create_all built before
+Alembic was introduced can simply run `alembic upgrade head`: this revision
+is a no-op there and 0001 onwards apply as usual. A database that create_all
+built from the current models (for example by starting the app against an
+empty database before migrating) already has the final schema and must be
+stamped instead of upgraded:
+
+    alembic stamp head
+
+Revision ID: 0000
+Revises:
+Create Date: 2026-10-18 11:55:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import get_settings
+from app.core.partitions import monthly_partition_statements
+
+
+# revision identifiers, used by Alembic.
+revision = '0000'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+ENUM_TYPES = {
+    "userrole": ("USER", "ADMIN", "SYSTEM_ADMIN"),
+    "transactionstatus": (
+        "PENDING", "IPN_RECEIVED", "COMPLETED", "PAYOUT_PENDING", "PAYOUT_COMPLETED",
+        "FAILED", "CANCELLED", "VALIDATION_FAILED", "PAYOUT_FAILED",
+    ),
+    "payoutjobstatus": ("PENDING", "IN_PROGRESS", "SUCCEEDED", "FAILED"),
+    "idempotencykeystatus": ("IN_PROGRESS", "COMPLETED"),
+}
+
+# In dependency order; downgrade drops them in reverse
+TABLES = {
+    "users": """
+        id SERIAL PRIMARY KEY,
+        username VARCHAR(50) NOT NULL,
+        email VARCHAR(255) NOT NULL,
+        password_hash VARCHAR(255) NOT NULL,
+        role userrole NOT NULL,
+        is_active BOOLEAN,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+        updated_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+    """,
+    "user_sessions": """
+        id SERIAL PRIMARY KEY,
+        user_id INTEGER NOT NULL REFERENCES users (id),
+        session_token VARCHAR(255) NOT NULL,
+        refresh_token VARCHAR(255),
+        ip_address VARCHAR(45),
+        user_agent VARCHAR(255),
+        expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+        is_active BOOLEAN,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+        last_accessed TIMESTAMP WITH TIME ZONE DEFAULT now()
+    """,
+    "admin_config": """
+        id SERIAL PRIMARY KEY,
+        admin_paypal_email VARCHAR(255) NOT NULL,
+        admin_paypal_client_id VARCHAR(255) NOT NULL,
+        admin_paypal_client_secret VARCHAR(255) NOT NULL,
+        sslcz_store_id VARCHAR(255) NOT NULL,
+        sslcz_store_passwd VARCHAR(255) NOT NULL,
+        exchangerate_api_key VARCHAR(255),
+        is_active BOOLEAN,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+        updated_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+    """,
+    "system_settings": """
+        id SERIAL PRIMARY KEY,
+        setting_key VARCHAR(100) NOT NULL,
+        setting_value VARCHAR(500) NOT NULL,
+        setting_type VARCHAR(50) NOT NULL,
+        description TEXT,
+        is_encrypted BOOLEAN,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+        updated_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+    """,
+    "exchange_rates": """
+        id SERIAL PRIMARY KEY,
+        currency_code VARCHAR(3) NOT NULL,
+        rate_to_bdt NUMERIC(15, 8) NOT NULL,
+        last_updated TIMESTAMP WITH TIME ZONE NOT NULL,
+        expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+        is_active BOOLEAN,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+    """,
+    "exchange_rate_rollups": """
+        currency_code VARCHAR(3) NOT NULL,
+        bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+        open NUMERIC(15, 8) NOT NULL,
+        high NUMERIC(15, 8) NOT NULL,
+        low NUMERIC(15, 8) NOT NULL,
+        close NUMERIC(15, 8) NOT NULL,
+        samples INTEGER NOT NULL,
+        open_at TIMESTAMP WITH TIME ZONE NOT NULL,
+        close_at TIMESTAMP WITH TIME ZONE NOT NULL,
+        PRIMARY KEY (currency_code, bucket_start)
+    """,
+    "notification_preferences": """
+        id SERIAL PRIMARY KEY,
+        user_id INTEGER NOT NULL UNIQUE REFERENCES users (id),
+        email_enabled BOOLEAN,
+        sms_enabled BOOLEAN,
+        push_enabled BOOLEAN,
+        transaction_alerts BOOLEAN,
+        payout_alerts BOOLEAN,
+        security_alerts BOOLEAN,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+        updated_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+    """,
+    "payment_limits": """
+        id SERIAL PRIMARY KEY,
+        user_id INTEGER NOT NULL REFERENCES users (id),
+        currency_code VARCHAR(3) NOT NULL,
+        daily_limit NUMERIC(12, 2) NOT NULL,
+        monthly_limit NUMERIC(12, 2) NOT NULL,
+        yearly_limit NUMERIC(12, 2) NOT NULL,
+        current_daily_used NUMERIC(12, 2),
+        current_monthly_used NUMERIC(12, 2),
+        current_yearly_used NUMERIC(12, 2),
+        daily_reset_at TIMESTAMP WITH TIME ZONE NOT NULL,
+        monthly_reset_at TIMESTAMP WITH TIME ZONE NOT NULL,
+        yearly_reset_at TIMESTAMP WITH TIME ZONE NOT NULL,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+        updated_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+    """,
+    "paypal_credentials": """
+        id SERIAL PRIMARY KEY,
+        user_id INTEGER NOT NULL REFERENCES users (id),
+        paypal_email VARCHAR(255) NOT NULL,
+        paypal_merchant_id VARCHAR(255),
+        is_verified BOOLEAN,
+        is_active BOOLEAN,
+        verified_at TIMESTAMP WITH TIME ZONE,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+        updated_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+    """,
+    "oauth_tokens": """
+        id SERIAL PRIMARY KEY,
+        provider VARCHAR(50) NOT NULL,
+        client_id VARCHAR(255) NOT NULL,
+        access_token TEXT NOT NULL,
+        expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+        updated_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+        CONSTRAINT uq_oauth_tokens_provider_client UNIQUE (provider, client_id)
+    """,
+    "paypal_webhook_events": """
+        id SERIAL PRIMARY KEY,
+        event_id VARCHAR(255) NOT NULL UNIQUE,
+        event_type VARCHAR(100) NOT NULL,
+        payload JSON NOT NULL,
+        processed_at TIMESTAMP WITH TIME ZONE,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+    """,
+    "ipn_inbox": """
+        id SERIAL PRIMARY KEY,
+        tran_id VARCHAR(255),
+        val_id VARCHAR(255),
+        payload JSON NOT NULL,
+        error TEXT,
+        processed_at TIMESTAMP WITH TIME ZONE,
+        received_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+    """,
+    "idempotency_keys": """
+        id SERIAL PRIMARY KEY,
+        user_id INTEGER NOT NULL REFERENCES users (id),
+        key VARCHAR(255) NOT NULL,
+        request_fingerprint VARCHAR(64) NOT NULL,
+        status idempotencykeystatus NOT NULL,
+        response JSON,
+        expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+        updated_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+        CONSTRAINT uq_idempotency_keys_user_key UNIQUE (user_id, key)
+    """,
+    # payout_next_check_at / payout_check_count come from 0001, the hot-path
+    # indexes from 0002
+    "transactions": """
+        id SERIAL PRIMARY KEY,
+        user_id INTEGER NOT NULL REFERENCES users (id),
+        internal_tran_id VARCHAR(255) NOT NULL,
+        sslcz_tran_id VARCHAR(255),
+        sslcz_val_id VARCHAR(255),
+        status transactionstatus NOT NULL,
+        requested_foreign_currency VARCHAR(3) NOT NULL,
+        requested_foreign_amount NUMERIC(12, 4) NOT NULL,
+        exchange_rate_bdt NUMERIC(15, 8) NOT NULL,
+        calculated_bdt_amount NUMERIC(12, 2) NOT NULL,
+        sslcz_received_bdt_amount NUMERIC(12, 2),
+        sslcz_store_amount_bdt NUMERIC(12, 2),
+        recipient_paypal_email VARCHAR(255) NOT NULL,
+        sslcz_card_type VARCHAR(100),
+        sslcz_bank_tran_id VARCHAR(100),
+        sslcz_ipn_payload JSON,
+        sslcz_validation_payload JSON,
+        paypal_payout_tran_id VARCHAR(255),
+        paypal_payout_status VARCHAR(50),
+        paypal_payout_payload JSON,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+        updated_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+    """,
+    # sender_batch_id comes from 0008
+    "payout_jobs": """
+        id SERIAL PRIMARY KEY,
+        transaction_id INTEGER NOT NULL UNIQUE REFERENCES transactions (id),
+        status payoutjobstatus NOT NULL,
+        attempts INTEGER NOT NULL,
+        next_attempt_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+        locked_until TIMESTAMP WITH TIME ZONE,
+        locked_by VARCHAR(100),
+        last_error TEXT,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+        updated_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+    """,
+}
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_users_id ON users (id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_users_username ON users (username)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_users_email ON users (email)",
+    "CREATE INDEX IF NOT EXISTS ix_user_sessions_id ON user_sessions (id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_user_sessions_session_token ON user_sessions (session_token)",
+    "CREATE INDEX IF NOT EXISTS ix_admin_config_id ON admin_config (id)",
+    "CREATE INDEX IF NOT EXISTS ix_system_settings_id ON system_settings (id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_system_settings_setting_key ON system_settings (setting_key)",
+    "CREATE INDEX IF NOT EXISTS ix_exchange_rates_id ON exchange_rates (id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_exchange_rates_currency_code ON exchange_rates (currency_code)",
+    "CREATE INDEX IF NOT EXISTS ix_notification_preferences_id ON notification_preferences (id)",
+    "CREATE INDEX IF NOT EXISTS ix_payment_limits_id ON payment_limits (id)",
+    "CREATE INDEX IF NOT EXISTS ix_paypal_credentials_id ON paypal_credentials (id)",
+    "CREATE INDEX IF NOT EXISTS ix_oauth_tokens_id ON oauth_tokens (id)",
+    "CREATE INDEX IF NOT EXISTS ix_paypal_webhook_events_id ON paypal_webhook_events (id)",
+    "CREATE INDEX IF NOT EXISTS ix_paypal_webhook_events_unprocessed ON paypal_webhook_events (id) "
+    "WHERE processed_at IS NULL",
+    "CREATE INDEX IF NOT EXISTS ix_ipn_inbox_id ON ipn_inbox (id)",
+    "CREATE INDEX IF NOT EXISTS ix_ipn_inbox_unprocessed ON ipn_inbox (id) WHERE processed_at IS NULL",
+    "CREATE INDEX IF NOT EXISTS ix_idempotency_keys_id ON idempotency_keys (id)",
+    "CREATE INDEX IF NOT EXISTS ix_idempotency_keys_expires_at ON idempotency_keys (expires_at)",
+    "CREATE INDEX IF NOT EXISTS ix_transactions_id ON transactions (id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_transactions_internal_tran_id ON transactions (internal_tran_id)",
+    "CREATE INDEX IF NOT EXISTS ix_payout_jobs_id ON payout_jobs (id)",
+    "CREATE INDEX IF NOT EXISTS ix_payout_jobs_status_next_attempt_at ON payout_jobs (status, next_attempt_at)",
+]
+
+
+def upgrade() -> None:
+    for type_name, values in ENUM_TYPES.items():
+        labels = ", ".join(f"'{value}'" for value in values)
+        op.execute(f"""
+            DO $$ BEGIN
+                CREATE TYPE {type_name} AS ENUM ({labels});
+            EXCEPTION WHEN duplicate_object THEN NULL;
+            END $$
+        """)
+
+    for table_name, columns in TABLES.items():
+        op.execute(f"CREATE TABLE IF NOT EXISTS {table_name} ({columns})")
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS exchange_rate_history (
+            currency_code VARCHAR(3) NOT NULL,
+            recorded_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            rate_to_bdt NUMERIC(15, 8) NOT NULL,
+            PRIMARY KEY (currency_code, recorded_at)
+        ) PARTITION BY RANGE (recorded_at)
+    """)
+    for statement in monthly_partition_statements(
+        "exchange_rate_history", get_settings().PARTITION_MONTHS_AHEAD
+    ):
+        op.execute(statement)
+
+    for statement in INDEXES:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS exchange_rate_history")
+    for table_name in reversed(list(TABLES)):
+        op.execute(f"DROP TABLE IF EXISTS {table_name}")
+    for type_name in reversed(list(ENUM_TYPES)):
+        op.execute(f"DROP TYPE IF EXISTS {type_name}")
@@ -0,0 +1,36 @@
+"""Add per-row payout status check scheduling columns to transactions
+
+Databases created before these columns existed only get them through this
+migration; Base.metadata.create_all does not alter existing tables.
+
+Revision ID: 0001
+Revises: 0000
+Create Date: 2026-10-18 12:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = '0000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Nullable / constant-default columns: metadata-only changes, no rewrite
+    op.execute(
+        "ALTER TABLE transactions "
+        "ADD COLUMN IF NOT EXISTS payout_next_check_at TIMESTAMP WITH TIME ZONE"
+    )
+    op.execute(
+        "ALTER TABLE transactions "
+        "ADD COLUMN IF NOT EXISTS payout_check_count INTEGER NOT NULL DEFAULT 0"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("transactions", "payout_check_count")
+    op.drop_column("transactions", "payout_next_check_at")
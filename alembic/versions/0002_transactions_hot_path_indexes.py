@@ -0,0 +1,68 @@
+"""Indexes for the transactions hot paths, built with CREATE INDEX CONCURRENTLY
+
+- ix_transactions_user_id_created_at_id: history pages (keyset on created_at, id)
+- ix_transactions_user_id_status: per-user status counts
+- ix_transactions_pending_status: partial, in-flight statuses only
+- ix_transactions_payout_next_check_at: partial, payout status poller
+- ix_users_created_at_id: admin user listing (keyset)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 12:05:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = {
+    "ix_transactions_user_id_created_at_id":
+        "ON transactions (user_id, created_at DESC, id DESC)",
+    "ix_transactions_user_id_status":
+        "ON transactions (user_id, status)",
+    "ix_transactions_pending_status":
+        "ON transactions (status, created_at) "
+        "WHERE status IN ('PENDING', 'IPN_RECEIVED', 'PAYOUT_PENDING')",
+    "ix_transactions_payout_next_check_at":
+        "ON transactions (payout_next_check_at, id) WHERE status = 'PAYOUT_PENDING'",
+    "ix_users_created_at_id":
+        "ON users (created_at DESC, id DESC)",
+}
+
+
+def _drop_if_invalid(name: str) -> None:
+    # An interrupted CONCURRENTLY build leaves an INVALID index behind that
+    # IF NOT EXISTS would otherwise keep forever
+    if op.get_context().as_sql:
+        # Offline scripts have no connection to inspect pg_index with
+        return
+    invalid = op.get_bind().execute(
+        sa.text(
+            "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name AND NOT i.indisvalid"
+        ),
+        {"name": name}
+    ).scalar()
+    if invalid:
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction block; writes keep flowing
+    with op.get_context().autocommit_block():
+        for name, definition in INDEXES.items():
+            _drop_if_invalid(name)
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in reversed(list(INDEXES)):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
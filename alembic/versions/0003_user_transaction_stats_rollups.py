@@ -0,0 +1,91 @@
+"""Per-user transaction rollups maintained by triggers on transactions
+
+Creates the rollup tables, installs the triggers and backfills from the
+existing history. transactions is locked against writes between installing
+the triggers and the backfill so no row is counted twice or missed.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 14:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.user_transaction_stats import SUCCESSFUL_STATUSES, TRANSACTION_STATS_DDL
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # IF NOT EXISTS: the app's create_all may already have made the tables
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS user_transaction_stats (
+            user_id INTEGER PRIMARY KEY,
+            total_count INTEGER NOT NULL DEFAULT 0,
+            successful_count INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS user_transaction_currency_totals (
+            user_id INTEGER NOT NULL,
+            currency VARCHAR(3) NOT NULL,
+            completed_amount NUMERIC(18, 4) NOT NULL DEFAULT 0,
+            completed_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, currency)
+        )
+    """)
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS user_transaction_daily_counts (
+            user_id INTEGER NOT NULL,
+            day DATE NOT NULL,
+            transaction_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, day)
+        )
+    """)
+
+    # Reads stay allowed; writers wait for the backfill to commit
+    op.execute("LOCK TABLE transactions IN SHARE ROW EXCLUSIVE MODE")
+    for statement in TRANSACTION_STATS_DDL:
+        op.execute(statement)
+
+    op.execute("TRUNCATE user_transaction_stats, user_transaction_currency_totals, user_transaction_daily_counts")
+    op.execute(f"""
+        INSERT INTO user_transaction_stats (user_id, total_count, successful_count)
+        SELECT user_id, count(*), count(*) FILTER (WHERE status::text IN {SUCCESSFUL_STATUSES!r})
+        FROM transactions
+        GROUP BY user_id
+    """)
+    op.execute("""
+        INSERT INTO user_transaction_currency_totals
+            (user_id, currency, completed_amount, completed_count)
+        SELECT user_id, requested_foreign_currency, sum(requested_foreign_amount), count(*)
+        FROM transactions
+        WHERE status::text = 'PAYOUT_COMPLETED'
+        GROUP BY user_id, requested_foreign_currency
+    """)
+    op.execute("""
+        INSERT INTO user_transaction_daily_counts (user_id, day, transaction_count)
+        SELECT user_id, (created_at AT TIME ZONE 'UTC')::date, count(*)
+        FROM transactions
+        WHERE created_at IS NOT NULL
+        GROUP BY user_id, (created_at AT TIME ZONE 'UTC')::date
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS transactions_stats_update ON transactions")
+    op.execute("DROP TRIGGER IF EXISTS transactions_stats_insert_delete ON transactions")
+    op.execute("DROP FUNCTION IF EXISTS transactions_maintain_stats()")
+    op.execute(
+        "DROP FUNCTION IF EXISTS transaction_stats_apply("
+        "integer, text, text, numeric, timestamptz, integer, boolean)"
+    )
+    op.drop_table("user_transaction_daily_counts")
+    op.drop_table("user_transaction_currency_totals")
+    op.drop_table("user_transaction_stats")
@@ -0,0 +1,144 @@
+"""Move gateway JSON payloads off transactions into content-addressed blobs
+
+Existing payloads are encoded by app.services.payload_store.encode_payload,
+like new ones, so a backfilled blob and a freshly written copy of the same
+payload share one digest. This needs a live connection (no --sql mode).
+Dropping the columns is a catalog
+change only: the old values stay in the heap until rows are rewritten, so run
+pg_repack (or VACUUM FULL in a maintenance window) to actually shrink it.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 16:00:00
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+PAYLOAD_COLUMNS = {
+    "sslcz_ipn_payload": "SSLCZ_IPN",
+    "sslcz_validation_payload": "SSLCZ_VALIDATION",
+    "paypal_payout_payload": "PAYPAL_PAYOUT",
+}
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def _backfill(bind, column_name: str, kind: str) -> None:
+    from app.services.payload_store import encode_payload
+
+    after_id = 0
+    while True:
+        # psycopg2 returns json columns already parsed
+        rows = bind.execute(
+            sa.text(
+                f"SELECT id, {column_name} FROM transactions "
+                f"WHERE {column_name} IS NOT NULL AND id > :after_id "
+                "ORDER BY id LIMIT :limit"
+            ),
+            {"after_id": after_id, "limit": BACKFILL_BATCH_SIZE}
+        ).all()
+        if not rows:
+            return
+
+        blobs = {}
+        links = []
+        for transaction_id, payload in rows:
+            digest, codec, data, raw_size = encode_payload(payload)
+            blobs[digest] = {"digest": digest, "codec": codec, "data": data, "raw_size": raw_size}
+            links.append({"transaction_id": transaction_id, "kind": kind, "blob_digest": digest})
+
+        bind.execute(
+            sa.text(
+                "INSERT INTO payload_blobs (digest, codec, data, raw_size) "
+                "VALUES (:digest, :codec, :data, :raw_size) "
+                "ON CONFLICT (digest) DO NOTHING"
+            ),
+            [blobs[digest] for digest in sorted(blobs)]
+        )
+        bind.execute(
+            sa.text(
+                "INSERT INTO transaction_payloads (transaction_id, kind, blob_digest) "
+                "VALUES (:transaction_id, CAST(:kind AS payloadkind), :blob_digest) "
+                "ON CONFLICT DO NOTHING"
+            ),
+            links
+        )
+        after_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    op.execute("""
+        DO $$ BEGIN
+            CREATE TYPE payloadkind AS ENUM ('SSLCZ_IPN', 'SSLCZ_VALIDATION', 'PAYPAL_PAYOUT');
+        EXCEPTION WHEN duplicate_object THEN NULL;
+        END $$
+    """)
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS payload_blobs (
+            digest VARCHAR(64) PRIMARY KEY,
+            codec VARCHAR(10) NOT NULL,
+            data BYTEA NOT NULL,
+            raw_size INTEGER NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+        )
+    """)
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS transaction_payloads (
+            transaction_id INTEGER NOT NULL REFERENCES transactions (id) ON DELETE CASCADE,
+            kind payloadkind NOT NULL,
+            blob_digest VARCHAR(64) NOT NULL REFERENCES payload_blobs (digest),
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            PRIMARY KEY (transaction_id, kind)
+        )
+    """)
+
+    op.execute("LOCK TABLE transactions IN SHARE ROW EXCLUSIVE MODE")
+    # Columns are only present on databases created before this revision
+    bind = op.get_bind()
+    existing = {column["name"] for column in sa.inspect(bind).get_columns("transactions")}
+    for column_name, kind in PAYLOAD_COLUMNS.items():
+        if column_name not in existing:
+            continue
+        _backfill(bind, column_name, kind)
+        op.drop_column("transactions", column_name)
+
+
+def downgrade() -> None:
+    from app.services.payload_store import decode_payload
+
+    for column_name in PAYLOAD_COLUMNS:
+        op.add_column("transactions", sa.Column(column_name, sa.JSON(), nullable=True))
+
+    # Compressed blobs can only be decoded in Python
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        "SELECT p.transaction_id, p.kind, b.codec, b.data "
+        "FROM transaction_payloads p JOIN payload_blobs b ON b.digest = p.blob_digest"
+    )).all()
+    columns_by_kind = {kind: column_name for column_name, kind in PAYLOAD_COLUMNS.items()}
+    for row in rows:
+        bind.execute(
+            sa.text(
+                f"UPDATE transactions SET {columns_by_kind[row.kind]} = CAST(:payload AS json) "
+                "WHERE id = :transaction_id"
+            ),
+            {
+                "payload": json.dumps(decode_payload(row.codec, bytes(row.data))),
+                "transaction_id": row.transaction_id
+            }
+        )
+
+    op.drop_table("transaction_payloads")
+    op.drop_table("payload_blobs")
+    op.execute("DROP TYPE IF EXISTS payloadkind")
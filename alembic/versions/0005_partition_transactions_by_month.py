@@ -0,0 +1,161 @@
+"""Range-partition transactions by month on created_at
+
+The existing table is not copied: it is renamed to transactions_legacy and
+attached as the partition for everything before the current month, so only
+the current month's rows move. Run it in a maintenance window; transactions
+is locked for the duration and the new unique indexes on the legacy
+partition, including its (id, created_at) primary key, are built inside it.
+
+None of this runs under the SQLite test suite; tests/test_migrations.py
+upgrades a real Postgres database through this revision when
+MIGRATIONS_DATABASE_URL points at a disposable one.
+
+- The primary key becomes (id, created_at) and internal_tran_id is unique
+  together with created_at, since unique keys must include the partition key
+- payout_jobs and transaction_payloads lose their foreign keys to
+  transactions.id, which is no longer unique on its own
+- The stats triggers move from the old table to the partitioned parent
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 18:00:00
+
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import get_settings
+from app.core.partitions import monthly_partition_statements
+from app.models.user_transaction_stats import TRANSACTION_STATS_DDL
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+PARENT_INDEXES = [
+    "CREATE INDEX ix_transactions_id ON transactions (id)",
+    "CREATE INDEX ix_transactions_internal_tran_id ON transactions (internal_tran_id)",
+    "CREATE INDEX ix_transactions_user_id_created_at_id ON transactions (user_id, created_at DESC, id DESC)",
+    "CREATE INDEX ix_transactions_user_id_status ON transactions (user_id, status)",
+    "CREATE INDEX ix_transactions_pending_status ON transactions (status, created_at) "
+    "WHERE status IN ('PENDING', 'IPN_RECEIVED', 'PAYOUT_PENDING')",
+    "CREATE INDEX ix_transactions_payout_next_check_at ON transactions (payout_next_check_at, id) "
+    "WHERE status = 'PAYOUT_PENDING'",
+]
+
+
+def upgrade() -> None:
+    first_of_month = datetime.now(timezone.utc).date().replace(day=1).isoformat()
+
+    op.execute("LOCK TABLE transactions IN ACCESS EXCLUSIVE MODE")
+    op.execute("ALTER TABLE IF EXISTS payout_jobs DROP CONSTRAINT IF EXISTS payout_jobs_transaction_id_fkey")
+    op.execute(
+        "ALTER TABLE IF EXISTS transaction_payloads "
+        "DROP CONSTRAINT IF EXISTS transaction_payloads_transaction_id_fkey"
+    )
+    op.execute("DROP TRIGGER IF EXISTS transactions_stats_insert_delete ON transactions")
+    op.execute("DROP TRIGGER IF EXISTS transactions_stats_update ON transactions")
+
+    # The partition key must be NOT NULL
+    op.execute("UPDATE transactions SET created_at = coalesce(updated_at, now()) WHERE created_at IS NULL")
+    op.execute("ALTER TABLE transactions ALTER COLUMN created_at SET NOT NULL")
+
+    # Free the index names for the parent's partitioned indexes
+    op.execute("ALTER TABLE transactions RENAME TO transactions_legacy")
+    op.execute("""
+        DO $$
+        DECLARE
+            index_name text;
+        BEGIN
+            FOR index_name IN
+                SELECT indexname FROM pg_indexes WHERE tablename = 'transactions_legacy'
+            LOOP
+                EXECUTE format('ALTER INDEX %I RENAME TO %I', index_name, left(index_name, 56) || '_legacy');
+            END LOOP;
+        END $$
+    """)
+
+    op.execute(
+        "CREATE TABLE transactions (LIKE transactions_legacy INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (created_at)"
+    )
+    op.execute("ALTER SEQUENCE transactions_id_seq OWNED BY transactions.id")
+    op.execute("ALTER TABLE transactions ADD CONSTRAINT transactions_pkey PRIMARY KEY (id, created_at)")
+    op.execute(
+        "ALTER TABLE transactions ADD CONSTRAINT uq_transactions_internal_tran_id_created_at "
+        "UNIQUE (internal_tran_id, created_at)"
+    )
+    op.execute(
+        "ALTER TABLE transactions ADD CONSTRAINT transactions_user_id_fkey "
+        "FOREIGN KEY (user_id) REFERENCES users (id)"
+    )
+    for statement in PARENT_INDEXES:
+        op.execute(statement)
+
+    # Current month onwards, plus the DEFAULT partition
+    for statement in monthly_partition_statements(
+        "transactions", get_settings().PARTITION_MONTHS_AHEAD
+    ):
+        op.execute(statement)
+    op.execute(f"INSERT INTO transactions SELECT * FROM transactions_legacy WHERE created_at >= '{first_of_month}'")
+    op.execute(f"DELETE FROM transactions_legacy WHERE created_at >= '{first_of_month}'")
+
+    # The CHECK lets ATTACH skip its own validation scan; matching legacy
+    # indexes are attached to the parent's instead of being rebuilt
+    op.execute(
+        f"ALTER TABLE transactions_legacy ADD CONSTRAINT transactions_legacy_bound "
+        f"CHECK (created_at < '{first_of_month}')"
+    )
+    # A partition cannot keep a primary key of its own; replacing (id) with
+    # the parent's (id, created_at) lets ATTACH adopt it as the partition's
+    op.execute("""
+        DO $$
+        DECLARE
+            pkey_name text;
+        BEGIN
+            SELECT conname INTO pkey_name FROM pg_constraint
+            WHERE conrelid = 'transactions_legacy'::regclass AND contype = 'p';
+            IF pkey_name IS NOT NULL THEN
+                EXECUTE format('ALTER TABLE transactions_legacy DROP CONSTRAINT %I', pkey_name);
+            END IF;
+        END $$
+    """)
+    op.execute(
+        "ALTER TABLE transactions_legacy "
+        "ADD CONSTRAINT transactions_legacy_pkey PRIMARY KEY (id, created_at)"
+    )
+    op.execute(
+        f"ALTER TABLE transactions ATTACH PARTITION transactions_legacy "
+        f"FOR VALUES FROM (MINVALUE) TO ('{first_of_month}')"
+    )
+    op.execute("ALTER TABLE transactions_legacy DROP CONSTRAINT transactions_legacy_bound")
+
+    # Row triggers on the parent are cloned to every partition
+    for statement in TRANSACTION_STATS_DDL:
+        op.execute(statement)
+
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS transaction_archives (
+            id SERIAL PRIMARY KEY,
+            partition_name VARCHAR(63) NOT NULL UNIQUE,
+            path VARCHAR(1024) NOT NULL,
+            range_start TIMESTAMP WITH TIME ZONE,
+            range_end TIMESTAMP WITH TIME ZONE NOT NULL,
+            row_count INTEGER NOT NULL,
+            batch_first_keys JSON NOT NULL,
+            archived_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+        )
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS ix_transaction_archives_id ON transaction_archives (id)")
+
+
+def downgrade() -> None:
+    # Archived partitions are gone from the database and a partitioned table
+    # cannot be turned back into a plain one in place
+    raise NotImplementedError("Restore transactions from a backup taken before revision 0005")
@@ -0,0 +1,49 @@
+"""Store internal_tran_id as a native uuid instead of VARCHAR(255)
+
+Existing IDs are uuid4 strings and convert in place, so every ID handed to
+SSLCommerz, PayPal or clients stays valid; new ones are UUIDv7. 16 bytes
+instead of a 37-byte varlena roughly halves the internal_tran_id indexes.
+The ALTER rewrites every partition and its indexes under an exclusive lock,
+so run it in a maintenance window.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 20:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Fail before the rewrite, with a useful message, if any ID is not a UUID
+    op.execute("""
+        DO $$
+        DECLARE
+            invalid bigint;
+        BEGIN
+            SELECT count(*) INTO invalid FROM transactions
+            WHERE internal_tran_id !~* '^[{]?[0-9a-f]{8}-?([0-9a-f]{4}-?){3}[0-9a-f]{12}[}]?$';
+            IF invalid > 0 THEN
+                RAISE EXCEPTION '% transactions have an internal_tran_id that is not a UUID', invalid;
+            END IF;
+        END $$
+    """)
+    op.execute(
+        "ALTER TABLE transactions "
+        "ALTER COLUMN internal_tran_id TYPE uuid USING internal_tran_id::uuid"
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        "ALTER TABLE transactions "
+        "ALTER COLUMN internal_tran_id TYPE VARCHAR(255) USING internal_tran_id::text"
+    )
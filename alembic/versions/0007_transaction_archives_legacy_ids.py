@@ -0,0 +1,33 @@
+"""Flag transaction archives that hold pre-UUIDv7 IDs
+
+Lookups of archived transactions pick the archive from the time embedded in
+a UUIDv7 ID. Older uuid4 IDs carry no time, so only archives flagged here are
+searched for them. Archives written before this revision are flagged, since
+their contents were not checked.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 09:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER TABLE transaction_archives "
+        "ADD COLUMN IF NOT EXISTS has_legacy_ids BOOLEAN NOT NULL DEFAULT true"
+    )
+    op.execute("ALTER TABLE transaction_archives ALTER COLUMN has_legacy_ids SET DEFAULT false")
+
+
+def downgrade() -> None:
+    op.drop_column("transaction_archives", "has_legacy_ids")
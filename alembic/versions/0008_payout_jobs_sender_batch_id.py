@@ -0,0 +1,35 @@
+"""Persist the PayPal sender_batch_id on payout jobs
+
+A batch is now grouped once: the sender_batch_id is stored on its jobs
+before the first send and every retry resends exactly those jobs under it.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 10:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER TABLE IF EXISTS payout_jobs "
+        "ADD COLUMN IF NOT EXISTS sender_batch_id VARCHAR(64)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_payout_jobs_sender_batch_id "
+        "ON payout_jobs (sender_batch_id)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_payout_jobs_sender_batch_id", table_name="payout_jobs")
+    op.drop_column("payout_jobs", "sender_batch_id")
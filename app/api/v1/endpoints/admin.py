@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Optional
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.api.v1.endpoints.auth import get_current_user
+from app.api.v1.endpoints.transactions import export_filters, export_response
 from app.controllers.admin_controller import AdminController
 from app.schemas.admin_config import AdminConfigCreate, AdminConfigUpdate, AdminConfigResponse
+from app.schemas.transaction import TransactionFilter
 from app.schemas.user import UserCreate, UserResponse
 from app.models.user import User, UserRole
 
@@ -60,3 +63,12 @@ def update_admin_config(
 ):
     controller = AdminController(db)
     return controller.update_admin_config(config_id, config_update, current_user.role)
+
+@router.get("/transactions/export")
+def export_transactions(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    user_id: Optional[int] = None,
+    filters: TransactionFilter = Depends(export_filters),
+    current_user: User = Depends(require_admin)
+):
+    return export_response(user_id, filters, format)
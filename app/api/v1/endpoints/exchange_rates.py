@@ -1,22 +1,105 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.schemas.exchange_rate import ExchangeRateResponse
-from app.services.exchange_rate_service import ExchangeRateService
+from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import datetime, timedelta, timezone
+from typing import Literal, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.schemas.exchange_rate import (
+    ExchangeRateResponse,
+    RateMatrixResponse,
+    ExchangeRatePointResponse,
+    ExchangeRateHistoryResponse
+)
+from app.services.exchange_rate_service import (
+    ExchangeRateService,
+    ExchangeRateUnavailableError,
+    UnknownCurrencyError
+)
 
 router = APIRouter()
 
+# Declared before /{currency_code} so "matrix" is not taken as a currency
+@router.get("/matrix", response_model=RateMatrixResponse)
+async def get_rate_matrix(
+    currencies: Optional[str] = Query(None, description="Comma-separated subset, e.g. USD,EUR,BDT"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    service = ExchangeRateService(db)
+    try:
+        matrix = await service.get_rate_matrix()
+        selected = None
+        if currencies:
+            selected = [code.strip().upper() for code in currencies.split(",") if code.strip()]
+        codes, rates = matrix.rows(selected)
+        return RateMatrixResponse(
+            currencies=codes,
+            rates=rates,
+            last_updated=matrix.last_updated
+        )
+    except ExchangeRateUnavailableError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+
 @router.get("/{currency_code}", response_model=ExchangeRateResponse)
 async def get_exchange_rate(
     currency_code: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     service = ExchangeRateService(db)
     try:
         rate = await service.get_exchange_rate(currency_code.upper())
         return rate
+    except UnknownCurrencyError as e:
+        raise HTTPException(
+            status_code=404,
+            detail=str(e)
+        )
+    except ExchangeRateUnavailableError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=400,
             detail=str(e)
         )
+
+@router.get("/{currency_code}/history", response_model=ExchangeRateHistoryResponse)
+async def get_exchange_rate_history(
+    currency_code: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    interval: Literal["hour", "day", "week"] = "hour",
+    db: AsyncSession = Depends(get_async_db)
+):
+    end = end or datetime.now(timezone.utc)
+    start = start or end - timedelta(days=7)
+    service = ExchangeRateService(db)
+    buckets = await service.get_history(currency_code.upper(), start, end, interval)
+    return ExchangeRateHistoryResponse(
+        currency_code=currency_code.upper(),
+        interval=interval,
+        buckets=buckets
+    )
+
+@router.get("/{currency_code}/at", response_model=ExchangeRatePointResponse)
+async def get_exchange_rate_at(
+    currency_code: str,
+    timestamp: datetime,
+    db: AsyncSession = Depends(get_async_db)
+):
+    service = ExchangeRateService(db)
+    rate = await service.get_rate_at(currency_code.upper(), timestamp)
+    if not rate:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No {currency_code.upper()} rate recorded at or before {timestamp.isoformat()}"
+        )
+    return rate
@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Depends, Request, HTTPException
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from fastapi import APIRouter, Depends, Header, Request, HTTPException
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
 from app.api.v1.endpoints.auth import get_current_user
 from app.controllers.payment_controller import PaymentController
-from app.schemas.transaction import PaymentCalculation, PaymentCalculationResponse, PaymentInitiate
-from app.schemas.payment import PaymentIPNRequest
+from app.schemas.transaction import (
+    PaymentCalculation,
+    PaymentCalculationResponse,
+    PaymentCalculationBatch,
+    PaymentCalculationBatchResponse,
+    PaymentInitiate
+)
 from app.models.user import User
 
 router = APIRouter()
@@ -12,32 +18,41 @@ router = APIRouter()
 @router.post("/calculate-cost", response_model=PaymentCalculationResponse)
 async def calculate_cost(
     payment_calc: PaymentCalculation,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     controller = PaymentController(db)
     return await controller.calculate_cost(payment_calc)
 
+@router.post("/calculate-cost/batch", response_model=PaymentCalculationBatchResponse)
+async def calculate_cost_batch(
+    batch: PaymentCalculationBatch,
+    db: AsyncSession = Depends(get_async_db)
+):
+    controller = PaymentController(db)
+    return await controller.calculate_cost_batch(batch)
+
 @router.post("/initiate")
 async def initiate_payment(
     payment_data: PaymentInitiate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+    db: AsyncSession = Depends(get_async_db)
 ):
     controller = PaymentController(db)
-    return await controller.initiate_payment(payment_data, current_user.id)
+    return await controller.initiate_payment(payment_data, current_user.id, idempotency_key)
 
 @router.post("/ipn")
 async def handle_ipn(
-    ipn_data: PaymentIPNRequest,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
 ):
     controller = PaymentController(db)
-    return await controller.handle_ipn(ipn_data)
+    return await controller.receive_ipn(request)
 
 @router.post("/success")
 async def handle_success(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     controller = PaymentController(db)
     return await controller.handle_success(request)
@@ -45,7 +60,7 @@ async def handle_success(
 @router.post("/fail")
 async def handle_fail(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     controller = PaymentController(db)
     return await controller.handle_fail(request)
@@ -53,7 +68,15 @@ async def handle_fail(
 @router.post("/cancel")
 async def handle_cancel(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     controller = PaymentController(db)
     return await controller.handle_cancel(request)
+
+@router.post("/paypal/webhook")
+async def handle_paypal_webhook(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+):
+    controller = PaymentController(db)
+    return await controller.handle_paypal_webhook(request)
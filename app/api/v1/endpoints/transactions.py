@@ -1,17 +1,24 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Response
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
+from datetime import datetime
+from decimal import Decimal
 from sqlalchemy.orm import Session
 from app.core.database import get_db
+from app.core.pagination import NEXT_CURSOR_HEADER, NEXT_CURSOR_RESPONSES
 from app.api.v1.endpoints.auth import get_current_user
-from app.controllers.transaction_controller import TransactionController
+from app.controllers.transaction_controller import TransactionController, EXPORT_MEDIA_TYPES
 from app.schemas.transaction import TransactionResponse, TransactionFilter
+from app.models.transaction import TransactionStatus
 from app.models.user import User
 
 router = APIRouter()
 
-@router.get("/", response_model=List[TransactionResponse])
+@router.get("/", response_model=List[TransactionResponse], responses=NEXT_CURSOR_RESPONSES)
 def get_user_transactions(
-    skip: int = Query(0, ge=0),
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    skip: int = Query(0, ge=0, description="Deprecated: use cursor"),
     limit: int = Query(100, ge=1, le=1000),
     status: Optional[str] = None,
     currency: Optional[str] = None,
@@ -20,7 +27,15 @@ def get_user_transactions(
 ):
     filters = TransactionFilter(status=status, currency=currency) if status or currency else None
     controller = TransactionController(db)
-    return controller.get_user_transactions(current_user.id, skip, limit, filters)
+    if skip and not cursor:
+        return controller.get_user_transactions(current_user.id, skip, limit, filters)
+    
+    transactions, next_cursor = controller.get_user_transactions_page(
+        current_user.id, cursor, limit, filters
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return transactions
 
 @router.get("/stats")
 def get_user_stats(
@@ -30,6 +45,38 @@ def get_user_stats(
     controller = TransactionController(db)
     return controller.get_user_stats(current_user.id)
 
+def export_filters(
+    status: Optional[TransactionStatus] = None,
+    currency: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    min_amount: Optional[Decimal] = None,
+    max_amount: Optional[Decimal] = None
+) -> TransactionFilter:
+    return TransactionFilter(
+        status=status,
+        currency=currency,
+        start_date=start_date,
+        end_date=end_date,
+        min_amount=min_amount,
+        max_amount=max_amount
+    )
+
+def export_response(user_id: Optional[int], filters: TransactionFilter, export_format: str) -> StreamingResponse:
+    return StreamingResponse(
+        TransactionController.export_transactions(user_id, filters, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="transactions.{export_format}"'}
+    )
+
+@router.get("/export")
+def export_user_transactions(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    filters: TransactionFilter = Depends(export_filters),
+    current_user: User = Depends(get_current_user)
+):
+    return export_response(current_user.id, filters, format)
+
 @router.get("/{transaction_id}", response_model=TransactionResponse)
 def get_transaction(
     transaction_id: str,
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from typing import List, Optional
 from sqlalchemy.orm import Session
 from app.core.database import get_db
+from app.core.pagination import NEXT_CURSOR_HEADER, NEXT_CURSOR_RESPONSES
 from app.api.v1.endpoints.auth import get_current_user
 from app.controllers.user_controller import UserController
 from app.schemas.user import UserResponse, UserUpdate
@@ -21,16 +22,24 @@ def require_admin(current_user: User = Depends(get_current_user)) -> User:
 def get_current_user_info(current_user: User = Depends(get_current_user)):
     return current_user
 
-@router.get("/", response_model=List[UserResponse])
+@router.get("/", response_model=List[UserResponse], responses=NEXT_CURSOR_RESPONSES)
 def get_users(
-    skip: int = Query(0, ge=0),
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    skip: int = Query(0, ge=0, description="Deprecated: use cursor"),
     limit: int = Query(100, ge=1, le=1000),
     is_active: Optional[bool] = None,
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     controller = UserController(db)
-    return controller.get_users(skip, limit, is_active)
+    if skip and not cursor:
+        return controller.get_users(skip, limit, is_active)
+    
+    users, next_cursor = controller.get_users_page(cursor, limit, is_active)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return users
 
 @router.get("/{user_id}", response_model=UserResponse)
 def get_user(
@@ -1,4 +1,4 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, Dict, Generic, List, Optional, Tuple, Type, TypeVar, Union
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
@@ -21,6 +21,11 @@ class BaseController(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     ) -> List[ModelType]:
         return self.service.get_multi(self.db, skip=skip, limit=limit)
     
+    def get_multi_page(
+        self, *, cursor: Optional[str] = None, limit: int = 100
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        return self.service.get_multi_page(self.db, cursor=cursor, limit=limit)
+    
     def create(self, obj_in: CreateSchemaType) -> ModelType:
         return self.service.create(self.db, obj_in=obj_in)
     
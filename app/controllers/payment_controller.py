@@ -1,63 +1,186 @@
 from fastapi import Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
-from typing import Dict, Any
-import uuid
-from app.core.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import ValidationError
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, Any, List, Optional, Tuple
+import json
+from app.core.config import get_settings
+from app.core.database import get_async_db
+from app.core.ids import new_transaction_id
+from app.core.security import create_quote_token, decode_quote_token
 from app.models.transaction import Transaction, TransactionStatus
+from app.models.transaction_payload import PayloadKind
 from app.schemas.payment import PaymentIPNRequest, PaymentValidationResponse
-from app.schemas.transaction import PaymentInitiate, PaymentCalculation, PaymentCalculationResponse
-from app.services.payment_service import PaymentService
-from app.services.exchange_rate_service import ExchangeRateService
+from app.schemas.transaction import (
+    PaymentInitiate,
+    PaymentCalculation,
+    PaymentCalculationResponse,
+    PaymentCalculationBatch,
+    PaymentCalculationBatchItem,
+    PaymentCalculationBatchResponse
+)
+from app.services.payment_service import PaymentService, calculate_price, calculate_prices
+from app.services.exchange_rate_service import (
+    ExchangeRateService,
+    ExchangeRateSnapshot,
+    ExchangeRateUnavailableError
+)
 from app.services.sslcommerz_service import SSLCommerzService
-from app.services.paypal_service import PayPalService
+from app.services.idempotency_service import (
+    IdempotencyKeyInProgress,
+    IdempotencyKeyMismatch,
+    IdempotencyService
+)
+from app.services.ipn_inbox_service import IPNInboxService
+from app.services.payload_store import PayloadStore
+from app.services.payout_service import PayoutService
+from app.services.paypal_webhook_service import PAYOUT_ITEM_EVENT_PREFIX, PayPalWebhookService
+
+settings = get_settings()
 
 class PaymentController:
-    def __init__(self, db: Session = Depends(get_db)):
+    def __init__(self, db: AsyncSession = Depends(get_async_db)):
         self.db = db
         self.payment_service = PaymentService(db)
         self.exchange_rate_service = ExchangeRateService(db)
         self.sslcommerz_service = SSLCommerzService()
-        self.paypal_service = PayPalService()
+        self.payout_service = PayoutService(db)
+        self.paypal_webhook_service = PayPalWebhookService(db)
+        self.ipn_inbox_service = IPNInboxService(db)
+        self.idempotency_service = IdempotencyService(db)
+        self.payload_store = PayloadStore(db)
+    
+    async def _get_exchange_rates(self, currency_codes: List[str]) -> Dict[str, ExchangeRateSnapshot]:
+        """Rate lookup with provider outages mapped to 503 and bad codes to 400"""
+        try:
+            return await self.exchange_rate_service.get_exchange_rates(currency_codes)
+        except ExchangeRateUnavailableError as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=str(e)
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+    
+    async def _get_exchange_rate(self, currency_code: str) -> ExchangeRateSnapshot:
+        rates = await self._get_exchange_rates([currency_code])
+        return rates[currency_code]
     
     async def calculate_cost(self, payment_calc: PaymentCalculation) -> PaymentCalculationResponse:
-        exchange_rate = await self.exchange_rate_service.get_exchange_rate(payment_calc.currency_code)
+        exchange_rate = await self._get_exchange_rate(payment_calc.currency_code)
+        price = calculate_price(payment_calc.amount, exchange_rate.rate_to_bdt)
         
-        total_bdt = float(payment_calc.amount) * float(exchange_rate.rate_to_bdt)
-        service_fee = total_bdt * 0.025  # 2.5% service fee
+        # Signed quote: /initiate charges exactly this without re-pricing
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=settings.QUOTE_TTL_SECONDS)
+        quote_token = create_quote_token({
+            "cur": payment_calc.currency_code,
+            "amt": str(payment_calc.amount),
+            "rate": str(exchange_rate.rate_to_bdt),
+            "fee": str(price["service_fee"]),
+            "total": str(price["total_bdt_amount"])
+        }, expires_at)
         
         return PaymentCalculationResponse(
-            total_bdt_amount=total_bdt + service_fee,
+            total_bdt_amount=price["total_bdt_amount"],
             exchange_rate=exchange_rate.rate_to_bdt,
-            service_fee=service_fee,
-            currency_code=payment_calc.currency_code
+            service_fee=price["service_fee"],
+            currency_code=payment_calc.currency_code,
+            quote_token=quote_token,
+            quote_expires_at=expires_at
         )
     
-    async def initiate_payment(self, payment_data: PaymentInitiate, user_id: int) -> Dict[str, str]:
-        # Get current exchange rate
-        exchange_rate = await self.exchange_rate_service.get_exchange_rate(
-            payment_data.foreign_currency_code
-        )
+    async def calculate_cost_batch(self, batch: PaymentCalculationBatch) -> PaymentCalculationBatchResponse:
+        currency_codes = [item.currency_code for item in batch.items]
+        rates = await self._get_exchange_rates(currency_codes)
+        
+        # Price every pair in one pass, in input order
+        item_rates = [rates[currency_code].rate_to_bdt for currency_code in currency_codes]
+        prices = calculate_prices([
+            (item.amount, rate) for item, rate in zip(batch.items, item_rates)
+        ])
         
-        # Calculate BDT amount
-        bdt_amount = float(payment_data.foreign_amount) * float(exchange_rate.rate_to_bdt)
-        service_fee = bdt_amount * 0.025
-        total_bdt = bdt_amount + service_fee
+        return PaymentCalculationBatchResponse(items=[
+            PaymentCalculationBatchItem(
+                currency_code=currency_code,
+                amount=item.amount,
+                exchange_rate=rate,
+                service_fee=service_fee,
+                total_bdt_amount=total_bdt
+            )
+            for item, currency_code, rate, (service_fee, total_bdt)
+            in zip(batch.items, currency_codes, item_rates, prices)
+        ])
+    
+    async def initiate_payment(
+        self,
+        payment_data: PaymentInitiate,
+        user_id: int,
+        idempotency_key: Optional[str] = None
+    ) -> Dict[str, str]:
+        if not idempotency_key:
+            return await self._initiate_payment(payment_data, user_id)
+        
+        fingerprint = self.idempotency_service.fingerprint(payment_data.dict())
+        try:
+            stored_response = await self.idempotency_service.begin(
+                user_id, idempotency_key, fingerprint
+            )
+        except IdempotencyKeyMismatch:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used with a different request"
+            )
+        except IdempotencyKeyInProgress:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still in progress"
+            )
+        
+        # A repeat: replay the first response without touching SSLCommerz
+        if stored_response is not None:
+            return stored_response
+        
+        try:
+            response = await self._initiate_payment(payment_data, user_id)
+        except Exception:
+            await self.idempotency_service.release(user_id, idempotency_key)
+            raise
+        
+        await self.idempotency_service.complete(user_id, idempotency_key, response)
+        return response
+    
+    async def _initiate_payment(self, payment_data: PaymentInitiate, user_id: int) -> Dict[str, str]:
+        if payment_data.quote_token:
+            # Price from the signed quote; no rate lookup
+            rate_to_bdt, total_bdt = self._verify_quote(payment_data)
+        else:
+            # Get current exchange rate
+            exchange_rate = await self._get_exchange_rate(payment_data.foreign_currency_code)
+            rate_to_bdt = exchange_rate.rate_to_bdt
+            
+            # Calculate BDT amount
+            total_bdt = calculate_price(payment_data.foreign_amount, rate_to_bdt)["total_bdt_amount"]
         
         # Create transaction
-        internal_tran_id = str(uuid.uuid4())
+        # Time-ordered, so new rows append to the end of the index
+        internal_tran_id = new_transaction_id()
         transaction = Transaction(
             user_id=user_id,
             internal_tran_id=internal_tran_id,
             status=TransactionStatus.PENDING,
             requested_foreign_currency=payment_data.foreign_currency_code,
             requested_foreign_amount=payment_data.foreign_amount,
-            exchange_rate_bdt=exchange_rate.rate_to_bdt,
+            exchange_rate_bdt=rate_to_bdt,
             calculated_bdt_amount=total_bdt,
             recipient_paypal_email=payment_data.recipient_paypal_email
         )
         
         self.db.add(transaction)
-        self.db.commit()
+        await self.db.commit()
         
         # Prepare SSLCommerz data
         sslcz_data = {
@@ -84,11 +207,43 @@ class PaymentController:
             "transaction_id": internal_tran_id
         }
     
+    async def receive_ipn(self, request: Request) -> Dict[str, str]:
+        # SSLCommerz posts form data; JSON is accepted as well
+        if request.headers.get("content-type", "").startswith("application/json"):
+            payload = await request.json()
+        else:
+            payload = dict(await request.form())
+        
+        if settings.IPN_INBOX_ENABLED:
+            # Stored raw; app.worker validates and applies IPNs in batches
+            await self.ipn_inbox_service.append(payload)
+            return {"status": "received"}
+        
+        try:
+            ipn_data = PaymentIPNRequest(**payload)
+        except ValidationError as e:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=e.errors()
+            )
+        return await self.handle_ipn(ipn_data)
+    
+    def _verify_quote(self, payment_data: PaymentInitiate) -> Tuple[Decimal, Decimal]:
+        quote = decode_quote_token(payment_data.quote_token)
+        if (
+            not quote
+            or quote.get("cur", "").upper() != payment_data.foreign_currency_code
+            or Decimal(quote.get("amt", "NaN")) != payment_data.foreign_amount
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid or expired quote"
+            )
+        return Decimal(quote["rate"]), Decimal(quote["total"])
+    
     async def handle_ipn(self, ipn_data: PaymentIPNRequest) -> Dict[str, str]:
         # Verify transaction exists
-        transaction = self.db.query(Transaction).filter(
-            Transaction.internal_tran_id == ipn_data.tran_id
-        ).first()
+        transaction = await self.payment_service.get_transaction(ipn_data.tran_id)
         
         if not transaction:
             raise HTTPException(
@@ -110,9 +265,9 @@ class PaymentController:
         transaction.sslcz_store_amount_bdt = ipn_data.store_amount
         transaction.sslcz_card_type = ipn_data.card_type
         transaction.sslcz_bank_tran_id = ipn_data.bank_tran_id
-        transaction.sslcz_ipn_payload = ipn_data.dict()
+        await self.payload_store.save(transaction.id, PayloadKind.SSLCZ_IPN, ipn_data.dict())
         
-        self.db.commit()
+        await self.db.commit()
         
         return {"status": "received"}
     
@@ -128,9 +283,7 @@ class PaymentController:
             )
         
         # Get transaction
-        transaction = self.db.query(Transaction).filter(
-            Transaction.internal_tran_id == tran_id
-        ).first()
+        transaction = await self.payment_service.get_transaction(tran_id)
         
         if not transaction:
             raise HTTPException(
@@ -140,6 +293,11 @@ class PaymentController:
         
         # Validate with SSLCommerz
         validation_response = await self.sslcommerz_service.validate_transaction(val_id)
+        # A repeated callback must not reset a settled transaction or queue
+        # a second payout job
+        awaiting_validation = transaction.status in (
+            TransactionStatus.PENDING, TransactionStatus.IPN_RECEIVED
+        )
         
         if validation_response["status"] in ["VALID", "VALIDATED"]:
             # Verify transaction details
@@ -147,33 +305,21 @@ class PaymentController:
                 float(validation_response["amount"]) == float(transaction.calculated_bdt_amount) and
                 validation_response["currency"] == "BDT"):
                 
-                # Update transaction status
-                transaction.status = TransactionStatus.COMPLETED
-                transaction.sslcz_validation_payload = validation_response
-                self.db.commit()
+                if not awaiting_validation:
+                    return {
+                        "status": "success",
+                        "message": "Payment completed successfully",
+                        "transaction_id": tran_id
+                    }
                 
-                # Trigger PayPal payout
-                try:
-                    payout_response = await self.paypal_service.create_payout(
-                        recipient_email=transaction.recipient_paypal_email,
-                        amount=float(transaction.requested_foreign_amount),
-                        currency=transaction.requested_foreign_currency,
-                        reference_id=transaction.internal_tran_id
-                    )
-                    
-                    transaction.paypal_payout_tran_id = payout_response["batch_header"]["payout_batch_id"]
-                    transaction.paypal_payout_status = "PENDING"
-                    transaction.paypal_payout_payload = payout_response
-                    transaction.status = TransactionStatus.PAYOUT_PENDING
-                    self.db.commit()
-                    
-                except Exception as e:
-                    transaction.status = TransactionStatus.PAYOUT_FAILED
-                    self.db.commit()
-                    raise HTTPException(
-                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                        detail=f"Payout failed: {str(e)}"
-                    )
+                # Mark completed and queue the payout in one transaction;
+                # app.worker executes it so the redirect is not held up
+                transaction.status = TransactionStatus.COMPLETED
+                await self.payload_store.save(
+                    transaction.id, PayloadKind.SSLCZ_VALIDATION, validation_response
+                )
+                self.payout_service.enqueue(transaction)
+                await self.db.commit()
                 
                 return {
                     "status": "success",
@@ -182,8 +328,9 @@ class PaymentController:
                 }
         
         # Validation failed
-        transaction.status = TransactionStatus.VALIDATION_FAILED
-        self.db.commit()
+        if awaiting_validation:
+            transaction.status = TransactionStatus.VALIDATION_FAILED
+            await self.db.commit()
         
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -195,13 +342,11 @@ class PaymentController:
         tran_id = form_data.get("tran_id")
         
         if tran_id:
-            transaction = self.db.query(Transaction).filter(
-                Transaction.internal_tran_id == tran_id
-            ).first()
+            transaction = await self.payment_service.get_transaction(tran_id)
             
             if transaction:
                 transaction.status = TransactionStatus.FAILED
-                self.db.commit()
+                await self.db.commit()
         
         return {"status": "failed", "message": "Payment failed"}
     
@@ -210,12 +355,41 @@ class PaymentController:
         tran_id = form_data.get("tran_id")
         
         if tran_id:
-            transaction = self.db.query(Transaction).filter(
-                Transaction.internal_tran_id == tran_id
-            ).first()
+            transaction = await self.payment_service.get_transaction(tran_id)
             
             if transaction:
                 transaction.status = TransactionStatus.CANCELLED
-                self.db.commit()
+                await self.db.commit()
         
         return {"status": "cancelled", "message": "Payment cancelled"}
+    
+    async def handle_paypal_webhook(self, request: Request) -> Dict[str, str]:
+        if not settings.PAYPAL_WEBHOOK_ID:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="PayPal webhooks are not configured"
+            )
+        
+        # Verify against the raw body; re-serialised JSON would not match the CRC
+        body = await request.body()
+        if not await self.paypal_webhook_service.verify_signature(request.headers, body):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid webhook signature"
+            )
+        
+        try:
+            event = json.loads(body)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid webhook payload"
+            )
+        
+        # Acknowledge other event types without storing them
+        if not event.get("id") or not str(event.get("event_type", "")).startswith(PAYOUT_ITEM_EVENT_PREFIX):
+            return {"status": "ignored"}
+        
+        # Stored only; app.worker applies the status change in batches
+        await self.paypal_webhook_service.store_event(event)
+        return {"status": "received"}
@@ -1,11 +1,16 @@
 from fastapi import Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 from datetime import datetime
-from app.core.database import get_db
+from app.core.database import get_db, SessionLocal
 from app.models.transaction import Transaction
 from app.schemas.transaction import TransactionResponse, TransactionFilter
-from app.services.transaction_service import TransactionService
+from app.services.transaction_service import TransactionService, export_csv, export_ndjson
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
 
 class TransactionController:
     def __init__(self, db: Session = Depends(get_db)):
@@ -23,6 +28,23 @@ class TransactionController:
             user_id, skip, limit, filters
         )
     
+    def get_user_transactions_page(
+        self,
+        user_id: int,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        filters: Optional[TransactionFilter] = None
+    ) -> Tuple[List[TransactionResponse], Optional[str]]:
+        try:
+            return self.transaction_service.get_user_transactions_page(
+                user_id, cursor, limit, filters
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+    
     def get_transaction(self, transaction_id: str, user_id: int) -> TransactionResponse:
         transaction = self.transaction_service.get_transaction_by_id(transaction_id)
         
@@ -43,3 +65,23 @@ class TransactionController:
     
     def get_user_stats(self, user_id: int) -> dict:
         return self.transaction_service.get_user_statistics(user_id)
+    
+    @staticmethod
+    def export_transactions(
+        user_id: Optional[int],
+        filters: Optional[TransactionFilter],
+        export_format: str
+    ) -> Iterator[str]:
+        """
+        Serialized export chunks. The body streams after the endpoint has
+        returned, so the rows are read on a session owned by the stream
+        rather than the request's.
+        """
+        serialize = export_csv if export_format == "csv" else export_ndjson
+        db = SessionLocal()
+        try:
+            yield from serialize(
+                TransactionService(db).stream_transactions(user_id, filters)
+            )
+        finally:
+            db.close()
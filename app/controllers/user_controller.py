@@ -1,6 +1,6 @@
 from fastapi import Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from app.core.database import get_db
 from app.models.user import User, UserRole
 from app.schemas.user import UserCreate, UserUpdate, UserResponse
@@ -38,6 +38,20 @@ class UserController:
     ) -> List[UserResponse]:
         return self.user_service.get_users(skip, limit, is_active)
     
+    def get_users_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        is_active: Optional[bool] = None
+    ) -> Tuple[List[UserResponse], Optional[str]]:
+        try:
+            return self.user_service.get_users_page(cursor, limit, is_active)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+    
     def update_user(
         self,
         user_id: int,
@@ -2,14 +2,18 @@ import asyncio
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
 import logging
-from sqlalchemy.orm import Session
-from app.core.database import SessionLocal
-from app.models.exchange_rate import ExchangeRate
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal, engine
+from app.core.partitions import ensure_partitions
+from app.models.transaction import TransactionStatus
 from app.services.exchange_rate_service import ExchangeRateService
-from app.services.payment_service import PaymentService
+from app.services.idempotency_service import IdempotencyService
 from app.services.paypal_service import PayPalService
+from app.services.payout_service import PayoutService
+from app.services.transaction_archive import archive_old_partitions
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 class BackgroundTasks:
     def __init__(self):
@@ -23,6 +27,8 @@ class BackgroundTasks:
         self.is_running = True
         self.tasks["update_exchange_rates"] = asyncio.create_task(self.update_exchange_rates_task())
         self.tasks["process_pending_payouts"] = asyncio.create_task(self.process_pending_payouts_task())
+        self.tasks["purge_idempotency_keys"] = asyncio.create_task(self.purge_idempotency_keys_task())
+        self.tasks["maintain_partitions"] = asyncio.create_task(self.maintain_partitions_task())
         logger.info("Background tasks started")
     
     async def stop(self):
@@ -36,75 +42,126 @@ class BackgroundTasks:
         logger.info("Background tasks stopped")
     
     async def update_exchange_rates_task(self):
-        db = SessionLocal()
         try:
-            exchange_service = ExchangeRateService(db)
             while self.is_running:
                 try:
-                    # Update exchange rates every hour
-                    await exchange_service.update_exchange_rates()
-                    logger.info("Exchange rates updated")
+                    async with AsyncSessionLocal() as db:
+                        exchange_service = ExchangeRateService(db)
+                        # Refresh all exchange rates from one API response
+                        updated = await exchange_service.update_exchange_rates()
+                    logger.info(f"Exchange rates updated ({updated} currencies)")
                 except Exception as e:
                     logger.error(f"Error updating exchange rates: {str(e)}")
                 
-                # Wait for 1 hour before next update
+                # Refresh ahead of the cache TTL
+                await asyncio.sleep(settings.EXCHANGE_RATE_REFRESH_INTERVAL_SECONDS)
+        except asyncio.CancelledError:
+            pass
+    
+    async def maintain_partitions_task(self):
+        try:
+            while self.is_running:
+                try:
+                    # Keep upcoming monthly partitions in place ahead of time
+                    async with AsyncSessionLocal() as db:
+                        await db.run_sync(lambda session: ensure_partitions(session.connection()))
+                        await db.commit()
+                    # Export and detach cold transactions partitions
+                    if settings.TRANSACTION_ARCHIVE_ENABLED:
+                        archived = await asyncio.to_thread(archive_old_partitions, engine)
+                        if archived:
+                            logger.info(f"Archived partitions: {', '.join(archived)}")
+                except Exception as e:
+                    logger.error(f"Error maintaining partitions: {str(e)}")
+                
+                await asyncio.sleep(86400)
+        except asyncio.CancelledError:
+            pass
+    
+    async def purge_idempotency_keys_task(self):
+        try:
+            while self.is_running:
+                try:
+                    async with AsyncSessionLocal() as db:
+                        purged = await IdempotencyService(db).purge_expired()
+                    if purged:
+                        logger.info(f"Purged {purged} expired idempotency keys")
+                except Exception as e:
+                    logger.error(f"Error purging idempotency keys: {str(e)}")
+                
                 await asyncio.sleep(3600)
         except asyncio.CancelledError:
             pass
-        finally:
-            db.close()
     
     async def process_pending_payouts_task(self):
-        db = SessionLocal()
         try:
-            payment_service = PaymentService(db)
-            paypal_service = PayPalService(db)
-            
             while self.is_running:
                 try:
-                    # Process pending payouts every 5 minutes
-                    pending_payouts = db.query(Transaction).filter(
-                        Transaction.status == TransactionStatus.PAYOUT_PENDING
-                    ).all()
-                    
-                    for payout in pending_payouts:
-                        try:
-                            # Get payout details from PayPal
-                            payout_details = await paypal_service.get_payout_details(
-                                payout.paypal_payout_tran_id
-                            )
-                            
-                            # Update transaction status based on payout status
-                            if payout_details["batch_header"]["batch_status"] == "SUCCESS":
-                                payout.status = TransactionStatus.PAYOUT_COMPLETED
-                                payout.paypal_payout_status = "COMPLETED"
-                            elif payout_details["batch_header"]["batch_status"] == "DENIED":
-                                payout.status = TransactionStatus.PAYOUT_FAILED
-                                payout.paypal_payout_status = "FAILED"
-                            
-                            payout.paypal_payout_details = payout_details
-                            db.commit()
-                            
-                        except Exception as e:
-                            logger.error(f"Error processing payout {payout.id}: {str(e)}")
-                            continue
-                    
-                    logger.info("Processed pending payouts")
+                    checked = await self.poll_payout_statuses()
+                    if checked:
+                        logger.info(f"Checked {checked} pending payouts")
                 except Exception as e:
                     logger.error(f"Error in process_pending_payouts_task: {str(e)}")
                 
-                # Wait for 5 minutes before next check
-                await asyncio.sleep(300)
+                # Rows carry their own next-check time; this only bounds the latency
+                await asyncio.sleep(settings.PAYOUT_POLL_INTERVAL_SECONDS)
         except asyncio.CancelledError:
             pass
-        finally:
-            db.close()
+    
+    async def poll_payout_statuses(self) -> int:
+        """Check every due PAYOUT_PENDING row once, chunk by chunk"""
+        semaphore = asyncio.Semaphore(settings.PAYOUT_POLL_CONCURRENCY)
+        
+        async def fetch_items(paypal_service: PayPalService, payout_batch_id: str) -> Optional[dict]:
+            async with semaphore:
+                try:
+                    return await paypal_service.get_payout_items(payout_batch_id)
+                except Exception as e:
+                    logger.error(f"Error fetching payout batch {payout_batch_id}: {str(e)}")
+                    return None
+        
+        checked = 0
+        after_id = 0
+        while self.is_running:
+            async with AsyncSessionLocal() as db:
+                payout_service = PayoutService(db)
+                paypal_service = payout_service.paypal_service
+                rows = await payout_service.claim_status_checks(
+                    after_id, settings.PAYOUT_POLL_CHUNK_SIZE
+                )
+                if not rows:
+                    break
+                after_id = max(row.id for row in rows)
+                
+                # One lookup per PayPal batch; items map back by sender_item_id
+                batch_ids = list({row.paypal_payout_tran_id for row in rows})
+                items = await asyncio.gather(*(fetch_items(paypal_service, batch_id) for batch_id in batch_ids))
+                
+                finished = await payout_service.apply_status_checks(
+                    rows, dict(zip(batch_ids, items))
+                )
+            
+            checked += len(rows)
+            if any(finished.values()):
+                logger.info(
+                    f"Payouts completed: {finished[TransactionStatus.PAYOUT_COMPLETED]}, "
+                    f"failed: {finished[TransactionStatus.PAYOUT_FAILED]}"
+                )
+        
+        return checked
 
 # Global instance
 background_tasks = BackgroundTasks()
 
 # Startup and shutdown event handlers
 async def startup_event():
+    # Known currencies before the first request, so unknown codes never hit upstream
+    try:
+        async with AsyncSessionLocal() as db:
+            loaded = await ExchangeRateService(db).load_currency_catalog()
+        logger.info(f"Currency catalog loaded ({loaded} currencies)")
+    except Exception as e:
+        logger.error(f"Error loading currency catalog: {str(e)}")
     await background_tasks.start()
 
 async def shutdown_event():
@@ -0,0 +1,58 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+class TTLCache(Generic[T]):
+    """
+    Process-wide in-memory cache with per-entry expiry.
+
+    Concurrent loads for the same key are merged into a single in-flight
+    task (single-flight), so a miss under load triggers one upstream call.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[Hashable, Tuple[float, T]] = {}
+        self._inflight: Dict[Hashable, "asyncio.Task[Any]"] = {}
+
+    def get(self, key: Hashable) -> Optional[T]:
+        """Return the cached value for ``key`` or None if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            return None
+        return value
+
+    def set(self, key: Hashable, value: T, ttl: Optional[float] = None) -> None:
+        """Store ``value`` for ``ttl`` seconds (defaults to the cache TTL)"""
+        ttl = self.ttl if ttl is None else ttl
+        self._entries[key] = (time.monotonic() + ttl, value)
+
+    def replace(self, values: Dict[Hashable, T], ttl: Optional[float] = None) -> None:
+        """Atomically swap the whole cache contents for ``values``"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._entries = {key: (expires_at, value) for key, value in values.items()}
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one key, or every entry when no key is given"""
+        if key is None:
+            self._entries = {}
+        else:
+            self._entries.pop(key, None)
+
+    async def load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run ``loader`` for ``key``, sharing one in-flight task between all
+        concurrent callers. The loader is responsible for calling set().
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(loader())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so a cancelled caller does not cancel the load for the others
+        return await asyncio.shield(task)
@@ -10,6 +10,9 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    # Defaults to DATABASE_URL with the asyncpg driver
+    ASYNC_DATABASE_URL: Optional[str] = None
+    ASYNC_DB_PREPARED_STATEMENT_CACHE_SIZE: int = 500
     
     # Security
     SECRET_KEY: str
@@ -17,22 +20,111 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     
+    # Signed price quotes returned by /payment/calculate-cost
+    QUOTE_TTL_SECONDS: int = 900
+    
+    # Idempotency-Key support for /payment/initiate
+    IDEMPOTENCY_KEY_TTL_SECONDS: int = 86400
+    # An unfinished first request older than this is assumed dead and taken over
+    IDEMPOTENCY_KEY_LOCK_TIMEOUT_SECONDS: int = 60
+    IDEMPOTENCY_KEY_WAIT_SECONDS: float = 30.0
+    IDEMPOTENCY_KEY_POLL_INTERVAL_SECONDS: float = 0.2
+    
     # SSLCommerz
     SSLCZ_STORE_ID: str
     SSLCZ_STORE_PASSWD: str
     SSLCZ_SANDBOX_URL: str = "https://sandbox.sslcommerz.com"
     SSLCZ_LIVE_URL: str = "https://securepay.sslcommerz.com"
     SSLCZ_SANDBOX_MODE: bool = True
+    # IPN inbox mode: store raw IPNs and ack at once; app.worker applies them
+    IPN_INBOX_ENABLED: bool = False
+    IPN_INBOX_BATCH_SIZE: int = 500
+    IPN_INBOX_POLL_INTERVAL_SECONDS: float = 1.0
     
     # PayPal
     PAYPAL_CLIENT_ID: str
     PAYPAL_CLIENT_SECRET: str
     PAYPAL_BASE_URL: str = "https://api.sandbox.paypal.com"
     PAYPAL_SANDBOX_MODE: bool = True
+    # OAuth tokens are treated as expired this early and refreshed in the background this early
+    PAYPAL_TOKEN_EXPIRY_MARGIN_SECONDS: int = 60
+    PAYPAL_TOKEN_REFRESH_AHEAD_SECONDS: int = 300
+    # Share tokens between processes through the oauth_tokens table
+    PAYPAL_TOKEN_PERSIST: bool = True
+    PAYPAL_TOKEN_LOCK_WAIT_ATTEMPTS: int = 10
+    # Webhooks: set to the id PayPal assigned to /payment/paypal/webhook
+    PAYPAL_WEBHOOK_ID: Optional[str] = None
+    PAYPAL_WEBHOOK_CERT_CACHE_SECONDS: int = 86400
+    PAYPAL_WEBHOOK_BATCH_SIZE: int = 500
+    PAYPAL_WEBHOOK_POLL_INTERVAL_SECONDS: float = 1.0
+    
+    # Payout worker (python -m app.worker)
+    PAYOUT_WORKER_CONCURRENCY: int = 10
+    PAYOUT_WORKER_POLL_INTERVAL_SECONDS: float = 2.0
+    PAYOUT_JOB_LEASE_SECONDS: int = 300
+    PAYOUT_JOB_MAX_ATTEMPTS: int = 8
+    PAYOUT_JOB_BACKOFF_BASE_SECONDS: float = 30.0
+    PAYOUT_JOB_BACKOFF_MAX_SECONDS: float = 3600.0
+    # Batching mode: combine completed transactions into one PayPal payout batch,
+    # sent once BATCH_SIZE jobs are due or the oldest has waited BATCH_WINDOW
+    PAYPAL_PAYOUT_BATCHING_ENABLED: bool = False
+    PAYPAL_PAYOUT_BATCH_SIZE: int = 500
+    PAYPAL_PAYOUT_BATCH_WINDOW_SECONDS: float = 60.0
+    # Payout status poller: rows are checked when their own next-check time is due
+    PAYOUT_POLL_INTERVAL_SECONDS: float = 30.0
+    PAYOUT_POLL_CHUNK_SIZE: int = 500
+    PAYOUT_POLL_CONCURRENCY: int = 10
+    PAYOUT_STATUS_CHECK_LEASE_SECONDS: int = 300
+    PAYOUT_STATUS_CHECK_BASE_SECONDS: float = 60.0
+    PAYOUT_STATUS_CHECK_MAX_SECONDS: float = 3600.0
+    # With webhooks configured the poller only reconciles missed events
+    PAYOUT_STATUS_CHECK_FALLBACK_SECONDS: float = 3600.0
     
     # Exchange Rate API
     EXCHANGE_RATE_API_KEY: str
     EXCHANGE_RATE_API_URL: str = "https://api.exchangerate-api.com/v4/latest"
+    EXCHANGE_RATE_API_TIMEOUT_SECONDS: float = 10.0
+    EXCHANGE_RATE_CACHE_TTL_SECONDS: int = 600
+    # Keep below the cache TTL so request paths never refresh synchronously
+    EXCHANGE_RATE_REFRESH_INTERVAL_SECONDS: int = 300
+    # Serve an expired rate for up to this long while refreshing in the background
+    EXCHANGE_RATE_MAX_STALENESS_SECONDS: int = 3600
+    # Extra providers with the same /latest/{base} response shape, tried in order
+    EXCHANGE_RATE_FALLBACK_API_URLS: list[str] = []
+    # Fire the next provider if the current one has not answered by then
+    EXCHANGE_RATE_HEDGE_AFTER_SECONDS: float = 1.0
+    # Failed lookups are remembered this long instead of retried upstream
+    EXCHANGE_RATE_NEGATIVE_CACHE_SECONDS: int = 60
+    # Upper bound on OHLC buckets returned by /exchange-rate/{code}/history
+    EXCHANGE_RATE_HISTORY_MAX_BUCKETS: int = 5000
+    
+    # Monthly partitions are created this many months in advance
+    PARTITION_MONTHS_AHEAD: int = 2
+    # transactions partitions older than this holding only terminal rows are
+    # exported to Arrow IPC files under TRANSACTION_ARCHIVE_DIR and detached
+    TRANSACTION_ARCHIVE_ENABLED: bool = False
+    TRANSACTION_ARCHIVE_AFTER_MONTHS: int = 6
+    TRANSACTION_ARCHIVE_DIR: str = "archive/transactions"
+    TRANSACTION_ARCHIVE_BATCH_SIZE: int = 65536
+    # Detached partitions are kept for a backup before being dropped unless set
+    TRANSACTION_ARCHIVE_DROP_DETACHED: bool = False
+    
+    # Rows fetched per round trip from the server-side cursor behind exports
+    TRANSACTION_EXPORT_BATCH_SIZE: int = 1000
+    # Gateway payload blobs: zstd (falls back to zlib without zstandard), zlib or raw
+    PAYLOAD_COMPRESSION: str = "zstd"
+    PAYLOAD_COMPRESSION_LEVEL: int = 3
+    
+    # Admin config cache: how often each process checks the shared version
+    ADMIN_CONFIG_VERSION_CHECK_SECONDS: float = 5.0
+    
+    # Outbound HTTP clients
+    HTTP_POOL_MAX_CONNECTIONS: int = 100
+    HTTP_POOL_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_POOL_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    HTTP_TIMEOUT_SECONDS: float = 30.0
+    HTTP2_ENABLED: bool = False
     
     # CORS
     BACKEND_CORS_ORIGINS: list[str] = ["http://localhost:3000", "http://localhost:8000"]
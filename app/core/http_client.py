@@ -0,0 +1,75 @@
+import importlib.util
+import logging
+from typing import Dict
+import httpx
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Outbound providers that get their own connection pool
+SSLCOMMERZ = "sslcommerz"
+PAYPAL = "paypal"
+EXCHANGE_RATE = "exchange_rate"
+PROVIDERS = (SSLCOMMERZ, PAYPAL, EXCHANGE_RATE)
+
+class HTTPClientRegistry:
+    """
+    Long-lived, pooled httpx clients shared by all outbound provider calls.
+
+    Each provider gets its own keep-alive pool so a slow provider cannot
+    starve the others. Clients are opened by the app lifespan and created
+    lazily for processes that do not run it (e.g. scripts).
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def _http2_enabled(self) -> bool:
+        if not settings.HTTP2_ENABLED:
+            return False
+        if importlib.util.find_spec("h2") is None:
+            logger.warning("HTTP2_ENABLED is set but the 'h2' package is not installed")
+            return False
+        return True
+
+    def _timeout_for(self, provider: str) -> float:
+        if provider == EXCHANGE_RATE:
+            return settings.EXCHANGE_RATE_API_TIMEOUT_SECONDS
+        return settings.HTTP_TIMEOUT_SECONDS
+
+    def _create_client(self, provider: str) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            http2=self._http2_enabled(),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_POOL_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_POOL_KEEPALIVE_EXPIRY_SECONDS
+            ),
+            timeout=httpx.Timeout(
+                self._timeout_for(provider),
+                connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS
+            )
+        )
+
+    def get(self, provider: str) -> httpx.AsyncClient:
+        """Return the shared client for ``provider``, creating it on first use"""
+        client = self._clients.get(provider)
+        if client is None or client.is_closed:
+            client = self._create_client(provider)
+            self._clients[provider] = client
+        return client
+
+    def open(self) -> None:
+        for provider in PROVIDERS:
+            self.get(provider)
+        logger.info("HTTP clients opened")
+
+    async def close(self) -> None:
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+        logger.info("HTTP clients closed")
+
+# Global instance
+http_clients = HTTPClientRegistry()
@@ -0,0 +1,61 @@
+import secrets
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+def uuid7() -> uuid.UUID:
+    """
+    RFC 9562 UUIDv7: 48-bit Unix millisecond timestamp, a 12-bit counter and
+    62 random bits. Consecutive IDs from one process are strictly increasing,
+    so inserts land on the right-hand edge of the B-tree.
+    """
+    global _last_ms, _counter
+    with _lock:
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms > _last_ms:
+            _last_ms = now_ms
+            # Random start with headroom for ~2k IDs in the same millisecond
+            _counter = secrets.randbits(11)
+        else:
+            _counter += 1
+            if _counter > 0xFFF:
+                # Counter exhausted: borrow the next millisecond
+                _last_ms += 1
+                _counter = secrets.randbits(11)
+        timestamp_ms, counter = _last_ms, _counter
+
+    value = (timestamp_ms & 0xFFFF_FFFF_FFFF) << 80
+    value |= 0x7 << 76
+    value |= counter << 64
+    value |= 0b10 << 62
+    value |= secrets.randbits(62)
+    return uuid.UUID(int=value)
+
+def new_transaction_id() -> str:
+    return str(uuid7())
+
+def parse_transaction_id(value: Any) -> Optional[str]:
+    """
+    Canonical form of a transaction ID (old uuid4 and new uuid7 alike), or
+    None when ``value`` is not a UUID and so cannot match any transaction.
+    """
+    try:
+        return str(uuid.UUID(str(value)))
+    except ValueError:
+        return None
+
+def transaction_id_timestamp(transaction_id: str) -> Optional[datetime]:
+    """
+    Creation time embedded in a UUIDv7 transaction ID (millisecond
+    precision), or None for older uuid4 IDs, which carry no time.
+    """
+    value = uuid.UUID(transaction_id)
+    if value.version != 7:
+        return None
+    return datetime.fromtimestamp((value.int >> 80) / 1000, tz=timezone.utc)
@@ -0,0 +1,57 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+# Response header carrying the next page's cursor; exposed to browsers via CORS
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# OpenAPI description of that header for keyset-paginated routes
+NEXT_CURSOR_RESPONSES = {
+    200: {
+        "headers": {
+            NEXT_CURSOR_HEADER: {
+                "description": "Cursor of the next page; absent on the last page",
+                "schema": {"type": "string"}
+            }
+        }
+    }
+}
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    """Opaque cursor for the row after which the next page starts"""
+    raw = json.dumps([created_at.isoformat(), id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+def keyset_paginate(
+    query: Query,
+    model: Any,
+    cursor: Optional[str] = None,
+    limit: int = 100
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Newest-first page of ``query`` ordered by (created_at, id). Each page is
+    an index seek on (..., created_at DESC, id DESC) instead of an OFFSET
+    scan. Returns the rows and the cursor of the next page, if any.
+    """
+    if cursor:
+        created_at, id = decode_cursor(cursor)
+        query = query.filter(tuple_(model.created_at, model.id) < tuple_(created_at, id))
+
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
@@ -0,0 +1,64 @@
+from datetime import date, datetime, timezone
+from typing import List, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from app.core.config import get_settings
+import logging
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Tables declared with postgresql_partition_by="RANGE (<timestamp>)" that get
+# one partition per month plus a DEFAULT catch-all
+MONTHLY_PARTITIONED_TABLES = ["exchange_rate_history", "transactions"]
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def monthly_partition_statements(
+    table_name: str,
+    months_ahead: int,
+    today: Optional[date] = None
+) -> List[str]:
+    """DDL for the current month's partition and ``months_ahead`` after it"""
+    today = today or datetime.now(timezone.utc).date()
+    first = today.replace(day=1)
+    statements = [
+        f"CREATE TABLE IF NOT EXISTS {table_name}_default "
+        f"PARTITION OF {table_name} DEFAULT"
+    ]
+    for offset in range(months_ahead + 1):
+        start = add_months(first, offset)
+        end = add_months(first, offset + 1)
+        statements.append(
+            f"CREATE TABLE IF NOT EXISTS {table_name}_y{start.year}m{start.month:02d} "
+            f"PARTITION OF {table_name} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+    return statements
+
+def is_partitioned(connection: Connection, table_name: str) -> bool:
+    return connection.execute(
+        text(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE c.relname = :table_name AND pg_table_is_visible(c.oid))"
+        ),
+        {"table_name": table_name}
+    ).scalar()
+
+def ensure_partitions(connection: Connection) -> None:
+    """
+    Create missing monthly partitions; safe to run repeatedly. Tables that
+    are not partitioned yet (transactions before alembic revision 0005) are
+    skipped, so the app still starts on an unmigrated database.
+    """
+    for table_name in MONTHLY_PARTITIONED_TABLES:
+        if not is_partitioned(connection, table_name):
+            logger.warning(f"{table_name} is not partitioned; run the alembic migrations")
+            continue
+        for statement in monthly_partition_statements(
+            table_name, settings.PARTITION_MONTHS_AHEAD
+        ):
+            connection.execute(text(statement))
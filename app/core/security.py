@@ -36,3 +36,14 @@ def decode_token(token: str) -> Optional[dict]:
         return payload
     except JWTError:
         return None
+
+def create_quote_token(quote: dict, expires_at: datetime) -> str:
+    to_encode = quote.copy()
+    to_encode.update({"typ": "quote", "exp": expires_at})
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+def decode_quote_token(token: str) -> Optional[dict]:
+    payload = decode_token(token)
+    if not payload or payload.get("typ") != "quote":
+        return None
+    return payload
@@ -1,8 +1,9 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, Dict, Generic, List, Optional, Tuple, Type, TypeVar, Union
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from app.core.database import Base
+from app.core.pagination import keyset_paginate
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
@@ -22,9 +23,15 @@ class ServiceBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def get_multi(
         self, db: Session, *, skip: int = 0, limit: int = 100
     ) -> List[ModelType]:
-        """Get multiple records with pagination"""
+        """Get multiple records with offset pagination (kept for compatibility)"""
         return db.query(self.model).offset(skip).limit(limit).all()
 
+    def get_multi_page(
+        self, db: Session, *, cursor: Optional[str] = None, limit: int = 100
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        """Get a newest-first page and the cursor of the next one (keyset pagination)"""
+        return keyset_paginate(db.query(self.model), self.model, cursor, limit)
+
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         """Create a new record"""
         obj_in_data = jsonable_encoder(obj_in)
@@ -2,9 +2,13 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.core.config import get_settings
-from app.core.database import engine, Base
+from app.core.database import engine, async_engine, Base
 from app.api.v1 import api_router
 from app.core.background_tasks import startup_event, shutdown_event
+from app.core.http_client import http_clients
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.partitions import ensure_partitions
+from app.services.paypal_token_manager import paypal_token_manager
 import logging
 
 # Configure logging
@@ -19,6 +23,10 @@ async def lifespan(app: FastAPI):
     logger.info("Starting up...")
     # Create database tables
     Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        ensure_partitions(connection)
+    # Open pooled outbound HTTP clients
+    http_clients.open()
     # Start background tasks
     await startup_event()
     
@@ -28,6 +36,10 @@ async def lifespan(app: FastAPI):
     logger.info("Shutting down...")
     # Stop background tasks
     await shutdown_event()
+    # Cancel scheduled token refreshes and close pooled outbound HTTP clients
+    paypal_token_manager.close()
+    await http_clients.close()
+    await async_engine.dispose()
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -42,6 +54,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Browsers hide non-safelisted response headers from scripts otherwise
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Include routers
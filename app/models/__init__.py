@@ -2,10 +2,23 @@ from app.models.user import User, UserSession
 from app.models.transaction import Transaction
 from app.models.admin_config import AdminConfig
 from app.models.exchange_rate import ExchangeRate
+from app.models.exchange_rate_history import ExchangeRateHistory, ExchangeRateRollup
 from app.models.payment_limit import PaymentLimit
 from app.models.notification import NotificationPreference
 from app.models.system_setting import SystemSetting
 from app.models.paypal_credential import PayPalCredential
+from app.models.oauth_token import OAuthToken
+from app.models.payout_job import PayoutJob
+from app.models.paypal_webhook_event import PayPalWebhookEvent
+from app.models.ipn_inbox import IPNInboxEntry
+from app.models.idempotency_key import IdempotencyKey
+from app.models.transaction_payload import PayloadBlob, TransactionPayload
+from app.models.transaction_archive import TransactionArchive
+from app.models.user_transaction_stats import (
+    UserTransactionStats,
+    UserTransactionCurrencyTotal,
+    UserTransactionDailyCount
+)
 
 __all__ = [
     "User",
@@ -13,8 +26,21 @@ __all__ = [
     "Transaction",
     "AdminConfig",
     "ExchangeRate",
+    "ExchangeRateHistory",
+    "ExchangeRateRollup",
     "PaymentLimit",
     "NotificationPreference",
     "SystemSetting",
-    "PayPalCredential"
+    "PayPalCredential",
+    "OAuthToken",
+    "PayoutJob",
+    "PayPalWebhookEvent",
+    "IPNInboxEntry",
+    "IdempotencyKey",
+    "UserTransactionStats",
+    "UserTransactionCurrencyTotal",
+    "UserTransactionDailyCount",
+    "PayloadBlob",
+    "TransactionPayload",
+    "TransactionArchive"
 ]
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, Numeric, DateTime
+from app.core.database import Base
+
+class ExchangeRateHistory(Base):
+    """Append-only rate ticks, range-partitioned by month on recorded_at"""
+    __tablename__ = "exchange_rate_history"
+    __table_args__ = {"postgresql_partition_by": "RANGE (recorded_at)"}
+
+    # The partition key must be part of the primary key
+    currency_code = Column(String(3), primary_key=True)
+    recorded_at = Column(DateTime(timezone=True), primary_key=True)
+    rate_to_bdt = Column(Numeric(15, 8), nullable=False)
+
+class ExchangeRateRollup(Base):
+    """Hourly OHLC buckets maintained on every refresh"""
+    __tablename__ = "exchange_rate_rollups"
+
+    currency_code = Column(String(3), primary_key=True)
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    open = Column(Numeric(15, 8), nullable=False)
+    high = Column(Numeric(15, 8), nullable=False)
+    low = Column(Numeric(15, 8), nullable=False)
+    close = Column(Numeric(15, 8), nullable=False)
+    samples = Column(Integer, nullable=False, default=1)
+    # Tick times behind open/close so out-of-order upserts stay correct
+    open_at = Column(DateTime(timezone=True), nullable=False)
+    close_at = Column(DateTime(timezone=True), nullable=False)
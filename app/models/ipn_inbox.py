@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Index, text
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class IPNInboxEntry(Base):
+    __tablename__ = "ipn_inbox"
+    __table_args__ = (
+        # Only unprocessed entries are indexed for the consumer
+        Index(
+            "ix_ipn_inbox_unprocessed",
+            "id",
+            postgresql_where=text("processed_at IS NULL")
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    tran_id = Column(String(255), nullable=True)
+    val_id = Column(String(255), nullable=True)
+    payload = Column(JSON, nullable=False)
+    error = Column(Text, nullable=True)
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+    received_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.core.database import Base
+import enum
+
+class PayoutJobStatus(str, enum.Enum):
+    PENDING = "PENDING"
+    IN_PROGRESS = "IN_PROGRESS"
+    SUCCEEDED = "SUCCEEDED"
+    FAILED = "FAILED"
+
+class PayoutJob(Base):
+    __tablename__ = "payout_jobs"
+    __table_args__ = (
+        Index("ix_payout_jobs_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    # No foreign key: transactions is partitioned and its key is (id, created_at)
+    transaction_id = Column(Integer, unique=True, nullable=False)
+    status = Column(Enum(PayoutJobStatus), default=PayoutJobStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    locked_until = Column(DateTime(timezone=True), nullable=True)
+    locked_by = Column(String(100), nullable=True)
+    last_error = Column(Text, nullable=True)
+    # Set when the job is first sent; a retry resends exactly this group under the same id
+    sender_batch_id = Column(String(64), nullable=True, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Relationships
+    transaction = relationship(
+        "Transaction",
+        primaryjoin="foreign(PayoutJob.transaction_id) == Transaction.id",
+        viewonly=True
+    )
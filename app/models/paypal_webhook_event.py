@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index, text
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class PayPalWebhookEvent(Base):
+    __tablename__ = "paypal_webhook_events"
+    __table_args__ = (
+        # Only unprocessed events are indexed for the consumer
+        Index(
+            "ix_paypal_webhook_events_unprocessed",
+            "id",
+            postgresql_where=text("processed_at IS NULL")
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(String(255), unique=True, nullable=False)
+    event_type = Column(String(100), nullable=False)
+    payload = Column(JSON, nullable=False)
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
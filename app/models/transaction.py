@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey, JSON, Enum
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey, Enum, Index, UniqueConstraint, text
+from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -15,12 +16,58 @@ class TransactionStatus(str, enum.Enum):
     VALIDATION_FAILED = "VALIDATION_FAILED"
     PAYOUT_FAILED = "PAYOUT_FAILED"
 
+# Statuses a transaction never leaves; partitions holding only these can be archived
+TERMINAL_STATUSES = (
+    TransactionStatus.PAYOUT_COMPLETED,
+    TransactionStatus.FAILED,
+    TransactionStatus.CANCELLED,
+    TransactionStatus.VALIDATION_FAILED,
+    TransactionStatus.PAYOUT_FAILED,
+)
+
 class Transaction(Base):
+    """Range-partitioned by month on created_at (see app.core.partitions)"""
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Unique keys of a partitioned table must include the partition key,
+        # so the database only enforces (internal_tran_id, created_at).
+        # internal_tran_id alone is not constrained; uniqueness relies on the
+        # random bits of each UUIDv7 (older rows: uuid4) from app.core.ids
+        UniqueConstraint(
+            "internal_tran_id",
+            "created_at",
+            name="uq_transactions_internal_tran_id_created_at"
+        ),
+        # Only rows awaiting a PayPal status check are indexed
+        Index(
+            "ix_transactions_payout_next_check_at",
+            "payout_next_check_at",
+            "id",
+            postgresql_where=text("status = 'PAYOUT_PENDING'")
+        ),
+        # Keyset pagination of a user's history: WHERE user_id = ? AND (created_at, id) < (?, ?)
+        Index(
+            "ix_transactions_user_id_created_at_id",
+            "user_id",
+            text("created_at DESC"),
+            text("id DESC")
+        ),
+        # Per-user status counts in get_user_statistics
+        Index("ix_transactions_user_id_status", "user_id", "status"),
+        # Small index over the in-flight statuses only
+        Index(
+            "ix_transactions_pending_status",
+            "status",
+            "created_at",
+            postgresql_where=text("status IN ('PENDING', 'IPN_RECEIVED', 'PAYOUT_PENDING')")
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    internal_tran_id = Column(String(255), unique=True, nullable=False, index=True)
+    # UUIDv7 from app.core.ids (older rows hold uuid4); str on the Python side
+    internal_tran_id = Column(UUID(as_uuid=False), nullable=False, index=True)
     sslcz_tran_id = Column(String(255), nullable=True)
     sslcz_val_id = Column(String(255), nullable=True)
     status = Column(Enum(TransactionStatus), default=TransactionStatus.PENDING, nullable=False)
@@ -33,12 +80,12 @@ class Transaction(Base):
     recipient_paypal_email = Column(String(255), nullable=False)
     sslcz_card_type = Column(String(100), nullable=True)
     sslcz_bank_tran_id = Column(String(100), nullable=True)
-    sslcz_ipn_payload = Column(JSON, nullable=True)
-    sslcz_validation_payload = Column(JSON, nullable=True)
     paypal_payout_tran_id = Column(String(255), nullable=True)
     paypal_payout_status = Column(String(50), nullable=True)
-    paypal_payout_payload = Column(JSON, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    payout_next_check_at = Column(DateTime(timezone=True), nullable=True)
+    payout_check_count = Column(Integer, default=0, nullable=False, server_default="0")
+    # Partition key, hence part of the primary key
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, JSON, false
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class TransactionArchive(Base):
+    """A detached transactions partition exported to an Arrow IPC file"""
+    __tablename__ = "transaction_archives"
+
+    id = Column(Integer, primary_key=True, index=True)
+    partition_name = Column(String(63), unique=True, nullable=False)
+    path = Column(String(1024), nullable=False)
+    # created_at range of the partition; range_start is NULL for MINVALUE
+    range_start = Column(DateTime(timezone=True), nullable=True)
+    range_end = Column(DateTime(timezone=True), nullable=False)
+    row_count = Column(Integer, nullable=False)
+    # Rows are sorted by internal_tran_id; first key of each record batch
+    batch_first_keys = Column(JSON, nullable=False)
+    # Holds pre-UUIDv7 IDs, which cannot be routed to an archive by time
+    has_legacy_ids = Column(Boolean, nullable=False, server_default=false())
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, LargeBinary, Enum
+from sqlalchemy.sql import func
+from app.core.database import Base
+import enum
+
+class PayloadKind(str, enum.Enum):
+    SSLCZ_IPN = "SSLCZ_IPN"
+    SSLCZ_VALIDATION = "SSLCZ_VALIDATION"
+    PAYPAL_PAYOUT = "PAYPAL_PAYOUT"
+
+class PayloadBlob(Base):
+    """Gateway payloads stored once per distinct content (sha256 of the canonical JSON)"""
+    __tablename__ = "payload_blobs"
+
+    digest = Column(String(64), primary_key=True)
+    codec = Column(String(10), nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    raw_size = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class TransactionPayload(Base):
+    """Which blob holds each gateway payload of a transaction"""
+    __tablename__ = "transaction_payloads"
+
+    # No foreign key: transactions is partitioned and its key is (id, created_at)
+    transaction_id = Column(Integer, primary_key=True, autoincrement=False)
+    kind = Column(Enum(PayloadKind), primary_key=True)
+    blob_digest = Column(String(64), ForeignKey("payload_blobs.digest"), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,128 @@
+from sqlalchemy import Column, Integer, String, Numeric, Date, DDL, event
+from app.core.database import Base
+from app.models.transaction import Transaction
+
+class UserTransactionStats(Base):
+    """Per-user counters behind /transactions/stats, kept current by a trigger"""
+    __tablename__ = "user_transaction_stats"
+
+    user_id = Column(Integer, primary_key=True, autoincrement=False)
+    total_count = Column(Integer, nullable=False, default=0, server_default="0")
+    successful_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+class UserTransactionCurrencyTotal(Base):
+    """Sum of PAYOUT_COMPLETED amounts per user and currency"""
+    __tablename__ = "user_transaction_currency_totals"
+
+    user_id = Column(Integer, primary_key=True)
+    currency = Column(String(3), primary_key=True)
+    completed_amount = Column(Numeric(18, 4), nullable=False, default=0, server_default="0")
+    completed_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+class UserTransactionDailyCount(Base):
+    """Transactions created per user and UTC day, for the rolling 30-day count"""
+    __tablename__ = "user_transaction_daily_counts"
+
+    user_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    transaction_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+SUCCESSFUL_STATUSES = ("COMPLETED", "PAYOUT_PENDING", "PAYOUT_COMPLETED")
+
+# Row-level triggers rather than application code: statuses also move through
+# set-based Core UPDATEs (IPN inbox, webhooks, payout poller), and a trigger
+# sees every one of them in the same database transaction.
+TRANSACTION_STATS_DDL = [
+    f"""
+    CREATE OR REPLACE FUNCTION transaction_stats_apply(
+        p_user_id integer,
+        p_status text,
+        p_currency text,
+        p_amount numeric,
+        p_created_at timestamptz,
+        p_sign integer,
+        p_count boolean
+    ) RETURNS void AS $$
+    DECLARE
+        successful boolean := p_status IN {SUCCESSFUL_STATUSES!r};
+    BEGIN
+        IF p_count OR successful THEN
+            INSERT INTO user_transaction_stats AS s (user_id, total_count, successful_count)
+            VALUES (
+                p_user_id,
+                CASE WHEN p_count THEN p_sign ELSE 0 END,
+                CASE WHEN successful THEN p_sign ELSE 0 END
+            )
+            ON CONFLICT (user_id) DO UPDATE SET
+                total_count = s.total_count + EXCLUDED.total_count,
+                successful_count = s.successful_count + EXCLUDED.successful_count;
+        END IF;
+
+        IF p_count AND p_created_at IS NOT NULL THEN
+            INSERT INTO user_transaction_daily_counts AS d (user_id, day, transaction_count)
+            VALUES (p_user_id, (p_created_at AT TIME ZONE 'UTC')::date, p_sign)
+            ON CONFLICT (user_id, day) DO UPDATE SET
+                transaction_count = d.transaction_count + EXCLUDED.transaction_count;
+        END IF;
+
+        IF p_status = 'PAYOUT_COMPLETED' THEN
+            INSERT INTO user_transaction_currency_totals AS c
+                (user_id, currency, completed_amount, completed_count)
+            VALUES (p_user_id, p_currency, p_sign * p_amount, p_sign)
+            ON CONFLICT (user_id, currency) DO UPDATE SET
+                completed_amount = c.completed_amount + EXCLUDED.completed_amount,
+                completed_count = c.completed_count + EXCLUDED.completed_count;
+        END IF;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION transactions_maintain_stats() RETURNS trigger AS $$
+    DECLARE
+        -- Status-only updates leave the total and daily counts alone
+        moved boolean := TG_OP <> 'UPDATE'
+            OR OLD.user_id <> NEW.user_id
+            OR OLD.created_at IS DISTINCT FROM NEW.created_at;
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            PERFORM transaction_stats_apply(
+                OLD.user_id, OLD.status::text, OLD.requested_foreign_currency,
+                OLD.requested_foreign_amount, OLD.created_at, -1, moved
+            );
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM transaction_stats_apply(
+                NEW.user_id, NEW.status::text, NEW.requested_foreign_currency,
+                NEW.requested_foreign_amount, NEW.created_at, 1, moved
+            );
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS transactions_stats_insert_delete ON transactions",
+    """
+    CREATE TRIGGER transactions_stats_insert_delete
+    AFTER INSERT OR DELETE ON transactions
+    FOR EACH ROW EXECUTE FUNCTION transactions_maintain_stats()
+    """,
+    "DROP TRIGGER IF EXISTS transactions_stats_update ON transactions",
+    """
+    CREATE TRIGGER transactions_stats_update
+    AFTER UPDATE ON transactions
+    FOR EACH ROW
+    WHEN (
+        OLD.status IS DISTINCT FROM NEW.status
+        OR OLD.user_id IS DISTINCT FROM NEW.user_id
+        OR OLD.created_at IS DISTINCT FROM NEW.created_at
+        OR OLD.requested_foreign_currency IS DISTINCT FROM NEW.requested_foreign_currency
+        OR OLD.requested_foreign_amount IS DISTINCT FROM NEW.requested_foreign_amount
+    )
+    EXECUTE FUNCTION transactions_maintain_stats()
+    """,
+]
+
+# Fresh databases (create_all) start empty, so installing the triggers is
+# enough; existing ones are backfilled by alembic revision 0003
+for statement in TRANSACTION_STATS_DDL:
+    event.listen(Transaction.__table__, "after_create", DDL(statement))
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from decimal import Decimal
 from datetime import datetime
+from typing import List, Literal
 
 class ExchangeRateResponse(BaseModel):
     currency_code: str
@@ -10,3 +11,30 @@ class ExchangeRateResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+class RateMatrixResponse(BaseModel):
+    currencies: List[str]
+    # rates[i][j]: units of currencies[j] per unit of currencies[i]
+    rates: List[List[Decimal]]
+    last_updated: datetime
+
+class ExchangeRatePointResponse(BaseModel):
+    currency_code: str
+    rate_to_bdt: Decimal
+    recorded_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class ExchangeRateOHLC(BaseModel):
+    bucket_start: datetime
+    open: Decimal
+    high: Decimal
+    low: Decimal
+    close: Decimal
+    samples: int
+
+class ExchangeRateHistoryResponse(BaseModel):
+    currency_code: str
+    interval: Literal["hour", "day", "week"]
+    buckets: List[ExchangeRateOHLC]
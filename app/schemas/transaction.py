@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, EmailStr, validator
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 from decimal import Decimal
 from app.models.transaction import TransactionStatus
@@ -20,11 +20,8 @@ class TransactionUpdate(BaseModel):
     sslcz_store_amount_bdt: Optional[Decimal] = None
     sslcz_card_type: Optional[str] = None
     sslcz_bank_tran_id: Optional[str] = None
-    sslcz_ipn_payload: Optional[Dict[str, Any]] = None
-    sslcz_validation_payload: Optional[Dict[str, Any]] = None
     paypal_payout_tran_id: Optional[str] = None
     paypal_payout_status: Optional[str] = None
-    paypal_payout_payload: Optional[Dict[str, Any]] = None
 
 class TransactionResponse(TransactionBase):
     id: int
@@ -52,17 +49,38 @@ class TransactionFilter(BaseModel):
 class PaymentCalculation(BaseModel):
     currency_code: str = Field(..., min_length=3, max_length=3)
     amount: Decimal = Field(..., gt=0)
+    
+    @validator('currency_code')
+    def validate_currency_code(cls, v):
+        return v.upper()
 
 class PaymentCalculationResponse(BaseModel):
     total_bdt_amount: Decimal
     exchange_rate: Decimal
     service_fee: Decimal
     currency_code: str
+    quote_token: str
+    quote_expires_at: datetime
+
+class PaymentCalculationBatch(BaseModel):
+    items: List[PaymentCalculation] = Field(..., min_length=1, max_length=5000)
+
+class PaymentCalculationBatchItem(BaseModel):
+    currency_code: str
+    amount: Decimal
+    exchange_rate: Decimal
+    service_fee: Decimal
+    total_bdt_amount: Decimal
+
+class PaymentCalculationBatchResponse(BaseModel):
+    items: List[PaymentCalculationBatchItem]
 
 class PaymentInitiate(BaseModel):
     foreign_currency_code: str = Field(..., min_length=3, max_length=3)
     foreign_amount: Decimal = Field(..., gt=0)
     recipient_paypal_email: EmailStr
+    # Token from /calculate-cost; locks the quoted rate and total
+    quote_token: Optional[str] = None
     
     @validator('foreign_currency_code')
     def validate_currency_code(cls, v):
@@ -0,0 +1,158 @@
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Integer, String, cast, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal, SessionLocal
+from app.models.admin_config import AdminConfig
+from app.models.system_setting import SystemSetting
+import logging
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+VERSION_SETTING_KEY = "admin_config_version"
+
+@dataclass(frozen=True)
+class AdminConfigSnapshot:
+    """Immutable, session-independent copy of the active AdminConfig row"""
+    id: int
+    admin_paypal_email: str
+    admin_paypal_client_id: str
+    admin_paypal_client_secret: str
+    sslcz_store_id: str
+    sslcz_store_passwd: str
+    exchangerate_api_key: Optional[str]
+    is_active: bool
+    created_at: datetime
+    updated_at: datetime
+
+    @classmethod
+    def from_model(cls, config: AdminConfig) -> "AdminConfigSnapshot":
+        return cls(
+            id=config.id,
+            admin_paypal_email=config.admin_paypal_email,
+            admin_paypal_client_id=config.admin_paypal_client_id,
+            admin_paypal_client_secret=config.admin_paypal_client_secret,
+            sslcz_store_id=config.sslcz_store_id,
+            sslcz_store_passwd=config.sslcz_store_passwd,
+            exchangerate_api_key=config.exchangerate_api_key,
+            is_active=config.is_active,
+            created_at=config.created_at,
+            updated_at=config.updated_at
+        )
+
+class AdminConfigCache:
+    """
+    Serves the active AdminConfig from memory.
+
+    Admin writes bump a version counter stored in ``system_settings`` in the
+    same transaction. Each process compares that counter at most once every
+    ADMIN_CONFIG_VERSION_CHECK_SECONDS and reloads only when it changed.
+    Async callers use get_async, which checks over an AsyncSession and lets
+    one coroutine at a time do so (single-flight) without blocking the loop.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._async_lock = asyncio.Lock()
+        self._config: Optional[AdminConfigSnapshot] = None
+        self._version: Optional[str] = None
+        self._loaded = False
+        self._checked_at = 0.0
+
+    def get(self, db: Optional[Session] = None) -> Optional[AdminConfigSnapshot]:
+        """For sync callers (admin endpoints run in the threadpool)"""
+        if self._is_fresh():
+            return self._config
+
+        with self._lock:
+            if self._is_fresh():
+                return self._config
+
+            session = db or SessionLocal()
+            try:
+                version = session.execute(self._version_query()).scalar()
+                config = None
+                if self._needs_reload(version):
+                    config = session.execute(self._config_query()).scalars().first()
+                self._store(version, config)
+            finally:
+                if db is None:
+                    session.close()
+
+        return self._config
+
+    async def get_async(self) -> Optional[AdminConfigSnapshot]:
+        if self._is_fresh():
+            return self._config
+
+        async with self._async_lock:
+            if self._is_fresh():
+                return self._config
+
+            async with AsyncSessionLocal() as session:
+                version = (await session.execute(self._version_query())).scalar()
+                config = None
+                if self._needs_reload(version):
+                    config = (await session.execute(self._config_query())).scalars().first()
+                self._store(version, config)
+
+        return self._config
+
+    @staticmethod
+    def _version_query():
+        return select(SystemSetting.setting_value).where(
+            SystemSetting.setting_key == VERSION_SETTING_KEY
+        )
+
+    @staticmethod
+    def _config_query():
+        return select(AdminConfig).where(AdminConfig.is_active == True)
+
+    def _needs_reload(self, version: Optional[str]) -> bool:
+        return not self._loaded or version != self._version
+
+    def _store(self, version: Optional[str], config: Optional[AdminConfig]) -> None:
+        """Record a version check; ``config`` is the row read when a reload was needed"""
+        if self._needs_reload(version):
+            self._config = AdminConfigSnapshot.from_model(config) if config else None
+            self._version = version
+            self._loaded = True
+            logger.info(f"Admin config loaded (version {version})")
+        self._checked_at = time.monotonic()
+
+    def _is_fresh(self) -> bool:
+        return self._loaded and (
+            time.monotonic() - self._checked_at < settings.ADMIN_CONFIG_VERSION_CHECK_SECONDS
+        )
+
+    def invalidate(self) -> None:
+        self._loaded = False
+
+    @staticmethod
+    def bump_version(db: Session) -> None:
+        """Increment the shared version; call before committing an admin write"""
+        stmt = insert(SystemSetting).values(
+            setting_key=VERSION_SETTING_KEY,
+            setting_value="1",
+            setting_type="int",
+            description="Incremented on every admin config change"
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SystemSetting.setting_key],
+            set_={
+                "setting_value": cast(
+                    cast(SystemSetting.__table__.c.setting_value, Integer) + 1, String
+                )
+            }
+        )
+        db.execute(stmt)
+
+# Global instance
+admin_config_cache = AdminConfigCache()
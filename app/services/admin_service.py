@@ -2,15 +2,14 @@ from sqlalchemy.orm import Session
 from typing import Optional
 from app.models.admin_config import AdminConfig
 from app.schemas.admin_config import AdminConfigCreate, AdminConfigUpdate
+from app.services.admin_config_cache import AdminConfigSnapshot, admin_config_cache
 
 class AdminService:
     def __init__(self, db: Session):
         self.db = db
     
-    def get_active_config(self) -> Optional[AdminConfig]:
-        return self.db.query(AdminConfig).filter(
-            AdminConfig.is_active == True
-        ).first()
+    def get_active_config(self) -> Optional[AdminConfigSnapshot]:
+        return admin_config_cache.get(self.db)
     
     def create_config(self, config_data: AdminConfigCreate) -> AdminConfig:
         # Deactivate existing configs
@@ -19,7 +18,9 @@ class AdminService:
         # Create new config
         db_config = AdminConfig(**config_data.dict())
         self.db.add(db_config)
+        admin_config_cache.bump_version(self.db)
         self.db.commit()
+        admin_config_cache.invalidate()
         self.db.refresh(db_config)
         
         return db_config
@@ -40,7 +41,9 @@ class AdminService:
         for field, value in update_data.items():
             setattr(config, field, value)
         
+        admin_config_cache.bump_version(self.db)
         self.db.commit()
+        admin_config_cache.invalidate()
         self.db.refresh(config)
         
         return config
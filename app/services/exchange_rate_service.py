@@ -1,85 +1,541 @@
-from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
-from typing import Optional
-import httpx
+import asyncio
+import re
+from sqlalchemy import and_, case, func, literal_column, select
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple, TypeVar
 from app.models.exchange_rate import ExchangeRate
+from app.models.exchange_rate_history import ExchangeRateHistory, ExchangeRateRollup
+from app.core.cache import TTLCache
 from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.core.http_client import EXCHANGE_RATE, http_clients
+from app.services.rate_matrix import RateMatrix
 import logging
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+T = TypeVar("T")
+
+@dataclass(frozen=True)
+class ExchangeRateSnapshot:
+    """Immutable, session-independent copy of an exchange rate row"""
+    currency_code: str
+    rate_to_bdt: Decimal
+    last_updated: datetime
+    expires_at: datetime
+
+    @classmethod
+    def from_model(cls, rate: ExchangeRate) -> "ExchangeRateSnapshot":
+        return cls(
+            currency_code=rate.currency_code,
+            rate_to_bdt=Decimal(rate.rate_to_bdt),
+            last_updated=rate.last_updated,
+            expires_at=rate.expires_at
+        )
+
+    def seconds_to_expiry(self) -> float:
+        if self.expires_at.tzinfo is not None:
+            now = datetime.now(timezone.utc)
+        else:
+            now = datetime.utcnow()
+        return (self.expires_at - now).total_seconds()
+
+_RATE_QUANTUM = Decimal("0.00000001")
+_REFRESH_KEY = ("exchange_rates", "refresh")
+_MATRIX_KEY = "matrix"
+# While serving stale, retry the background refresh at most this often
+_STALE_RETRY_SECONDS = 30
+
+_CURRENCY_CODE_RE = re.compile(r"^[A-Z]{3}$")
+
+# date_trunc fields accepted by get_history
+HISTORY_INTERVALS = ("hour", "day", "week")
+
+# Strong references to fire-and-forget refreshes
+_background_refreshes: Set[asyncio.Task] = set()
+
+# Process-wide rate snapshot shared by every ExchangeRateService instance
+_rate_cache: TTLCache[ExchangeRateSnapshot] = TTLCache(
+    ttl=settings.EXCHANGE_RATE_CACHE_TTL_SECONDS
+)
+
+# Cross-rate matrix rebuilt whenever the snapshot is refreshed
+_matrix_cache: TTLCache[RateMatrix] = TTLCache(
+    ttl=settings.EXCHANGE_RATE_CACHE_TTL_SECONDS
+)
+
+# Recent lookup failures by currency code as (error class, message), so bad
+# codes cannot drive upstream calls
+_negative_cache: TTLCache[Tuple[type, str]] = TTLCache(
+    ttl=settings.EXCHANGE_RATE_NEGATIVE_CACHE_SECONDS
+)
+
+# Currencies the provider knows; None until loaded from the DB or a refresh
+_currency_catalog: Optional[FrozenSet[str]] = None
+
+class UnknownCurrencyError(ValueError):
+    """The currency code is malformed or not offered by the rate provider"""
+
+class ExchangeRateUnavailableError(Exception):
+    """No provider answered and no usable stored rate was found"""
+
 class ExchangeRateService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
         self.api_url = settings.EXCHANGE_RATE_API_URL
         self.api_key = settings.EXCHANGE_RATE_API_KEY
-    
-    async def get_exchange_rate(self, currency_code: str) -> ExchangeRate:
-        # Check cache first
-        cached_rate = self.db.query(ExchangeRate).filter(
-            ExchangeRate.currency_code == currency_code,
-            ExchangeRate.expires_at > datetime.utcnow(),
-            ExchangeRate.is_active == True
-        ).first()
-        
+
+    async def get_exchange_rate(self, currency_code: str) -> ExchangeRateSnapshot:
+        # Serve from the in-memory snapshot when possible
+        cached_rate = _rate_cache.get(currency_code)
         if cached_rate:
             return cached_rate
-        
-        # Fetch from API
+
+        # Reject unknown codes and recent failures without any I/O
+        if not _CURRENCY_CODE_RE.match(currency_code) or (
+            _currency_catalog is not None and currency_code not in _currency_catalog
+        ):
+            raise UnknownCurrencyError(f"Currency {currency_code} not found")
+        failure = _negative_cache.get(currency_code)
+        if failure:
+            error_class, message = failure
+            raise error_class(message)
+
+        # Merge concurrent misses for the same currency into one load
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.api_url}/BDT",
-                    params={"access_key": self.api_key} if self.api_key else None,
-                    timeout=10.0
+            return await _rate_cache.load(
+                currency_code,
+                lambda: self._in_own_session(type(self)._load_exchange_rate, currency_code)
+            )
+        except (UnknownCurrencyError, ExchangeRateUnavailableError) as e:
+            _negative_cache.set(currency_code, (type(e), str(e)))
+            raise
+        except Exception as e:
+            _negative_cache.set(currency_code, (ExchangeRateUnavailableError, str(e)))
+            raise ExchangeRateUnavailableError(str(e)) from e
+
+    async def load_currency_catalog(self) -> int:
+        """Warm the catalog from stored rates; refreshes keep it current afterwards"""
+        result = await self.db.execute(
+            select(ExchangeRate.currency_code).where(ExchangeRate.is_active == True)
+        )
+        currency_codes = frozenset(result.scalars().all())
+        if currency_codes:
+            _set_currency_catalog(currency_codes)
+        return len(currency_codes)
+
+    async def get_exchange_rates(self, currency_codes: Iterable[str]) -> Dict[str, ExchangeRateSnapshot]:
+        """
+        Resolve each distinct currency once. Cache misses are read from the
+        database in one query; whatever is still missing goes through
+        get_exchange_rate, where the first refresh fetches every currency.
+        """
+        rates = {
+            currency_code: _rate_cache.get(currency_code)
+            for currency_code in dict.fromkeys(currency_codes)
+        }
+        misses = [currency_code for currency_code, rate in rates.items() if rate is None]
+        if len(misses) > 1:
+            result = await self.db.execute(
+                select(ExchangeRate).where(
+                    ExchangeRate.currency_code.in_(misses),
+                    ExchangeRate.is_active == True
                 )
-                response.raise_for_status()
-                data = response.json()
-                
-                if currency_code not in data.get("rates", {}):
-                    raise ValueError(f"Currency {currency_code} not found")
-                
-                # Calculate rate to BDT
-                # API returns rates from BDT to other currencies
-                # We need the inverse (other currency to BDT)
-                rate_from_bdt = data["rates"][currency_code]
-                rate_to_bdt = 1 / rate_from_bdt
-                
-                # Update or create rate
-                existing_rate = self.db.query(ExchangeRate).filter(
-                    ExchangeRate.currency_code == currency_code
-                ).first()
-                
-                if existing_rate:
-                    existing_rate.rate_to_bdt = rate_to_bdt
-                    existing_rate.last_updated = datetime.utcnow()
-                    existing_rate.expires_at = datetime.utcnow() + timedelta(minutes=10)
-                    existing_rate.is_active = True
-                else:
-                    existing_rate = ExchangeRate(
-                        currency_code=currency_code,
-                        rate_to_bdt=rate_to_bdt,
-                        last_updated=datetime.utcnow(),
-                        expires_at=datetime.utcnow() + timedelta(minutes=10),
-                        is_active=True
-                    )
-                    self.db.add(existing_rate)
-                
-                self.db.commit()
-                self.db.refresh(existing_rate)
-                
-                return existing_rate
-                
+            )
+            for stored_rate in result.scalars().all():
+                if ExchangeRateSnapshot.from_model(stored_rate).seconds_to_expiry() > 0:
+                    rates[stored_rate.currency_code] = self._cache_rate(stored_rate)
+
+        for currency_code, rate in rates.items():
+            if rate is None:
+                rates[currency_code] = await self.get_exchange_rate(currency_code)
+        return rates
+
+    async def get_rate_matrix(self) -> RateMatrix:
+        matrix = _matrix_cache.get(_MATRIX_KEY)
+        if matrix:
+            return matrix
+        return await _matrix_cache.load(
+            _MATRIX_KEY, lambda: self._in_own_session(type(self)._load_rate_matrix)
+        )
+
+    async def get_cross_rate(self, from_currency: str, to_currency: str) -> Decimal:
+        """Units of ``to_currency`` bought by one unit of ``from_currency``"""
+        matrix = await self.get_rate_matrix()
+        return matrix.rate(from_currency, to_currency)
+
+    async def _load_rate_matrix(self) -> RateMatrix:
+        # Build from the stored rates; processes that did not run the
+        # refresh themselves get the matrix this way
+        result = await self.db.execute(
+            select(
+                ExchangeRate.currency_code,
+                ExchangeRate.rate_to_bdt,
+                ExchangeRate.last_updated,
+                ExchangeRate.expires_at
+            ).where(
+                ExchangeRate.expires_at > datetime.now(timezone.utc) - timedelta(
+                    seconds=settings.EXCHANGE_RATE_MAX_STALENESS_SECONDS
+                ),
+                ExchangeRate.is_active == True
+            )
+        )
+        rows = result.all()
+
+        if not rows:
+            try:
+                await self.update_exchange_rates()
+            except Exception as e:
+                logger.error(f"Failed to fetch exchange rates: {str(e)}")
+                raise ExchangeRateUnavailableError("Unable to build the exchange rate matrix") from e
+            matrix = _matrix_cache.get(_MATRIX_KEY)
+            if not matrix:
+                raise ExchangeRateUnavailableError("Unable to build the exchange rate matrix")
+            return matrix
+
+        matrix = RateMatrix.from_rates_to_bdt(
+            {row.currency_code: Decimal(row.rate_to_bdt) for row in rows},
+            last_updated=min(row.last_updated for row in rows)
+        )
+        earliest_expiry = min(row.expires_at for row in rows)
+        now = datetime.now(timezone.utc) if earliest_expiry.tzinfo else datetime.utcnow()
+        ttl = min((earliest_expiry - now).total_seconds(), _matrix_cache.ttl)
+        if ttl <= 0:
+            # Within the staleness budget: serve it and refresh in the background
+            ttl = _STALE_RETRY_SECONDS
+            self._revalidate_in_background()
+        _matrix_cache.set(_MATRIX_KEY, matrix, ttl=ttl)
+        return matrix
+
+    def _cache_rate(self, rate: ExchangeRate) -> ExchangeRateSnapshot:
+        snapshot = ExchangeRateSnapshot.from_model(rate)
+        ttl = min(snapshot.seconds_to_expiry(), _rate_cache.ttl)
+        if ttl > 0:
+            _rate_cache.set(rate.currency_code, snapshot, ttl=ttl)
+        return snapshot
+
+    async def _load_exchange_rate(self, currency_code: str) -> ExchangeRateSnapshot:
+        # Check database next
+        result = await self.db.execute(
+            select(ExchangeRate).where(
+                ExchangeRate.currency_code == currency_code,
+                ExchangeRate.is_active == True
+            )
+        )
+        stored_rate = result.scalars().first()
+
+        if stored_rate:
+            snapshot = ExchangeRateSnapshot.from_model(stored_rate)
+            if snapshot.seconds_to_expiry() > 0:
+                return self._cache_rate(stored_rate)
+
+            # Stale-while-revalidate: answer now within the staleness budget
+            stale_budget = snapshot.seconds_to_expiry() + settings.EXCHANGE_RATE_MAX_STALENESS_SECONDS
+            if stale_budget > 0:
+                _rate_cache.set(
+                    currency_code, snapshot, ttl=min(stale_budget, _STALE_RETRY_SECONDS)
+                )
+                self._revalidate_in_background()
+                return snapshot
+
+        # Refresh every currency from one API response
+        try:
+            await self.update_exchange_rates()
         except Exception as e:
             logger.error(f"Failed to fetch exchange rate: {str(e)}")
-            
-            # Try to return expired rate if available
-            expired_rate = self.db.query(ExchangeRate).filter(
-                ExchangeRate.currency_code == currency_code
-            ).first()
-            
-            if expired_rate:
-                return expired_rate
-            
-            raise Exception(f"Unable to get exchange rate for {currency_code}")
+
+            if stored_rate:
+                # Not cached: the next request should retry the upstream
+                return ExchangeRateSnapshot.from_model(stored_rate)
+
+            raise ExchangeRateUnavailableError(f"Unable to get exchange rate for {currency_code}")
+
+        refreshed_rate = _rate_cache.get(currency_code)
+        if not refreshed_rate:
+            raise UnknownCurrencyError(f"Currency {currency_code} not found")
+
+        return refreshed_rate
+
+    async def _in_own_session(
+        self,
+        load: Callable[..., Awaitable[T]],
+        *args: Any
+    ) -> T:
+        """
+        Run a single-flight loader on a dedicated session. Every concurrent
+        caller awaits its result, so it must not borrow (or commit) the
+        session of whichever request happened to start it.
+        """
+        async with AsyncSessionLocal() as db:
+            return await load(type(self)(db), *args)
+
+    @staticmethod
+    def _revalidate_in_background() -> None:
+        async def refresh():
+            try:
+                # The refresh opens its own session; no request's is used
+                await ExchangeRateService(db=None).update_exchange_rates()
+            except Exception as e:
+                logger.warning(f"Background exchange rate refresh failed: {str(e)}")
+
+        task = asyncio.ensure_future(refresh())
+        _background_refreshes.add(task)
+        task.add_done_callback(_background_refreshes.discard)
+
+    def _providers(self) -> List[Tuple[str, Optional[str]]]:
+        return [(self.api_url, self.api_key)] + [
+            (api_url, None) for api_url in settings.EXCHANGE_RATE_FALLBACK_API_URLS
+        ]
+
+    async def _fetch_rates(self) -> Dict[str, Decimal]:
+        """
+        Fetch from the primary provider, hedging to the next one when it has
+        not answered within EXCHANGE_RATE_HEDGE_AFTER_SECONDS or has failed.
+        The first successful response wins; the rest are cancelled.
+        """
+        loop = asyncio.get_running_loop()
+        providers = self._providers()
+        pending = set()
+        last_error: Optional[Exception] = None
+
+        try:
+            for index, (api_url, api_key) in enumerate(providers):
+                pending.add(asyncio.ensure_future(self._fetch_rates_from(api_url, api_key)))
+                is_last = index == len(providers) - 1
+                hedge_at = None if is_last else loop.time() + settings.EXCHANGE_RATE_HEDGE_AFTER_SECONDS
+
+                while pending:
+                    timeout = None if hedge_at is None else max(hedge_at - loop.time(), 0)
+                    done, pending = await asyncio.wait(
+                        pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        if task.exception() is None:
+                            return task.result()
+                        last_error = task.exception()
+                        logger.warning(f"Exchange rate provider failed: {str(last_error)}")
+                    # Hedge delay elapsed or a provider failed: bring in the next one
+                    if not done or not is_last:
+                        break
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise last_error or Exception("No exchange rate provider answered")
+
+    async def _fetch_rates_from(self, api_url: str, api_key: Optional[str]) -> Dict[str, Decimal]:
+        client = http_clients.get(EXCHANGE_RATE)
+        response = await client.get(
+            f"{api_url}/BDT",
+            params={"access_key": api_key} if api_key else None
+        )
+        response.raise_for_status()
+        data = response.json()
+
+        # API returns rates from BDT to other currencies
+        # We need the inverse (other currency to BDT)
+        rates = {}
+        for currency_code, rate_from_bdt in data.get("rates", {}).items():
+            if len(currency_code) != 3 or not rate_from_bdt or rate_from_bdt <= 0:
+                continue
+            rates[currency_code] = (
+                Decimal(1) / Decimal(str(rate_from_bdt))
+            ).quantize(_RATE_QUANTUM)
+
+        if not rates:
+            raise ValueError(f"Exchange rate API {api_url} returned no rates")
+
+        return rates
+
+    async def _record_history(self, rates: Dict[str, Decimal], recorded_at: datetime) -> None:
+        """Append the ticks and fold them into the hourly OHLC rollups"""
+        await self.db.execute(
+            insert(ExchangeRateHistory)
+            .values([
+                {"currency_code": currency_code, "rate_to_bdt": rate_to_bdt, "recorded_at": recorded_at}
+                for currency_code, rate_to_bdt in rates.items()
+            ])
+            .on_conflict_do_nothing()
+        )
+
+        bucket_start = recorded_at.replace(minute=0, second=0, microsecond=0)
+        stmt = insert(ExchangeRateRollup).values([
+            {
+                "currency_code": currency_code,
+                "bucket_start": bucket_start,
+                "open": rate_to_bdt,
+                "high": rate_to_bdt,
+                "low": rate_to_bdt,
+                "close": rate_to_bdt,
+                "samples": 1,
+                "open_at": recorded_at,
+                "close_at": recorded_at
+            }
+            for currency_code, rate_to_bdt in rates.items()
+        ])
+        excluded = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ExchangeRateRollup.currency_code, ExchangeRateRollup.bucket_start],
+            set_={
+                "open": case(
+                    (excluded.open_at < ExchangeRateRollup.open_at, excluded.open),
+                    else_=ExchangeRateRollup.open
+                ),
+                "open_at": func.least(ExchangeRateRollup.open_at, excluded.open_at),
+                "high": func.greatest(ExchangeRateRollup.high, excluded.high),
+                "low": func.least(ExchangeRateRollup.low, excluded.low),
+                "close": case(
+                    (excluded.close_at >= ExchangeRateRollup.close_at, excluded.close),
+                    else_=ExchangeRateRollup.close
+                ),
+                "close_at": func.greatest(ExchangeRateRollup.close_at, excluded.close_at),
+                "samples": ExchangeRateRollup.samples + excluded.samples
+            }
+        )
+        await self.db.execute(stmt)
+
+    async def get_rate_at(self, currency_code: str, at: datetime) -> Optional[ExchangeRateHistory]:
+        """The rate in effect at ``at``: the latest tick recorded at or before it"""
+        result = await self.db.execute(
+            select(ExchangeRateHistory)
+            .where(
+                ExchangeRateHistory.currency_code == currency_code,
+                ExchangeRateHistory.recorded_at <= at
+            )
+            .order_by(ExchangeRateHistory.recorded_at.desc())
+            .limit(1)
+        )
+        return result.scalars().first()
+
+    async def get_history(
+        self,
+        currency_code: str,
+        start: datetime,
+        end: datetime,
+        interval: str = "hour"
+    ) -> List[Dict[str, Any]]:
+        """
+        OHLC buckets of ``interval`` (hour, day or week) between ``start`` and
+        ``end``, aggregated from the hourly rollups rather than raw ticks.
+        """
+        if interval not in HISTORY_INTERVALS:
+            raise ValueError(f"Unsupported interval {interval}")
+
+        rollup = ExchangeRateRollup
+        in_range = and_(
+            rollup.currency_code == currency_code,
+            rollup.bucket_start >= start,
+            rollup.bucket_start < end
+        )
+
+        if interval == "hour":
+            query = (
+                select(
+                    rollup.bucket_start,
+                    rollup.open,
+                    rollup.high,
+                    rollup.low,
+                    rollup.close,
+                    rollup.samples
+                )
+                .where(in_range)
+                .order_by(rollup.bucket_start)
+            )
+        else:
+            # Inlined (whitelisted) so SELECT and GROUP BY share one expression
+            bucket = func.date_trunc(
+                literal_column(f"'{interval}'"), rollup.bucket_start
+            ).label("bucket_start")
+            query = (
+                select(
+                    bucket,
+                    func.array_agg(
+                        aggregate_order_by(rollup.open, rollup.bucket_start),
+                        type_=ARRAY(rollup.open.type)
+                    )[1].label("open"),
+                    func.max(rollup.high).label("high"),
+                    func.min(rollup.low).label("low"),
+                    func.array_agg(
+                        aggregate_order_by(rollup.close, rollup.bucket_start.desc()),
+                        type_=ARRAY(rollup.close.type)
+                    )[1].label("close"),
+                    func.sum(rollup.samples).label("samples")
+                )
+                .where(in_range)
+                .group_by(bucket)
+                .order_by(bucket)
+            )
+
+        result = await self.db.execute(
+            query.limit(settings.EXCHANGE_RATE_HISTORY_MAX_BUCKETS)
+        )
+        return [dict(row._mapping) for row in result.all()]
+
+    async def update_exchange_rates(self) -> int:
+        """
+        Refresh every currency from a single API call, upsert them in one
+        statement and swap the in-memory snapshot. Concurrent callers share
+        the same refresh.
+        """
+        return await _rate_cache.load(
+            _REFRESH_KEY, lambda: self._in_own_session(type(self)._refresh_exchange_rates)
+        )
+
+    async def _refresh_exchange_rates(self) -> int:
+        rates = await self._fetch_rates()
+
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(seconds=settings.EXCHANGE_RATE_CACHE_TTL_SECONDS)
+        rows = [
+            {
+                "currency_code": currency_code,
+                "rate_to_bdt": rate_to_bdt,
+                "last_updated": now,
+                "expires_at": expires_at,
+                "is_active": True
+            }
+            for currency_code, rate_to_bdt in rates.items()
+        ]
+
+        stmt = insert(ExchangeRate).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ExchangeRate.currency_code],
+            set_={
+                "rate_to_bdt": stmt.excluded.rate_to_bdt,
+                "last_updated": stmt.excluded.last_updated,
+                "expires_at": stmt.excluded.expires_at,
+                "is_active": True
+            }
+        )
+        try:
+            await self.db.execute(stmt)
+            await self._record_history(rates, now)
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+
+        _rate_cache.replace({
+            row["currency_code"]: ExchangeRateSnapshot(
+                currency_code=row["currency_code"],
+                rate_to_bdt=row["rate_to_bdt"],
+                last_updated=now,
+                expires_at=expires_at
+            )
+            for row in rows
+        })
+        _matrix_cache.set(_MATRIX_KEY, RateMatrix.from_rates_to_bdt(rates, last_updated=now))
+        _set_currency_catalog(frozenset(rates))
+
+        return len(rows)
+
+def _set_currency_catalog(currency_codes: FrozenSet[str]) -> None:
+    global _currency_catalog
+    _currency_catalog = currency_codes
+    # Codes that exist now must not stay blocked by earlier failures
+    _negative_cache.invalidate()
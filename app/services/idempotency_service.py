@@ -0,0 +1,135 @@
+import asyncio
+import hashlib
+import json
+import time
+from datetime import timedelta
+from typing import Any, Dict, Optional
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import get_settings
+from app.models.idempotency_key import IdempotencyKey, IdempotencyKeyStatus
+import logging
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+class IdempotencyKeyMismatch(Exception):
+    """The key was already used with a different request body"""
+
+class IdempotencyKeyInProgress(Exception):
+    """The first request with this key did not finish in time"""
+
+class IdempotencyService:
+    """
+    Stores the response of a request under the client's Idempotency-Key so
+    retries replay it instead of repeating side effects.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    @staticmethod
+    def fingerprint(payload: Dict[str, Any]) -> str:
+        return hashlib.sha256(
+            json.dumps(payload, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    async def begin(self, user_id: int, key: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """
+        Claim ``key`` for this request. Returns None when the caller should
+        execute the request, or the stored response of an earlier one.
+        Concurrent duplicates wait for the first request to finish.
+        """
+        deadline = time.monotonic() + settings.IDEMPOTENCY_KEY_WAIT_SECONDS
+
+        while True:
+            if await self._try_claim(user_id, key, fingerprint):
+                return None
+
+            result = await self.db.execute(
+                select(IdempotencyKey.request_fingerprint, IdempotencyKey.status, IdempotencyKey.response)
+                .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+            )
+            row = result.first()
+            await self.db.rollback()
+
+            if row is None:
+                # Expired or released in between; try to claim again
+                continue
+            if row.request_fingerprint != fingerprint:
+                raise IdempotencyKeyMismatch()
+            if row.status == IdempotencyKeyStatus.COMPLETED:
+                return row.response
+            if time.monotonic() >= deadline:
+                raise IdempotencyKeyInProgress()
+
+            await asyncio.sleep(settings.IDEMPOTENCY_KEY_POLL_INTERVAL_SECONDS)
+
+    async def _try_claim(self, user_id: int, key: str, fingerprint: str) -> bool:
+        now = func.now()
+        # Expired keys and abandoned first requests do not block a new claim
+        await self.db.execute(
+            delete(IdempotencyKey)
+            .where(
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.key == key,
+                or_(
+                    IdempotencyKey.expires_at <= now,
+                    and_(
+                        IdempotencyKey.status == IdempotencyKeyStatus.IN_PROGRESS,
+                        IdempotencyKey.updated_at <= now - timedelta(
+                            seconds=settings.IDEMPOTENCY_KEY_LOCK_TIMEOUT_SECONDS
+                        )
+                    )
+                )
+            )
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.db.execute(
+            insert(IdempotencyKey)
+            .values(
+                user_id=user_id,
+                key=key,
+                request_fingerprint=fingerprint,
+                status=IdempotencyKeyStatus.IN_PROGRESS,
+                expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS)
+            )
+            .on_conflict_do_nothing(constraint="uq_idempotency_keys_user_key")
+            .returning(IdempotencyKey.id)
+        )
+        claimed = result.scalar() is not None
+        await self.db.commit()
+        return claimed
+
+    async def complete(self, user_id: int, key: str, response: Dict[str, Any]) -> None:
+        await self.db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+            .values(status=IdempotencyKeyStatus.COMPLETED, response=response)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+
+    async def release(self, user_id: int, key: str) -> None:
+        """Forget a claim whose request failed so the client can retry"""
+        await self.db.rollback()
+        await self.db.execute(
+            delete(IdempotencyKey)
+            .where(
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.key == key,
+                IdempotencyKey.status == IdempotencyKeyStatus.IN_PROGRESS
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+
+    async def purge_expired(self) -> int:
+        result = await self.db.execute(
+            delete(IdempotencyKey)
+            .where(IdempotencyKey.expires_at <= func.now())
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return result.rowcount
@@ -0,0 +1,143 @@
+from typing import Any, Dict, Tuple
+from pydantic import ValidationError
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.ids import parse_transaction_id
+from app.models.ipn_inbox import IPNInboxEntry
+from app.models.transaction import Transaction, TransactionStatus
+from app.models.transaction_payload import PayloadKind
+from app.schemas.payment import PaymentIPNRequest
+from app.services.payload_store import PayloadStore
+import logging
+
+logger = logging.getLogger(__name__)
+
+class IPNInboxService:
+    """
+    Append-only inbox for SSLCommerz IPNs. The endpoint stores the raw
+    payload and returns; app.worker validates and applies entries in batches.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def append(self, payload: Dict[str, Any]) -> None:
+        await self.db.execute(
+            insert(IPNInboxEntry).values(
+                tran_id=payload.get("tran_id"),
+                val_id=payload.get("val_id"),
+                payload=payload
+            )
+        )
+        await self.db.commit()
+
+    async def process_pending(self, limit: int) -> int:
+        """
+        Apply up to ``limit`` unprocessed IPNs in one commit. Retries of the
+        same IPN (same val_id or tran_id) collapse to one update, and only
+        PENDING transactions move, so replays are harmless.
+        """
+        result = await self.db.execute(
+            select(IPNInboxEntry.id, IPNInboxEntry.payload)
+            .where(IPNInboxEntry.processed_at.is_(None))
+            .order_by(IPNInboxEntry.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        entries = result.all()
+        if not entries:
+            await self.db.rollback()
+            return 0
+
+        errors: Dict[int, str] = {}
+        ipns: Dict[str, Tuple[int, PaymentIPNRequest, Dict[str, Any]]] = {}
+        seen_val_ids = set()
+        for entry in entries:
+            try:
+                ipn = PaymentIPNRequest(**entry.payload)
+            except ValidationError as e:
+                errors[entry.id] = f"Invalid IPN payload: {str(e)}"
+                continue
+            tran_id = parse_transaction_id(ipn.tran_id)
+            if tran_id is None:
+                errors[entry.id] = "Transaction not found"
+                continue
+            if tran_id in ipns or ipn.val_id in seen_val_ids:
+                continue
+            ipns[tran_id] = (entry.id, ipn, entry.payload)
+            seen_val_ids.add(ipn.val_id)
+
+        transactions_by_tran_id = {}
+        if ipns:
+            result = await self.db.execute(
+                select(
+                    Transaction.internal_tran_id,
+                    Transaction.id,
+                    Transaction.status,
+                    Transaction.calculated_bdt_amount
+                )
+                .where(Transaction.internal_tran_id.in_(list(ipns)))
+            )
+            transactions_by_tran_id = {row.internal_tran_id: row for row in result}
+
+        updates = []
+        payloads = []
+        for tran_id, (entry_id, ipn, payload) in ipns.items():
+            transaction = transactions_by_tran_id.get(tran_id)
+            if transaction is None:
+                errors[entry_id] = "Transaction not found"
+            elif transaction.calculated_bdt_amount != ipn.amount:
+                errors[entry_id] = "Amount mismatch"
+            else:
+                if transaction.status == TransactionStatus.PENDING:
+                    payloads.append((transaction.id, PayloadKind.SSLCZ_IPN, payload))
+                updates.append({
+                    "b_tran_id": tran_id,
+                    "b_val_id": ipn.val_id,
+                    "b_amount": ipn.amount,
+                    "b_store_amount": ipn.store_amount,
+                    "b_card_type": ipn.card_type,
+                    "b_bank_tran_id": ipn.bank_tran_id
+                })
+
+        if updates:
+            transactions = Transaction.__table__
+            await self.db.execute(
+                update(transactions)
+                .where(
+                    transactions.c.internal_tran_id == bindparam("b_tran_id"),
+                    transactions.c.status == TransactionStatus.PENDING
+                )
+                .values(
+                    status=TransactionStatus.IPN_RECEIVED,
+                    sslcz_val_id=bindparam("b_val_id"),
+                    sslcz_received_bdt_amount=bindparam("b_amount"),
+                    sslcz_store_amount_bdt=bindparam("b_store_amount"),
+                    sslcz_card_type=bindparam("b_card_type"),
+                    sslcz_bank_tran_id=bindparam("b_bank_tran_id")
+                ),
+                updates
+            )
+        if payloads:
+            # First IPN wins, as with the PENDING guard on the update
+            await PayloadStore(self.db).save_many(payloads, overwrite=False)
+
+        if errors:
+            for entry_id, error in errors.items():
+                logger.warning(f"IPN inbox entry {entry_id} rejected: {error}")
+            inbox = IPNInboxEntry.__table__
+            await self.db.execute(
+                update(inbox)
+                .where(inbox.c.id == bindparam("b_id"))
+                .values(error=bindparam("b_error")),
+                [{"b_id": entry_id, "b_error": error} for entry_id, error in errors.items()]
+            )
+
+        await self.db.execute(
+            update(IPNInboxEntry)
+            .where(IPNInboxEntry.id.in_([entry.id for entry in entries]))
+            .values(processed_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return len(entries)
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import zlib
+from typing import Any, Dict, Iterable, Optional, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import get_settings
+from app.models.transaction_payload import PayloadBlob, PayloadKind, TransactionPayload
+
+try:
+    import zstandard
+except ImportError:  # optional; payloads are zlib-compressed without it
+    zstandard = None
+
+settings = get_settings()
+
+CODEC_RAW = "raw"
+CODEC_ZLIB = "zlib"
+CODEC_ZSTD = "zstd"
+
+def _write_codec() -> str:
+    codec = settings.PAYLOAD_COMPRESSION
+    if codec == CODEC_ZSTD and zstandard is None:
+        return CODEC_ZLIB
+    return codec
+
+def encode_payload(payload: Any) -> Tuple[str, str, bytes, int]:
+    """(digest, codec, data, raw_size) for a JSON-serializable payload"""
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str).encode()
+    digest = hashlib.sha256(raw).hexdigest()
+
+    codec = _write_codec()
+    if codec == CODEC_ZSTD:
+        data = zstandard.ZstdCompressor(level=settings.PAYLOAD_COMPRESSION_LEVEL).compress(raw)
+    elif codec == CODEC_ZLIB:
+        data = zlib.compress(raw, settings.PAYLOAD_COMPRESSION_LEVEL)
+    else:
+        data = raw
+    # Small payloads can grow when compressed
+    if len(data) >= len(raw):
+        codec, data = CODEC_RAW, raw
+    return digest, codec, data, len(raw)
+
+def decode_payload(codec: str, data: bytes) -> Any:
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed payloads")
+        raw = zstandard.ZstdDecompressor().decompress(data)
+    elif codec == CODEC_ZLIB:
+        raw = zlib.decompress(data)
+    else:
+        raw = data
+    return json.loads(raw)
+
+class PayloadStore:
+    """
+    Gateway payloads (IPN, validation, payout responses) kept off the
+    transactions row. Blobs are content-addressed, so a payout response
+    shared by every item of a PayPal batch is stored once.
+
+    Writes join the caller's transaction; the caller commits. Reads are
+    on demand only (load / load_all), never part of a transaction lookup.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def save(
+        self,
+        transaction_id: int,
+        kind: PayloadKind,
+        payload: Any,
+        overwrite: bool = True
+    ) -> None:
+        await self.save_many([(transaction_id, kind, payload)], overwrite)
+
+    async def save_many(
+        self,
+        items: Iterable[Tuple[int, PayloadKind, Any]],
+        overwrite: bool = True
+    ) -> None:
+        """
+        Attach payloads to transactions. With ``overwrite=False`` an existing
+        payload of the same kind is kept (first write wins).
+        """
+        encoded: Dict[int, Tuple[str, str, bytes, int]] = {}
+        blobs: Dict[str, Dict[str, Any]] = {}
+        links = []
+        for transaction_id, kind, payload in items:
+            # The same object is often attached to many rows; encode it once
+            if id(payload) not in encoded:
+                encoded[id(payload)] = encode_payload(payload)
+            digest, codec, data, raw_size = encoded[id(payload)]
+            blobs[digest] = {"digest": digest, "codec": codec, "data": data, "raw_size": raw_size}
+            links.append({"transaction_id": transaction_id, "kind": kind, "blob_digest": digest})
+        if not links:
+            return
+
+        # Sorted so concurrent writers take the unique-index locks in the same order
+        await self.db.execute(
+            insert(PayloadBlob).on_conflict_do_nothing(index_elements=[PayloadBlob.digest]),
+            [blobs[digest] for digest in sorted(blobs)]
+        )
+
+        statement = insert(TransactionPayload)
+        if overwrite:
+            statement = statement.on_conflict_do_update(
+                index_elements=[TransactionPayload.transaction_id, TransactionPayload.kind],
+                set_={"blob_digest": statement.excluded.blob_digest, "created_at": func.now()}
+            )
+        else:
+            statement = statement.on_conflict_do_nothing(
+                index_elements=[TransactionPayload.transaction_id, TransactionPayload.kind]
+            )
+        await self.db.execute(statement, links)
+
+    async def load(self, transaction_id: int, kind: PayloadKind) -> Optional[Any]:
+        result = await self.db.execute(
+            select(PayloadBlob.codec, PayloadBlob.data)
+            .join(TransactionPayload, TransactionPayload.blob_digest == PayloadBlob.digest)
+            .where(
+                TransactionPayload.transaction_id == transaction_id,
+                TransactionPayload.kind == kind
+            )
+        )
+        row = result.first()
+        return decode_payload(row.codec, row.data) if row else None
+
+    async def load_all(self, transaction_id: int) -> Dict[PayloadKind, Any]:
+        result = await self.db.execute(
+            select(TransactionPayload.kind, PayloadBlob.codec, PayloadBlob.data)
+            .join(PayloadBlob, TransactionPayload.blob_digest == PayloadBlob.digest)
+            .where(TransactionPayload.transaction_id == transaction_id)
+        )
+        return {row.kind: decode_payload(row.codec, row.data) for row in result}
@@ -1,20 +1,51 @@
-from sqlalchemy.orm import Session
-from typing import Dict, Any
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+from decimal import Context, Decimal, ROUND_HALF_UP, localcontext
+from app.core.ids import parse_transaction_id
 from app.models.transaction import Transaction, TransactionStatus
 
+SERVICE_FEE_RATE = Decimal("0.025")  # 2.5% service fee
+_BDT_QUANTUM = Decimal("0.01")
+
+def calculate_price(amount: Decimal, rate_to_bdt: Decimal) -> Dict[str, Decimal]:
+    """BDT price of ``amount`` foreign currency, rounded to the paisa"""
+    service_fee, total_bdt = calculate_prices([(Decimal(amount), Decimal(rate_to_bdt))])[0]
+    return {"service_fee": service_fee, "total_bdt_amount": total_bdt}
+
+def calculate_prices(pairs: Sequence[Tuple[Decimal, Decimal]]) -> List[Tuple[Decimal, Decimal]]:
+    """
+    Vectorised calculate_price over ``(amount, rate_to_bdt)`` pairs, returning
+    ``(service_fee, total_bdt_amount)`` in input order. One Decimal context
+    with enough precision for Numeric(12, 4) x Numeric(15, 8) products is
+    used for the whole pass.
+    """
+    with localcontext(Context(prec=40, rounding=ROUND_HALF_UP)):
+        bdt_amounts = [amount * rate for amount, rate in pairs]
+        fees = [(bdt * SERVICE_FEE_RATE).quantize(_BDT_QUANTUM) for bdt in bdt_amounts]
+        totals = [(bdt + fee).quantize(_BDT_QUANTUM) for bdt, fee in zip(bdt_amounts, fees)]
+    return list(zip(fees, totals))
+
 class PaymentService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
-    def update_transaction_status(
+    async def get_transaction(self, transaction_id: str) -> Optional[Transaction]:
+        transaction_id = parse_transaction_id(transaction_id)
+        if transaction_id is None:
+            return None
+        result = await self.db.execute(
+            select(Transaction).where(Transaction.internal_tran_id == transaction_id)
+        )
+        return result.scalars().first()
+    
+    async def update_transaction_status(
         self,
         transaction_id: str,
         status: TransactionStatus,
         additional_data: Dict[str, Any] = None
     ) -> Transaction:
-        transaction = self.db.query(Transaction).filter(
-            Transaction.internal_tran_id == transaction_id
-        ).first()
+        transaction = await self.get_transaction(transaction_id)
         
         if not transaction:
             raise ValueError("Transaction not found")
@@ -26,20 +57,18 @@ class PaymentService:
                 if hasattr(transaction, key):
                     setattr(transaction, key, value)
         
-        self.db.commit()
-        self.db.refresh(transaction)
+        await self.db.commit()
+        await self.db.refresh(transaction)
         
         return transaction
     
-    def verify_transaction_amount(
+    async def verify_transaction_amount(
         self,
         transaction_id: str,
         amount: float,
         currency: str = "BDT"
     ) -> bool:
-        transaction = self.db.query(Transaction).filter(
-            Transaction.internal_tran_id == transaction_id
-        ).first()
+        transaction = await self.get_transaction(transaction_id)
         
         if not transaction:
             return False
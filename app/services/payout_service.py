@@ -0,0 +1,483 @@
+import hashlib
+import random
+import re
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Set
+import httpx
+from sqlalchemy import and_, func, or_, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import get_settings
+from app.models.payout_job import PayoutJob, PayoutJobStatus
+from app.models.transaction import Transaction, TransactionStatus
+from app.models.transaction_payload import PayloadKind
+from app.services.payload_store import PayloadStore
+from app.services.paypal_service import PayPalService
+import logging
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# HTTP statuses worth retrying; any other 4xx from PayPal is permanent
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+# Serializes claims so a sent group is always leased whole by one worker
+CLAIM_LOCK_KEY = zlib.crc32(b"payout_jobs:claim")
+
+# Field of a PayPal validation error detail that names one batch item
+_ITEM_FIELD_RE = re.compile(r"^items\[(\d+)\]")
+
+# PayPal payout item transaction_status values that end a payout
+PAYOUT_ITEM_SUCCEEDED = {"SUCCESS"}
+PAYOUT_ITEM_FAILED = {"FAILED", "RETURNED", "BLOCKED", "REFUNDED", "REVERSED", "DENIED", "CANCELED"}
+
+def payout_item_transition(item_status: Optional[str]) -> Optional[TransactionStatus]:
+    """Transaction status implied by a payout item status, or None while in flight"""
+    if item_status in PAYOUT_ITEM_SUCCEEDED:
+        return TransactionStatus.PAYOUT_COMPLETED
+    if item_status in PAYOUT_ITEM_FAILED:
+        return TransactionStatus.PAYOUT_FAILED
+    return None
+
+class PayoutService:
+    """Durable payout outbox: enqueued with the payment, executed by app.worker"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.paypal_service = PayPalService(db)
+
+    def enqueue(self, transaction: Transaction) -> PayoutJob:
+        """Add a payout job; it is committed with the caller's transaction"""
+        # PayoutJob.transaction is view-only, so the key is set directly
+        job = PayoutJob(transaction_id=transaction.id, status=PayoutJobStatus.PENDING)
+        self.db.add(job)
+        return job
+
+    @staticmethod
+    def _due_filter():
+        now = func.now()
+        return or_(
+            and_(
+                PayoutJob.status == PayoutJobStatus.PENDING,
+                PayoutJob.next_attempt_at <= now
+            ),
+            and_(
+                PayoutJob.status == PayoutJobStatus.IN_PROGRESS,
+                PayoutJob.locked_until < now
+            )
+        )
+
+    async def claim_jobs(self, worker_id: str, limit: int) -> List[List[int]]:
+        """
+        Lease due jobs for this worker, grouped into the units process_jobs
+        sends as one PayPal batch. A job that was already sent carries its
+        sender_batch_id and is leased together with exactly the rest of that
+        group. New jobs form one batch of up to ``limit`` with
+        PAYPAL_PAYOUT_BATCHING_ENABLED, else a unit each (up to ``limit``
+        units). Jobs whose lease expired (crashed worker) become claimable
+        again.
+        """
+        # Held until commit; claims are short, so replicas simply queue here
+        await self.db.execute(
+            text("SELECT pg_advisory_xact_lock(:key)"), {"key": CLAIM_LOCK_KEY}
+        )
+        result = await self.db.execute(
+            select(PayoutJob.id, PayoutJob.sender_batch_id)
+            .where(self._due_filter())
+            .order_by(PayoutJob.next_attempt_at, PayoutJob.id)
+            .limit(limit)
+        )
+        due = result.all()
+        if not due:
+            await self.db.commit()
+            return []
+
+        fresh = [row.id for row in due if row.sender_batch_id is None]
+        if not settings.PAYPAL_PAYOUT_BATCHING_ENABLED:
+            units = [[job_id] for job_id in fresh]
+            sender_batch_ids = list(dict.fromkeys(
+                row.sender_batch_id for row in due if row.sender_batch_id is not None
+            ))
+        elif due[0].sender_batch_id is None:
+            units = [fresh]
+            sender_batch_ids = []
+        else:
+            # The oldest due job belongs to a sent group: resend that group alone
+            units = []
+            sender_batch_ids = [due[0].sender_batch_id]
+
+        if sender_batch_ids:
+            result = await self.db.execute(
+                select(PayoutJob.sender_batch_id, PayoutJob.id)
+                .where(
+                    PayoutJob.sender_batch_id.in_(sender_batch_ids),
+                    self._due_filter()
+                )
+                .order_by(PayoutJob.id)
+            )
+            groups: Dict[str, List[int]] = {}
+            for sender_batch_id, job_id in result:
+                groups.setdefault(sender_batch_id, []).append(job_id)
+            units.extend(groups.values())
+
+        now = func.now()
+        await self.db.execute(
+            update(PayoutJob)
+            .where(PayoutJob.id.in_([job_id for unit in units for job_id in unit]))
+            .values(
+                status=PayoutJobStatus.IN_PROGRESS,
+                attempts=PayoutJob.attempts + 1,
+                locked_by=worker_id,
+                locked_until=now + timedelta(seconds=settings.PAYOUT_JOB_LEASE_SECONDS)
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return units
+
+    async def batch_ready(self) -> bool:
+        """Batching mode: send once enough jobs are due or the oldest has waited a full window"""
+        result = await self.db.execute(
+            select(func.count(PayoutJob.id), func.min(PayoutJob.next_attempt_at))
+            .where(self._due_filter())
+        )
+        due_count, oldest_due_at = result.one()
+        if not due_count:
+            return False
+        if due_count >= settings.PAYPAL_PAYOUT_BATCH_SIZE:
+            return True
+        return oldest_due_at <= datetime.now(timezone.utc) - timedelta(
+            seconds=settings.PAYPAL_PAYOUT_BATCH_WINDOW_SECONDS
+        )
+
+    async def process_jobs(self, job_ids: List[int]) -> None:
+        """Pay out one unit from claim_jobs as one PayPal batch"""
+        result = await self.db.execute(
+            select(PayoutJob, Transaction)
+            .join(Transaction, PayoutJob.transaction_id == Transaction.id)
+            .where(PayoutJob.id.in_(job_ids))
+            .order_by(PayoutJob.id)
+        )
+        rows = result.all()
+        if not rows:
+            return
+
+        sender_batch_id = rows[0][0].sender_batch_id
+        if sender_batch_id is None:
+            # Stored before the first send, so a retry after a lost response
+            # (or a crash) reuses it and PayPal rejects a second payment
+            sender_batch_id = self._sender_batch_id([t for _, t in rows])
+            for job, _ in rows:
+                job.sender_batch_id = sender_batch_id
+            await self.db.commit()
+
+        try:
+            payout_response = await self.paypal_service.create_batch_payout(
+                sender_batch_id=sender_batch_id,
+                items=[{
+                    "recipient_email": transaction.recipient_paypal_email,
+                    "amount": float(transaction.requested_foreign_amount),
+                    "currency": transaction.requested_foreign_currency,
+                    "reference_id": transaction.internal_tran_id
+                } for _, transaction in rows]
+            )
+        except Exception as e:
+            # A resend after a lost response: PayPal already has the batch
+            payout_response = await self._existing_batch(sender_batch_id, e)
+            if payout_response is None:
+                await self._send_failed(rows, e)
+                return
+
+        payout_batch_id = payout_response["batch_header"]["payout_batch_id"]
+        for job, transaction in rows:
+            transaction.paypal_payout_tran_id = payout_batch_id
+            transaction.paypal_payout_status = "PENDING"
+            transaction.status = TransactionStatus.PAYOUT_PENDING
+            transaction.payout_next_check_at = datetime.now(timezone.utc) + timedelta(
+                seconds=self._status_check_delay(0)
+            )
+            transaction.payout_check_count = 0
+            job.status = PayoutJobStatus.SUCCEEDED
+            job.locked_until = None
+            job.last_error = None
+        # One blob for the whole batch; every item links to it
+        await PayloadStore(self.db).save_many(
+            (transaction.id, PayloadKind.PAYPAL_PAYOUT, payout_response)
+            for _, transaction in rows
+        )
+        await self.db.commit()
+
+    async def _send_failed(self, rows: List, error: Exception) -> None:
+        """Reschedule or fail the jobs of a batch PayPal did not accept"""
+        rejected = self._rejected_items(error, len(rows))
+        if rejected:
+            # PayPal accepted nothing; drop the named items and regroup
+            # the others under a new sender_batch_id right away
+            now = datetime.now(timezone.utc)
+            for index, (job, transaction) in enumerate(rows):
+                if index in rejected:
+                    self._record_failure(job, transaction, error, now)
+                    continue
+                job.status = PayoutJobStatus.PENDING
+                job.sender_batch_id = None
+                job.locked_until = None
+                job.next_attempt_at = now
+            await self.db.commit()
+            return
+
+        # Retry the whole group together under the same sender_batch_id
+        next_attempt_at = datetime.now(timezone.utc) + timedelta(
+            seconds=self._backoff_seconds(max(job.attempts for job, _ in rows))
+        )
+        for job, transaction in rows:
+            self._record_failure(job, transaction, error, next_attempt_at)
+        await self.db.commit()
+
+    async def _existing_batch(self, sender_batch_id: str, error: Exception) -> Optional[Dict]:
+        """
+        The batch PayPal already holds under sender_batch_id when error is
+        its duplicate-batch rejection, or None. The error links to the
+        existing batch, which is fetched and checked against sender_batch_id.
+        """
+        payout_batch_id = self._duplicate_batch_id(error)
+        if payout_batch_id is None:
+            return None
+        try:
+            batch = await self.paypal_service.get_payout_details(payout_batch_id)
+        except Exception as e:
+            logger.warning(f"Could not fetch existing PayPal batch {payout_batch_id}: {str(e)}")
+            return None
+        header = batch.get("batch_header") or {}
+        if (header.get("sender_batch_header") or {}).get("sender_batch_id") != sender_batch_id:
+            logger.error(
+                f"PayPal batch {payout_batch_id} does not belong to sender_batch_id {sender_batch_id}"
+            )
+            return None
+        return batch
+
+    async def claim_status_checks(self, after_id: int, limit: int) -> Sequence:
+        """
+        Lease the next chunk (keyset on id) of PAYOUT_PENDING rows whose check
+        is due. Only the columns the poller needs are returned, including the
+        whole primary key (id, created_at); the lease pushes
+        payout_next_check_at forward so other replicas skip these rows.
+        """
+        now = func.now()
+        due = (
+            select(Transaction.id)
+            .where(
+                Transaction.status == TransactionStatus.PAYOUT_PENDING,
+                or_(
+                    Transaction.payout_next_check_at.is_(None),
+                    Transaction.payout_next_check_at <= now
+                ),
+                Transaction.id > after_id
+            )
+            .order_by(Transaction.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self.db.execute(
+            update(Transaction)
+            .where(Transaction.id.in_(due.scalar_subquery()))
+            .values(
+                payout_next_check_at=now + timedelta(
+                    seconds=settings.PAYOUT_STATUS_CHECK_LEASE_SECONDS
+                )
+            )
+            .returning(
+                Transaction.id,
+                Transaction.created_at,
+                Transaction.internal_tran_id,
+                Transaction.paypal_payout_tran_id,
+                Transaction.payout_check_count
+            )
+            .execution_options(synchronize_session=False)
+        )
+        rows = result.all()
+        await self.db.commit()
+        return rows
+
+    async def apply_status_checks(
+        self,
+        rows: Sequence,
+        items_by_batch: Dict[str, Optional[dict]]
+    ) -> Dict[TransactionStatus, int]:
+        """
+        Write one chunk of poll results in a single commit. ``items_by_batch``
+        maps a payout batch id to its items, or None when the lookup failed;
+        rows still in flight are rescheduled with exponential backoff.
+        """
+        finished: Dict[TransactionStatus, List[int]] = {
+            TransactionStatus.PAYOUT_COMPLETED: [],
+            TransactionStatus.PAYOUT_FAILED: []
+        }
+        rescheduled = []
+        now = datetime.now(timezone.utc)
+
+        for row in rows:
+            items = items_by_batch.get(row.paypal_payout_tran_id)
+            item = items.get(row.internal_tran_id) if items else None
+            new_status = payout_item_transition(item.get("transaction_status")) if item else None
+            if new_status:
+                finished[new_status].append(row.id)
+                continue
+            rescheduled.append({
+                "id": row.id,
+                "created_at": row.created_at,
+                "payout_check_count": row.payout_check_count + 1,
+                "payout_next_check_at": now + timedelta(
+                    seconds=self._status_check_delay(row.payout_check_count + 1)
+                )
+            })
+
+        for new_status, ids in finished.items():
+            if ids:
+                await self.db.execute(
+                    update(Transaction)
+                    .where(Transaction.id.in_(ids))
+                    .values(
+                        status=new_status,
+                        paypal_payout_status="COMPLETED"
+                        if new_status == TransactionStatus.PAYOUT_COMPLETED else "FAILED",
+                        payout_next_check_at=None
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+        if rescheduled:
+            # Bulk UPDATE by primary key (id, created_at), executemany
+            await self.db.execute(update(Transaction), rescheduled)
+
+        await self.db.commit()
+        return {new_status: len(ids) for new_status, ids in finished.items()}
+
+    @staticmethod
+    def _status_check_delay(check_count: int) -> float:
+        """
+        Exponential backoff with jitter between status checks of one payout.
+        With PayPal webhooks configured, polling only reconciles missed events.
+        """
+        if settings.PAYPAL_WEBHOOK_ID:
+            base = settings.PAYOUT_STATUS_CHECK_FALLBACK_SECONDS
+        else:
+            base = settings.PAYOUT_STATUS_CHECK_BASE_SECONDS
+        delay = min(
+            base * 2 ** max(check_count - 1, 0),
+            max(settings.PAYOUT_STATUS_CHECK_MAX_SECONDS, base)
+        )
+        return delay * random.uniform(0.8, 1.0)
+
+    @staticmethod
+    def _sender_batch_id(transactions: List[Transaction]) -> str:
+        """
+        Batch id for a newly grouped set of transactions: the
+        internal_tran_id of a single one, else a digest of the sorted ids
+        """
+        if len(transactions) == 1:
+            return transactions[0].internal_tran_id
+        digest = hashlib.sha256(
+            "|".join(sorted(t.internal_tran_id for t in transactions)).encode()
+        ).hexdigest()
+        return f"batch-{digest[:32]}"
+
+    @staticmethod
+    def _error_body(error: Exception) -> Dict:
+        """JSON body of a PayPal error response, or {}"""
+        if not isinstance(error, httpx.HTTPStatusError):
+            return {}
+        try:
+            body = error.response.json()
+        except ValueError:
+            return {}
+        return body if isinstance(body, dict) else {}
+
+    @classmethod
+    def _duplicate_batch_details(cls, error: Exception) -> List[Dict]:
+        """
+        Details of a PayPal rejection of an already used sender_batch_id,
+        e.g. ``{"field": "SENDER_BATCH_ID", "issue": "Batch with given
+        sender_batch_id already exists", "link": [...]}``; empty otherwise
+        """
+        if not isinstance(error, httpx.HTTPStatusError) or error.response.status_code >= 500:
+            return []
+        return [
+            detail for detail in cls._error_body(error).get("details") or []
+            if isinstance(detail, dict)
+            and str(detail.get("field") or "").upper() == "SENDER_BATCH_ID"
+            and "already" in str(detail.get("issue") or "").lower()
+        ]
+
+    @classmethod
+    def _duplicate_batch_id(cls, error: Exception) -> Optional[str]:
+        """payout_batch_id of the existing batch a duplicate-batch error links to"""
+        for detail in cls._duplicate_batch_details(error):
+            for link in detail.get("link") or detail.get("links") or []:
+                if isinstance(link, dict) and link.get("rel") == "self" and link.get("href"):
+                    return str(link["href"]).rstrip("/").rsplit("/", 1)[-1]
+        return None
+
+    @classmethod
+    def _is_permanent(cls, error: Exception) -> bool:
+        """
+        A 4xx from PayPal that a retry cannot fix. A duplicate-batch error
+        means the batch was sent, so it is not a failure of the payout.
+        """
+        return (
+            isinstance(error, httpx.HTTPStatusError)
+            and error.response.status_code < 500
+            and error.response.status_code not in RETRYABLE_STATUS_CODES
+            and not cls._duplicate_batch_details(error)
+        )
+
+    @classmethod
+    def _rejected_items(cls, error: Exception, item_count: int) -> Set[int]:
+        """
+        Indexes of the batch items a permanent PayPal error names in its
+        ``details`` (e.g. ``items[3].receiver``). Empty when the error is
+        retryable or about the batch as a whole.
+        """
+        if not cls._is_permanent(error):
+            return set()
+        rejected = set()
+        for detail in cls._error_body(error).get("details") or []:
+            if not isinstance(detail, dict):
+                continue
+            match = _ITEM_FIELD_RE.match(str(detail.get("field") or ""))
+            if match and int(match.group(1)) < item_count:
+                rejected.add(int(match.group(1)))
+        return rejected
+
+    def _record_failure(
+        self,
+        job: PayoutJob,
+        transaction: Transaction,
+        error: Exception,
+        next_attempt_at: datetime
+    ) -> None:
+        job.last_error = str(error)
+        job.locked_until = None
+
+        if self._is_permanent(error) or job.attempts >= settings.PAYOUT_JOB_MAX_ATTEMPTS:
+            job.status = PayoutJobStatus.FAILED
+            transaction.status = TransactionStatus.PAYOUT_FAILED
+            logger.error(
+                f"Payout for transaction {transaction.internal_tran_id} failed "
+                f"after {job.attempts} attempt(s): {str(error)}"
+            )
+            return
+
+        job.status = PayoutJobStatus.PENDING
+        job.next_attempt_at = next_attempt_at
+        logger.warning(
+            f"Payout for transaction {transaction.internal_tran_id} failed "
+            f"(attempt {job.attempts}), retrying at {job.next_attempt_at}: {str(error)}"
+        )
+
+    @staticmethod
+    def _backoff_seconds(attempts: int) -> float:
+        """Exponential backoff with jitter, capped at PAYOUT_JOB_BACKOFF_MAX_SECONDS"""
+        delay = min(
+            settings.PAYOUT_JOB_BACKOFF_BASE_SECONDS * 2 ** max(attempts - 1, 0),
+            settings.PAYOUT_JOB_BACKOFF_MAX_SECONDS
+        )
+        return delay * random.uniform(0.5, 1.0)
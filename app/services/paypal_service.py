@@ -1,27 +1,27 @@
 import httpx
-import base64
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from app.core.config import get_settings
-from app.models.admin_config import AdminConfig
-from sqlalchemy.orm import Session
+from app.core.http_client import PAYPAL, http_clients
+from app.services.admin_config_cache import admin_config_cache
+from app.services.paypal_token_manager import paypal_token_manager
+from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Largest page PayPal returns for GET /v1/payments/payouts/{id}
+PAYOUT_DETAILS_PAGE_SIZE = 1000
+
 class PayPalService:
-    def __init__(self, db: Session = None):
+    def __init__(self, db: AsyncSession = None):
         self.db = db
         self.base_url = settings.PAYPAL_BASE_URL
-        self._access_token = None
-        self._token_expires_at = None
     
-    def _get_credentials(self) -> tuple:
+    async def _get_credentials(self) -> tuple:
         if self.db:
-            # Get from database
-            config = self.db.query(AdminConfig).filter(
-                AdminConfig.is_active == True
-            ).first()
+            # Get from the in-memory admin config
+            config = await admin_config_cache.get_async()
             if config:
                 return config.admin_paypal_client_id, config.admin_paypal_client_secret
         
@@ -29,28 +29,32 @@ class PayPalService:
         return settings.PAYPAL_CLIENT_ID, settings.PAYPAL_CLIENT_SECRET
     
     async def _get_access_token(self) -> str:
-        client_id, client_secret = self._get_credentials()
+        client_id, client_secret = await self._get_credentials()
+        return await paypal_token_manager.get_token(self.base_url, client_id, client_secret)
+    
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        client = http_clients.get(PAYPAL)
         
-        auth = base64.b64encode(f"{client_id}:{client_secret}".encode()).decode()
+        for attempt in range(2):
+            access_token = await self._get_access_token()
+            response = await client.request(
+                method,
+                f"{self.base_url}{path}",
+                headers={
+                    "Authorization": f"Bearer {access_token}",
+                    "Content-Type": "application/json"
+                },
+                **kwargs
+            )
+            # Token revoked or rotated early: mint a fresh one and retry once
+            if response.status_code == 401 and attempt == 0:
+                client_id, _ = await self._get_credentials()
+                paypal_token_manager.invalidate(client_id)
+                continue
+            break
         
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/v1/oauth2/token",
-                    headers={
-                        "Authorization": f"Basic {auth}",
-                        "Content-Type": "application/x-www-form-urlencoded"
-                    },
-                    data={"grant_type": "client_credentials"},
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                data = response.json()
-                return data["access_token"]
-                
-        except Exception as e:
-            logger.error(f"PayPal authentication failed: {str(e)}")
-            raise
+        response.raise_for_status()
+        return response
     
     async def create_payout(
         self,
@@ -60,60 +64,84 @@ class PayPalService:
         reference_id: str,
         note: Optional[str] = None
     ) -> Dict[str, Any]:
-        access_token = await self._get_access_token()
-        
+        return await self.create_batch_payout(
+            sender_batch_id=reference_id,
+            items=[{
+                "recipient_email": recipient_email,
+                "amount": amount,
+                "currency": currency,
+                "reference_id": reference_id,
+                "note": note
+            }]
+        )
+    
+    async def create_batch_payout(
+        self,
+        sender_batch_id: str,
+        items: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Send many payouts as one PayPal batch. Each item needs
+        ``recipient_email``, ``amount``, ``currency`` and ``reference_id``
+        (used as ``sender_item_id``) and may carry a ``note``.
+        """
         payout_data = {
             "sender_batch_header": {
-                "sender_batch_id": reference_id,
+                "sender_batch_id": sender_batch_id,
                 "email_subject": "Payment from International Transfer",
                 "email_message": "You have received a payment"
             },
             "items": [{
                 "recipient_type": "EMAIL",
                 "amount": {
-                    "value": str(amount),
-                    "currency": currency
+                    "value": str(item["amount"]),
+                    "currency": item["currency"]
                 },
-                "note": note or "International payment transfer",
-                "sender_item_id": reference_id,
-                "receiver": recipient_email
-            }]
+                "note": item.get("note") or "International payment transfer",
+                "sender_item_id": item["reference_id"],
+                "receiver": item["recipient_email"]
+            } for item in items]
         }
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/v1/payments/payouts",
-                    headers={
-                        "Authorization": f"Bearer {access_token}",
-                        "Content-Type": "application/json"
-                    },
-                    json=payout_data,
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                return response.json()
-                
+            response = await self._request(
+                "POST", "/v1/payments/payouts", json=payout_data
+            )
+            return response.json()
+            
         except Exception as e:
             logger.error(f"PayPal payout failed: {str(e)}")
             raise
     
-    async def get_payout_details(self, payout_batch_id: str) -> Dict[str, Any]:
-        access_token = await self._get_access_token()
-        
+    async def get_payout_details(
+        self,
+        payout_batch_id: str,
+        page: int = 1,
+        page_size: int = PAYOUT_DETAILS_PAGE_SIZE
+    ) -> Dict[str, Any]:
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/v1/payments/payouts/{payout_batch_id}",
-                    headers={
-                        "Authorization": f"Bearer {access_token}",
-                        "Content-Type": "application/json"
-                    },
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                return response.json()
-                
+            response = await self._request(
+                "GET",
+                f"/v1/payments/payouts/{payout_batch_id}",
+                params={"page": page, "page_size": page_size}
+            )
+            return response.json()
+            
         except Exception as e:
             logger.error(f"Failed to get PayPal payout details: {str(e)}")
             raise
+    
+    async def get_payout_items(self, payout_batch_id: str) -> Dict[str, Dict[str, Any]]:
+        """Return every item of a payout batch keyed by ``sender_item_id``"""
+        items_by_sender_id: Dict[str, Dict[str, Any]] = {}
+        page = 1
+        while True:
+            details = await self.get_payout_details(payout_batch_id, page=page)
+            items = details.get("items", [])
+            for item in items:
+                sender_item_id = item.get("payout_item", {}).get("sender_item_id")
+                if sender_item_id:
+                    items_by_sender_id[sender_item_id] = item
+            if len(items) < PAYOUT_DETAILS_PAGE_SIZE:
+                return items_by_sender_id
+            page += 1
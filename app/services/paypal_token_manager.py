@@ -0,0 +1,204 @@
+import asyncio
+import base64
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.core.http_client import PAYPAL, http_clients
+from app.models.oauth_token import OAuthToken
+import logging
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+PROVIDER = "paypal"
+
+@dataclass(frozen=True)
+class AccessToken:
+    access_token: str
+    expires_at: datetime
+
+    def seconds_remaining(self) -> float:
+        return (self.expires_at - datetime.now(timezone.utc)).total_seconds()
+
+class PayPalTokenManager:
+    """
+    Caches PayPal OAuth tokens per client id and refreshes them before they
+    expire. Concurrent refreshes in this process are coalesced; tokens are
+    persisted in ``oauth_tokens`` so all API and worker processes share one.
+    """
+
+    def __init__(self):
+        self._tokens: TTLCache[AccessToken] = TTLCache(ttl=0)
+        self._refresh_handles: Dict[str, asyncio.TimerHandle] = {}
+        self._rejected: Dict[str, str] = {}
+
+    async def get_token(self, base_url: str, client_id: str, client_secret: str) -> str:
+        token = self._tokens.get(client_id)
+        if token:
+            return token.access_token
+
+        token = await self._tokens.load(
+            client_id, lambda: self._refresh(base_url, client_id, client_secret)
+        )
+        return token.access_token
+
+    def invalidate(self, client_id: str) -> None:
+        """Drop a token PayPal rejected so the next call mints a new one"""
+        token = self._tokens.get(client_id)
+        if token:
+            self._rejected[client_id] = token.access_token
+        self._tokens.invalidate(client_id)
+
+    def close(self) -> None:
+        for handle in self._refresh_handles.values():
+            handle.cancel()
+        self._refresh_handles = {}
+
+    async def _refresh(self, base_url: str, client_id: str, client_secret: str) -> AccessToken:
+        # Adopt a token another process already minted
+        token = await self._load_persisted(client_id)
+        if token is None:
+            token = await self._mint_shared(base_url, client_id, client_secret)
+
+        self._remember(base_url, client_id, client_secret, token)
+        return token
+
+    def _remember(
+        self, base_url: str, client_id: str, client_secret: str, token: AccessToken
+    ) -> None:
+        remaining = token.seconds_remaining()
+        self._tokens.set(
+            client_id,
+            token,
+            ttl=max(remaining - settings.PAYPAL_TOKEN_EXPIRY_MARGIN_SECONDS, 0)
+        )
+
+        # Refresh in the background before callers see an expired token
+        handle = self._refresh_handles.pop(client_id, None)
+        if handle:
+            handle.cancel()
+        delay = remaining - settings.PAYPAL_TOKEN_REFRESH_AHEAD_SECONDS
+        if delay <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        self._refresh_handles[client_id] = loop.call_later(
+            delay,
+            lambda: asyncio.ensure_future(
+                self._background_refresh(base_url, client_id, client_secret)
+            )
+        )
+
+    async def _background_refresh(self, base_url: str, client_id: str, client_secret: str) -> None:
+        self._refresh_handles.pop(client_id, None)
+        try:
+            await self._tokens.load(
+                client_id, lambda: self._refresh(base_url, client_id, client_secret)
+            )
+        except Exception as e:
+            logger.error(f"PayPal token background refresh failed: {str(e)}")
+
+    async def _mint_shared(self, base_url: str, client_id: str, client_secret: str) -> AccessToken:
+        if not settings.PAYPAL_TOKEN_PERSIST:
+            return await self._mint(base_url, client_id, client_secret)
+
+        # Only one process mints; the others wait briefly for its result
+        async with AsyncSessionLocal() as db:
+            locked = (await db.execute(
+                text("SELECT pg_try_advisory_xact_lock(:key)"),
+                {"key": zlib.crc32(f"{PROVIDER}:{client_id}".encode())}
+            )).scalar()
+
+            if not locked:
+                await db.rollback()
+                for _ in range(settings.PAYPAL_TOKEN_LOCK_WAIT_ATTEMPTS):
+                    await asyncio.sleep(0.5)
+                    token = await self._load_persisted(client_id)
+                    if token:
+                        return token
+
+            token = await self._mint(base_url, client_id, client_secret)
+            self._rejected.pop(client_id, None)
+            await self._persist(db, client_id, token)
+            return token
+
+    async def _persist(self, db: AsyncSession, client_id: str, token: AccessToken) -> None:
+        stmt = insert(OAuthToken).values(
+            provider=PROVIDER,
+            client_id=client_id,
+            access_token=token.access_token,
+            expires_at=token.expires_at
+        )
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_oauth_tokens_provider_client",
+            set_={
+                "access_token": stmt.excluded.access_token,
+                "expires_at": stmt.excluded.expires_at,
+                "updated_at": datetime.now(timezone.utc)
+            }
+        )
+        try:
+            await db.execute(stmt)
+            await db.commit()
+        except Exception as e:
+            # The token is still usable by this process
+            await db.rollback()
+            logger.warning(f"Could not persist PayPal token: {str(e)}")
+
+    async def _load_persisted(self, client_id: str) -> Optional[AccessToken]:
+        if not settings.PAYPAL_TOKEN_PERSIST:
+            return None
+
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(OAuthToken.access_token, OAuthToken.expires_at).where(
+                        OAuthToken.provider == PROVIDER,
+                        OAuthToken.client_id == client_id,
+                        OAuthToken.expires_at > datetime.now(timezone.utc) + timedelta(
+                            seconds=settings.PAYPAL_TOKEN_REFRESH_AHEAD_SECONDS
+                        )
+                    )
+                )
+                row = result.first()
+        except Exception as e:
+            logger.warning(f"Could not read persisted PayPal token: {str(e)}")
+            return None
+        if not row or row.access_token == self._rejected.get(client_id):
+            return None
+        return AccessToken(access_token=row.access_token, expires_at=row.expires_at)
+
+    async def _mint(self, base_url: str, client_id: str, client_secret: str) -> AccessToken:
+        auth = base64.b64encode(f"{client_id}:{client_secret}".encode()).decode()
+
+        try:
+            client = http_clients.get(PAYPAL)
+            response = await client.post(
+                f"{base_url}/v1/oauth2/token",
+                headers={
+                    "Authorization": f"Basic {auth}",
+                    "Content-Type": "application/x-www-form-urlencoded"
+                },
+                data={"grant_type": "client_credentials"}
+            )
+            response.raise_for_status()
+            data = response.json()
+        except Exception as e:
+            logger.error(f"PayPal authentication failed: {str(e)}")
+            raise
+
+        return AccessToken(
+            access_token=data["access_token"],
+            expires_at=datetime.now(timezone.utc) + timedelta(
+                seconds=int(data.get("expires_in", 0))
+            )
+        )
+
+# Global instance
+paypal_token_manager = PayPalTokenManager()
@@ -0,0 +1,166 @@
+import base64
+import binascii
+import zlib
+from typing import Any, Dict, List, Mapping
+from urllib.parse import urlparse
+from cryptography import x509
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.core.http_client import PAYPAL, http_clients
+from app.core.ids import parse_transaction_id
+from app.models.paypal_webhook_event import PayPalWebhookEvent
+from app.models.transaction import Transaction, TransactionStatus
+from app.services.payout_service import payout_item_transition
+import logging
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+PAYOUT_ITEM_EVENT_PREFIX = "PAYMENT.PAYOUTS-ITEM."
+
+# Signing certificates by URL; PayPal rotates them rarely
+_cert_cache: TTLCache = TTLCache(ttl=settings.PAYPAL_WEBHOOK_CERT_CACHE_SECONDS)
+
+class PayPalWebhookService:
+    """
+    Inbox for PayPal payout webhooks. The endpoint only verifies and stores
+    events; app.worker applies them to transactions in batches.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def verify_signature(self, headers: Mapping[str, str], body: bytes) -> bool:
+        """
+        Verify a webhook locally: PayPal signs
+        ``transmission_id|transmission_time|webhook_id|crc32(body)`` with
+        SHA256withRSA using the certificate at PAYPAL-CERT-URL.
+        """
+        transmission_id = headers.get("paypal-transmission-id")
+        transmission_time = headers.get("paypal-transmission-time")
+        transmission_sig = headers.get("paypal-transmission-sig")
+        cert_url = headers.get("paypal-cert-url")
+        auth_algo = headers.get("paypal-auth-algo")
+
+        if not all([transmission_id, transmission_time, transmission_sig, cert_url]):
+            return False
+        if auth_algo and auth_algo.upper() != "SHA256WITHRSA":
+            return False
+
+        parsed_url = urlparse(cert_url)
+        hostname = parsed_url.hostname or ""
+        if parsed_url.scheme != "https" or not (
+            hostname == "paypal.com" or hostname.endswith(".paypal.com")
+        ):
+            logger.warning(f"Rejected PayPal webhook certificate URL: {cert_url}")
+            return False
+
+        message = (
+            f"{transmission_id}|{transmission_time}|"
+            f"{settings.PAYPAL_WEBHOOK_ID}|{zlib.crc32(body)}"
+        ).encode()
+
+        try:
+            certificate = await self._get_certificate(cert_url)
+            certificate.public_key().verify(
+                base64.b64decode(transmission_sig),
+                message,
+                padding.PKCS1v15(),
+                hashes.SHA256()
+            )
+            return True
+        except (InvalidSignature, binascii.Error, ValueError):
+            return False
+
+    async def _get_certificate(self, cert_url: str) -> x509.Certificate:
+        certificate = _cert_cache.get(cert_url)
+        if certificate is not None:
+            return certificate
+
+        async def load() -> x509.Certificate:
+            response = await http_clients.get(PAYPAL).get(cert_url)
+            response.raise_for_status()
+            loaded = x509.load_pem_x509_certificate(response.content)
+            _cert_cache.set(cert_url, loaded)
+            return loaded
+
+        return await _cert_cache.load(cert_url, load)
+
+    async def store_event(self, event: Dict[str, Any]) -> bool:
+        """Persist an event once; PayPal redeliveries are ignored. Returns True if new"""
+        result = await self.db.execute(
+            insert(PayPalWebhookEvent)
+            .values(
+                event_id=event["id"],
+                event_type=event["event_type"],
+                payload=event
+            )
+            .on_conflict_do_nothing(index_elements=[PayPalWebhookEvent.event_id])
+            .returning(PayPalWebhookEvent.id)
+        )
+        stored = result.scalar() is not None
+        await self.db.commit()
+        return stored
+
+    async def process_pending_events(self, limit: int) -> int:
+        """
+        Apply up to ``limit`` unprocessed events in one commit. SKIP LOCKED
+        lets several worker replicas drain the inbox concurrently.
+        """
+        result = await self.db.execute(
+            select(PayPalWebhookEvent.id, PayPalWebhookEvent.payload)
+            .where(PayPalWebhookEvent.processed_at.is_(None))
+            .order_by(PayPalWebhookEvent.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        events = result.all()
+        if not events:
+            await self.db.rollback()
+            return 0
+
+        # Latest terminal state per payout item wins within a batch
+        transitions: Dict[str, TransactionStatus] = {}
+        for event in events:
+            resource = event.payload.get("resource") or {}
+            sender_item_id = parse_transaction_id(
+                (resource.get("payout_item") or {}).get("sender_item_id")
+            )
+            new_status = payout_item_transition(resource.get("transaction_status"))
+            if sender_item_id and new_status:
+                transitions[sender_item_id] = new_status
+
+        by_status: Dict[TransactionStatus, List[str]] = {}
+        for sender_item_id, new_status in transitions.items():
+            by_status.setdefault(new_status, []).append(sender_item_id)
+
+        for new_status, tran_ids in by_status.items():
+            await self.db.execute(
+                update(Transaction)
+                .where(
+                    Transaction.internal_tran_id.in_(tran_ids),
+                    Transaction.status == TransactionStatus.PAYOUT_PENDING
+                )
+                .values(
+                    status=new_status,
+                    paypal_payout_status="COMPLETED"
+                    if new_status == TransactionStatus.PAYOUT_COMPLETED else "FAILED",
+                    payout_next_check_at=None
+                )
+                .execution_options(synchronize_session=False)
+            )
+
+        await self.db.execute(
+            update(PayPalWebhookEvent)
+            .where(PayPalWebhookEvent.id.in_([event.id for event in events]))
+            .values(processed_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return len(events)
@@ -0,0 +1,69 @@
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Context, Decimal, ROUND_HALF_EVEN
+from typing import Dict, Iterable, List, Optional, Tuple
+
+BASE_CURRENCY = "BDT"
+
+# Significant digits kept for cross rates; fixed decimal places would lose
+# precision for small rates such as BDT -> KWD
+_CROSS_RATE_CONTEXT = Context(prec=18, rounding=ROUND_HALF_EVEN)
+
+@dataclass(frozen=True)
+class RateMatrix:
+    """
+    Dense N x N cross-rate table built from BDT-based rates.
+
+    ``rates[i * n + j]`` is how many units of ``currencies[j]`` one unit of
+    ``currencies[i]`` buys, so any conversion is a single index lookup.
+    """
+    currencies: Tuple[str, ...]
+    index: Dict[str, int]
+    rates: Tuple[Decimal, ...]
+    last_updated: datetime
+
+    @classmethod
+    def from_rates_to_bdt(
+        cls,
+        rates_to_bdt: Dict[str, Decimal],
+        last_updated: datetime
+    ) -> "RateMatrix":
+        values = {BASE_CURRENCY: Decimal(1), **rates_to_bdt}
+        currencies = tuple(sorted(values))
+        column = [values[currency_code] for currency_code in currencies]
+        divide = _CROSS_RATE_CONTEXT.divide
+        rates = tuple(
+            Decimal(1) if i == j else divide(row_rate, column_rate)
+            for i, row_rate in enumerate(column)
+            for j, column_rate in enumerate(column)
+        )
+        return cls(
+            currencies=currencies,
+            index={currency_code: i for i, currency_code in enumerate(currencies)},
+            rates=rates,
+            last_updated=last_updated
+        )
+
+    def rate(self, from_currency: str, to_currency: str) -> Decimal:
+        try:
+            i = self.index[from_currency]
+            j = self.index[to_currency]
+        except KeyError as e:
+            raise ValueError(f"Currency {e.args[0]} not found")
+        return self.rates[i * len(self.currencies) + j]
+
+    def convert(self, amount: Decimal, from_currency: str, to_currency: str) -> Decimal:
+        return Decimal(amount) * self.rate(from_currency, to_currency)
+
+    def rows(self, currencies: Optional[Iterable[str]] = None) -> Tuple[List[str], List[List[Decimal]]]:
+        """The matrix (or a sub-matrix for ``currencies``) as nested lists"""
+        selected = list(currencies) if currencies is not None else list(self.currencies)
+        for currency_code in selected:
+            if currency_code not in self.index:
+                raise ValueError(f"Currency {currency_code} not found")
+        n = len(self.currencies)
+        positions = [self.index[currency_code] for currency_code in selected]
+        return selected, [
+            [self.rates[i * n + j] for j in positions]
+            for i in positions
+        ]
@@ -0,0 +1,245 @@
+import bisect
+import os
+import re
+from datetime import datetime, time, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import DateTime, Integer, Numeric, bindparam, insert, or_, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+from app.core.config import get_settings
+from app.core.ids import transaction_id_timestamp
+from app.core.partitions import add_months
+from app.models.transaction import Transaction, TransactionStatus, TERMINAL_STATUSES
+from app.models.transaction_archive import TransactionArchive
+import logging
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.ipc
+except ImportError:  # optional; only needed once partitions are archived
+    pa = None
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_BOUND_RE = re.compile(r"FROM \((?:'([^']+)'|MINVALUE)\) TO \('([^']+)'\)")
+
+# created_at is the database's now() at insert, moments after the application
+# minted the UUIDv7; this covers that gap and clock skew between the two
+_ID_CLOCK_SLACK = timedelta(hours=1)
+
+# Memory-mapped archive files by path; archives are immutable once written
+_readers: Dict[str, Any] = {}
+
+def _arrow_schema() -> "pa.Schema":
+    fields = []
+    for column in Transaction.__table__.columns:
+        column_type = column.type
+        if isinstance(column_type, Integer):
+            arrow_type = pa.int32()
+        elif isinstance(column_type, Numeric):
+            arrow_type = pa.decimal128(column_type.precision, column_type.scale)
+        elif isinstance(column_type, DateTime):
+            arrow_type = pa.timestamp("us", tz="UTC")
+        else:
+            # String and Enum columns
+            arrow_type = pa.string()
+        fields.append(pa.field(column.name, arrow_type, nullable=column.nullable))
+    return pa.schema(fields)
+
+def _write_archive(
+    path: Path,
+    batches: Iterable[Sequence[Sequence[Any]]]
+) -> Tuple[List[str], int, bool]:
+    """
+    Write row batches (in Transaction column order, sorted by
+    internal_tran_id) as one record batch each. Returns the first key of
+    every batch, the row count and whether any key predates UUIDv7.
+    """
+    schema = _arrow_schema()
+    key_index = schema.get_field_index("internal_tran_id")
+    batch_first_keys = []
+    row_count = 0
+    has_legacy_ids = False
+    tmp_path = path.with_name(path.name + ".tmp")
+    options = pa.ipc.IpcWriteOptions(compression="zstd")
+    with pa.OSFile(str(tmp_path), "wb") as sink:
+        with pa.ipc.new_file(sink, schema, options=options) as writer:
+            for rows in batches:
+                writer.write_batch(pa.RecordBatch.from_arrays(
+                    [
+                        pa.array([row[i] for row in rows], type=field.type)
+                        for i, field in enumerate(schema)
+                    ],
+                    schema=schema
+                ))
+                batch_first_keys.append(rows[0][key_index])
+                row_count += len(rows)
+                # Version nibble of the canonical text form
+                has_legacy_ids = has_legacy_ids or any(
+                    str(row[key_index])[14] != "7" for row in rows
+                )
+    with open(tmp_path, "rb") as written:
+        os.fsync(written.fileno())
+    os.replace(tmp_path, path)
+    return batch_first_keys, row_count, has_legacy_ids
+
+def list_partitions(connection: Connection) -> List[Tuple[str, Optional[datetime], datetime]]:
+    """(name, range_start, range_end) of each range partition of transactions"""
+    result = connection.execute(
+        text(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+            "FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :parent"
+        ),
+        {"parent": Transaction.__tablename__}
+    )
+    partitions = []
+    for name, bound in result:
+        match = _BOUND_RE.search(bound or "")
+        if not match:
+            # The DEFAULT partition
+            continue
+        range_start = datetime.fromisoformat(match.group(1)) if match.group(1) else None
+        partitions.append((name, range_start, datetime.fromisoformat(match.group(2))))
+    return partitions
+
+def archive_partition(
+    engine: Engine,
+    partition_name: str,
+    range_start: Optional[datetime],
+    range_end: datetime
+) -> bool:
+    """
+    Export one partition to a zstd-compressed Arrow IPC file sorted by
+    internal_tran_id, register it and detach the partition, all in one
+    database transaction. Returns False if the partition still holds rows
+    in a non-terminal status.
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow is required to archive transactions")
+
+    directory = Path(settings.TRANSACTION_ARCHIVE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{partition_name}.arrow"
+    columns = [column.name for column in Transaction.__table__.columns]
+
+    with engine.connect() as connection, connection.begin():
+        # Writers are blocked on this partition only, and it holds cold rows
+        connection.execute(text(f'LOCK TABLE "{partition_name}" IN SHARE MODE'))
+        active = connection.execute(
+            text(
+                f'SELECT count(*) FROM "{partition_name}" '
+                f"WHERE status::text NOT IN :terminal"
+            ).bindparams(bindparam("terminal", expanding=True)),
+            {"terminal": [status.value for status in TERMINAL_STATUSES]}
+        ).scalar()
+        if active:
+            logger.info(f"Not archiving {partition_name}: {active} transactions still in flight")
+            return False
+
+        # Text in "C" order so it matches Python's string comparison in bisect
+        result = connection.execution_options(
+            yield_per=settings.TRANSACTION_ARCHIVE_BATCH_SIZE
+        ).execute(text(
+            f'SELECT {", ".join(columns)} FROM "{partition_name}" '
+            f'ORDER BY internal_tran_id::text COLLATE "C"'
+        ))
+
+        batch_first_keys, row_count, has_legacy_ids = _write_archive(path, result.partitions())
+
+        connection.execute(insert(TransactionArchive).values(
+            partition_name=partition_name,
+            path=str(path),
+            range_start=range_start,
+            range_end=range_end,
+            row_count=row_count,
+            batch_first_keys=batch_first_keys,
+            has_legacy_ids=has_legacy_ids
+        ))
+        connection.execute(text(
+            f'ALTER TABLE {Transaction.__tablename__} DETACH PARTITION "{partition_name}"'
+        ))
+        if settings.TRANSACTION_ARCHIVE_DROP_DETACHED:
+            connection.execute(text(f'DROP TABLE "{partition_name}"'))
+
+    logger.info(f"Archived {partition_name} ({row_count} transactions) to {path}")
+    return True
+
+def archive_old_partitions(engine: Engine) -> List[str]:
+    """Archive every partition that ended TRANSACTION_ARCHIVE_AFTER_MONTHS ago"""
+    first_of_month = datetime.now(timezone.utc).date().replace(day=1)
+    cutoff = datetime.combine(
+        add_months(first_of_month, -settings.TRANSACTION_ARCHIVE_AFTER_MONTHS),
+        time.min,
+        tzinfo=timezone.utc
+    )
+    with engine.connect() as connection:
+        partitions = list_partitions(connection)
+
+    archived = []
+    for partition_name, range_start, range_end in sorted(partitions, key=lambda p: p[2]):
+        if range_end > cutoff:
+            continue
+        if archive_partition(engine, partition_name, range_start, range_end):
+            archived.append(partition_name)
+    return archived
+
+def _reader(path: str):
+    reader = _readers.get(path)
+    if reader is None:
+        reader = pa.ipc.open_file(pa.memory_map(path, "r"))
+        _readers[path] = reader
+    return reader
+
+def candidate_archives(db: Session, internal_tran_id: str) -> List[Tuple[str, List[str]]]:
+    """
+    (path, batch_first_keys) of the archives that can hold
+    ``internal_tran_id``: the one or two whose range covers the time in a
+    UUIDv7, or those flagged as holding pre-UUIDv7 IDs.
+    """
+    query = (
+        select(TransactionArchive.path, TransactionArchive.batch_first_keys)
+        .order_by(TransactionArchive.range_end.desc())
+    )
+    created_at = transaction_id_timestamp(internal_tran_id)
+    if created_at is None:
+        query = query.where(TransactionArchive.has_legacy_ids)
+    else:
+        query = query.where(
+            TransactionArchive.range_end > created_at - _ID_CLOCK_SLACK,
+            or_(
+                TransactionArchive.range_start.is_(None),
+                TransactionArchive.range_start <= created_at + _ID_CLOCK_SLACK
+            )
+        )
+    return db.execute(query).all()
+
+def find_archived_transaction(db: Session, internal_tran_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Column values of an archived transaction, or None. Only the record
+    batch whose key range covers ``internal_tran_id`` is decompressed, in
+    the archives picked by candidate_archives.
+    """
+    archives = candidate_archives(db, internal_tran_id)
+    if not archives:
+        return None
+    if pa is None:
+        logger.warning("pyarrow is not installed; archived transactions cannot be read")
+        return None
+
+    for path, batch_first_keys in archives:
+        position = bisect.bisect_right(batch_first_keys, internal_tran_id) - 1
+        if position < 0:
+            continue
+        batch = _reader(path).get_batch(position)
+        index = pc.index(batch.column("internal_tran_id"), internal_tran_id).as_py()
+        if index >= 0:
+            values = batch.slice(index, 1).to_pylist()[0]
+            values["status"] = TransactionStatus(values["status"])
+            return values
+    return None
@@ -1,18 +1,124 @@
+import csv
+import io
+import json
+from enum import Enum
+from decimal import Decimal
 from sqlalchemy.orm import Session
-from typing import List, Optional, Dict
-from datetime import datetime, timedelta
-from sqlalchemy import func, and_
-from app.models.transaction import Transaction, TransactionStatus
+from typing import List, Optional, Dict, Tuple, Iterable, Iterator
+from datetime import datetime, time, timedelta, timezone
+from sqlalchemy import func, and_, select
+from sqlalchemy.engine import Row
+from app.core.config import get_settings
+from app.core.ids import parse_transaction_id
+from app.core.pagination import keyset_paginate
+from app.models.transaction import Transaction
+from app.models.user_transaction_stats import (
+    UserTransactionStats,
+    UserTransactionCurrencyTotal,
+    UserTransactionDailyCount
+)
 from app.schemas.transaction import TransactionFilter
+from app.services.transaction_archive import find_archived_transaction
+
+settings = get_settings()
+
+# Columns written by the export endpoints, in output order
+EXPORT_COLUMNS = (
+    Transaction.id,
+    Transaction.user_id,
+    Transaction.internal_tran_id,
+    Transaction.status,
+    Transaction.requested_foreign_currency,
+    Transaction.requested_foreign_amount,
+    Transaction.exchange_rate_bdt,
+    Transaction.calculated_bdt_amount,
+    Transaction.sslcz_received_bdt_amount,
+    Transaction.sslcz_store_amount_bdt,
+    Transaction.recipient_paypal_email,
+    Transaction.paypal_payout_status,
+    Transaction.created_at,
+    Transaction.updated_at,
+)
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+
+def _filter_conditions(filters: Optional[TransactionFilter]) -> List:
+    conditions = []
+    if filters:
+        if filters.status:
+            conditions.append(Transaction.status == filters.status)
+        if filters.currency:
+            conditions.append(Transaction.requested_foreign_currency == filters.currency)
+        if filters.start_date:
+            conditions.append(Transaction.created_at >= filters.start_date)
+        if filters.end_date:
+            conditions.append(Transaction.created_at <= filters.end_date)
+        if filters.min_amount:
+            conditions.append(Transaction.requested_foreign_amount >= filters.min_amount)
+        if filters.max_amount:
+            conditions.append(Transaction.requested_foreign_amount <= filters.max_amount)
+    return conditions
+
+def _export_value(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+def export_csv(rows: Iterable[Row]) -> Iterator[str]:
+    """CSV with a header line, one chunk per TRANSACTION_EXPORT_BATCH_SIZE rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for count, row in enumerate(rows, 1):
+        writer.writerow(["" if value is None else _export_value(value) for value in row])
+        if count % settings.TRANSACTION_EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def export_ndjson(rows: Iterable[Row]) -> Iterator[str]:
+    """One JSON object per line; amounts stay strings so no precision is lost"""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(
+            {field: _export_value(value) for field, value in zip(EXPORT_FIELDS, row)}
+        ))
+        if len(lines) == settings.TRANSACTION_EXPORT_BATCH_SIZE:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
 
 class TransactionService:
     def __init__(self, db: Session):
         self.db = db
     
     def get_transaction_by_id(self, transaction_id: str) -> Optional[Transaction]:
-        return self.db.query(Transaction).filter(
+        transaction_id = parse_transaction_id(transaction_id)
+        if transaction_id is None:
+            return None
+        transaction = self.db.query(Transaction).filter(
             Transaction.internal_tran_id == transaction_id
         ).first()
+        if transaction is None:
+            # Detached partitions only survive in the archive files; the
+            # time in a UUIDv7 picks the one archive worth opening
+            archived = find_archived_transaction(self.db, transaction_id)
+            if archived:
+                return Transaction(**archived)
+        return transaction
+    
+    def _user_transactions_query(
+        self,
+        user_id: int,
+        filters: Optional[TransactionFilter] = None
+    ):
+        query = self.db.query(Transaction).filter(Transaction.user_id == user_id)
+        return query.filter(*_filter_conditions(filters))
     
     def get_user_transactions(
         self,
@@ -21,67 +127,76 @@ class TransactionService:
         limit: int = 100,
         filters: Optional[TransactionFilter] = None
     ) -> List[Transaction]:
-        query = self.db.query(Transaction).filter(Transaction.user_id == user_id)
-        
-        if filters:
-            if filters.status:
-                query = query.filter(Transaction.status == filters.status)
-            if filters.currency:
-                query = query.filter(
-                    Transaction.requested_foreign_currency == filters.currency
-                )
-            if filters.start_date:
-                query = query.filter(Transaction.created_at >= filters.start_date)
-            if filters.end_date:
-                query = query.filter(Transaction.created_at <= filters.end_date)
-            if filters.min_amount:
-                query = query.filter(
-                    Transaction.requested_foreign_amount >= filters.min_amount
-                )
-            if filters.max_amount:
-                query = query.filter(
-                    Transaction.requested_foreign_amount <= filters.max_amount
-                )
-        
+        # Offset paging, kept for backward compatibility
+        query = self._user_transactions_query(user_id, filters)
         return query.order_by(Transaction.created_at.desc()).offset(skip).limit(limit).all()
     
+    def get_user_transactions_page(
+        self,
+        user_id: int,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        filters: Optional[TransactionFilter] = None
+    ) -> Tuple[List[Transaction], Optional[str]]:
+        query = self._user_transactions_query(user_id, filters)
+        return keyset_paginate(query, Transaction, cursor, limit)
+    
+    def stream_transactions(
+        self,
+        user_id: Optional[int] = None,
+        filters: Optional[TransactionFilter] = None
+    ) -> Iterator[Row]:
+        """
+        Plain rows of EXPORT_COLUMNS (all users when ``user_id`` is None),
+        read through a server-side cursor so memory stays flat.
+        """
+        conditions = _filter_conditions(filters)
+        if user_id is not None:
+            conditions.append(Transaction.user_id == user_id)
+        result = self.db.execute(
+            select(*EXPORT_COLUMNS)
+            .where(*conditions)
+            .order_by(Transaction.created_at, Transaction.id)
+            .execution_options(yield_per=settings.TRANSACTION_EXPORT_BATCH_SIZE)
+        )
+        try:
+            yield from result
+        finally:
+            result.close()
+    
     def get_user_statistics(self, user_id: int) -> Dict:
-        # Total transactions
-        total_transactions = self.db.query(func.count(Transaction.id)).filter(
-            Transaction.user_id == user_id
-        ).scalar()
-        
-        # Successful transactions
-        successful_transactions = self.db.query(func.count(Transaction.id)).filter(
-            and_(
-                Transaction.user_id == user_id,
-                Transaction.status.in_([
-                    TransactionStatus.COMPLETED,
-                    TransactionStatus.PAYOUT_PENDING,
-                    TransactionStatus.PAYOUT_COMPLETED
-                ])
-            )
-        ).scalar()
+        # Reads the trigger-maintained rollups instead of scanning history
+        stats = self.db.get(UserTransactionStats, user_id)
+        total_transactions = stats.total_count if stats else 0
+        successful_transactions = stats.successful_count if stats else 0
         
-        # Total amount by currency
         currency_totals = self.db.query(
-            Transaction.requested_foreign_currency,
-            func.sum(Transaction.requested_foreign_amount)
+            UserTransactionCurrencyTotal.currency,
+            UserTransactionCurrencyTotal.completed_amount
         ).filter(
-            and_(
-                Transaction.user_id == user_id,
-                Transaction.status == TransactionStatus.PAYOUT_COMPLETED
-            )
-        ).group_by(Transaction.requested_foreign_currency).all()
+            UserTransactionCurrencyTotal.user_id == user_id,
+            UserTransactionCurrencyTotal.completed_count > 0
+        ).all()
         
-        # Last 30 days transactions
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        recent_transactions = self.db.query(func.count(Transaction.id)).filter(
+        # Last 30 days: whole daily buckets after the cut-off day, plus the
+        # part of the cut-off day itself from the (user_id, created_at) index
+        thirty_days_ago = datetime.now(timezone.utc) - timedelta(days=30)
+        cutoff_day = thirty_days_ago.date()
+        next_day = datetime.combine(cutoff_day + timedelta(days=1), time.min, tzinfo=timezone.utc)
+        full_days = self.db.query(
+            func.coalesce(func.sum(UserTransactionDailyCount.transaction_count), 0)
+        ).filter(
+            UserTransactionDailyCount.user_id == user_id,
+            UserTransactionDailyCount.day > cutoff_day
+        ).scalar()
+        partial_day = self.db.query(func.count(Transaction.id)).filter(
             and_(
                 Transaction.user_id == user_id,
-                Transaction.created_at >= thirty_days_ago
+                Transaction.created_at >= thirty_days_ago,
+                Transaction.created_at < next_day
             )
         ).scalar()
+        recent_transactions = full_days + partial_day
         
         return {
             "total_transactions": total_transactions,
@@ -90,4 +205,3 @@ class TransactionService:
             "currency_totals": {currency: float(amount) for currency, amount in currency_totals},
             "recent_transactions_30d": recent_transactions
         }
-    
\ No newline at end of file
@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Tuple
+from app.core.pagination import keyset_paginate
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 from app.core.security import get_password_hash
@@ -47,6 +48,7 @@ class UserService:
         limit: int = 100,
         is_active: Optional[bool] = None
     ) -> List[User]:
+        # Offset paging, kept for backward compatibility
         query = self.db.query(User)
         
         if is_active is not None:
@@ -54,6 +56,19 @@ class UserService:
         
         return query.offset(skip).limit(limit).all()
     
+    def get_users_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        is_active: Optional[bool] = None
+    ) -> Tuple[List[User], Optional[str]]:
+        query = self.db.query(User)
+        
+        if is_active is not None:
+            query = query.filter(User.is_active == is_active)
+        
+        return keyset_paginate(query, User, cursor, limit)
+    
     def update_user(self, user_id: int, user_update: UserUpdate) -> Optional[User]:
         user = self.get_user_by_id(user_id)
         if not user:
@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import os
+import signal
+import socket
+from typing import Awaitable, Callable, Set
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal, async_engine
+from app.core.http_client import http_clients
+from app.services.ipn_inbox_service import IPNInboxService
+from app.services.payout_service import PayoutService
+from app.services.paypal_webhook_service import PayPalWebhookService
+from app.services.paypal_token_manager import paypal_token_manager
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+class PayoutWorker:
+    """
+    Drains the payout outbox with bounded concurrency.
+
+    Jobs are leased in short claims serialized by an advisory lock, so
+    throughput scales horizontally by running more worker replicas.
+    """
+
+    def __init__(self):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.concurrency = settings.PAYOUT_WORKER_CONCURRENCY
+        self.in_flight: Set[asyncio.Task] = set()
+        self._stopping = asyncio.Event()
+
+    def stop(self):
+        logger.info("Payout worker stopping...")
+        self._stopping.set()
+
+    async def run(self):
+        logger.info(f"Payout worker {self.worker_id} started (concurrency {self.concurrency})")
+
+        while not self._stopping.is_set():
+            if settings.PAYPAL_PAYOUT_BATCHING_ENABLED:
+                # One task sends one PayPal batch of up to PAYPAL_PAYOUT_BATCH_SIZE items
+                batches = await self._claim_batch()
+            else:
+                batches = await self._claim(self.concurrency - len(self.in_flight))
+
+            for job_ids in batches:
+                task = asyncio.create_task(self._process(job_ids))
+                self.in_flight.add(task)
+                task.add_done_callback(self.in_flight.discard)
+
+            if batches and len(self.in_flight) < self.concurrency:
+                # More work may be due right away
+                continue
+
+            await self._wait()
+
+        # Let in-flight payouts finish before exiting
+        if self.in_flight:
+            await asyncio.gather(*self.in_flight, return_exceptions=True)
+        logger.info("Payout worker stopped")
+
+    async def _claim(self, limit: int) -> list:
+        if limit <= 0:
+            return []
+        try:
+            async with AsyncSessionLocal() as db:
+                return await PayoutService(db).claim_jobs(self.worker_id, limit)
+        except Exception as e:
+            logger.error(f"Error claiming payout jobs: {str(e)}")
+            return []
+
+    async def _claim_batch(self) -> list:
+        if len(self.in_flight) >= self.concurrency:
+            return []
+        try:
+            async with AsyncSessionLocal() as db:
+                payout_service = PayoutService(db)
+                if not await payout_service.batch_ready():
+                    return []
+                return await payout_service.claim_jobs(
+                    self.worker_id, settings.PAYPAL_PAYOUT_BATCH_SIZE
+                )
+        except Exception as e:
+            logger.error(f"Error claiming payout batch: {str(e)}")
+            return []
+
+    async def _process(self, job_ids: list):
+        try:
+            async with AsyncSessionLocal() as db:
+                await PayoutService(db).process_jobs(job_ids)
+        except Exception as e:
+            # The lease expires and another attempt picks the jobs up
+            logger.error(f"Error processing payout jobs {job_ids}: {str(e)}")
+
+    async def _wait(self):
+        """Sleep until the poll interval elapses, a slot frees up or we stop"""
+        waiters = {asyncio.ensure_future(self._stopping.wait())}
+        if len(self.in_flight) >= self.concurrency:
+            waiters |= self.in_flight
+        try:
+            await asyncio.wait(
+                waiters,
+                timeout=settings.PAYOUT_WORKER_POLL_INTERVAL_SECONDS,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            for waiter in waiters - self.in_flight:
+                waiter.cancel()
+
+class InboxConsumer:
+    """Drains one inbox table in batches until stopped"""
+
+    def __init__(
+        self,
+        name: str,
+        process: Callable[[AsyncSession, int], Awaitable[int]],
+        batch_size: int,
+        poll_interval: float
+    ):
+        self.name = name
+        self.process = process
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._stopping = asyncio.Event()
+
+    def stop(self):
+        self._stopping.set()
+
+    async def run(self):
+        logger.info(f"{self.name} consumer started")
+
+        while not self._stopping.is_set():
+            try:
+                async with AsyncSessionLocal() as db:
+                    processed = await self.process(db, self.batch_size)
+            except Exception as e:
+                logger.error(f"Error processing {self.name} inbox: {str(e)}")
+                processed = 0
+
+            if processed >= self.batch_size:
+                # Backlog: keep draining
+                continue
+
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+        logger.info(f"{self.name} consumer stopped")
+
+async def main():
+    worker = PayoutWorker()
+    consumers = [
+        InboxConsumer(
+            "PayPal webhook",
+            lambda db, limit: PayPalWebhookService(db).process_pending_events(limit),
+            settings.PAYPAL_WEBHOOK_BATCH_SIZE,
+            settings.PAYPAL_WEBHOOK_POLL_INTERVAL_SECONDS
+        ),
+        InboxConsumer(
+            "IPN",
+            lambda db, limit: IPNInboxService(db).process_pending(limit),
+            settings.IPN_INBOX_BATCH_SIZE,
+            settings.IPN_INBOX_POLL_INTERVAL_SECONDS
+        )
+    ]
+
+    def stop():
+        worker.stop()
+        for consumer in consumers:
+            consumer.stop()
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop)
+
+    http_clients.open()
+    try:
+        await asyncio.gather(worker.run(), *(consumer.run() for consumer in consumers))
+    finally:
+        paypal_token_manager.close()
+        await http_clients.close()
+        await async_engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Side-by-side throughput benchmark of the sync Session path versus the
+AsyncSession (asyncpg) path for the payment endpoints' lookup pattern.
+
+Each simulated request looks up a transaction by ``internal_tran_id`` and
+then awaits an outbound call (``--upstream-ms``), mirroring
+``PaymentController.handle_success``. The sync variant runs the query on
+the event loop exactly like the endpoints did before the async port.
+
+Usage:
+    DATABASE_URL=postgresql://... python benchmarks/async_db_benchmark.py \
+        --requests 2000 --concurrency 100 --upstream-ms 50
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Awaitable, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import select
+from app.core.database import SessionLocal, AsyncSessionLocal, async_engine, engine
+from app.models.transaction import Transaction
+
+async def sync_request(tran_id: str, upstream_s: float) -> None:
+    # Connections are released before the upstream await in both variants so
+    # the sync pool cannot deadlock the loop waiting for a checkout
+    db = SessionLocal()
+    try:
+        db.query(Transaction).filter(Transaction.internal_tran_id == tran_id).first()
+    finally:
+        db.close()
+    await asyncio.sleep(upstream_s)
+
+async def async_request(tran_id: str, upstream_s: float) -> None:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Transaction).where(Transaction.internal_tran_id == tran_id)
+        )
+        result.scalars().first()
+    await asyncio.sleep(upstream_s)
+
+async def run(
+    name: str,
+    handler: Callable[[str, float], Awaitable[None]],
+    tran_ids: List[str],
+    args: argparse.Namespace
+) -> None:
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: List[float] = []
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await handler(tran_ids[i % len(tran_ids)], args.upstream_ms / 1000)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{name:>6}: {args.requests / elapsed:8.1f} req/s  "
+        f"p50 {statistics.median(latencies) * 1000:7.1f} ms  "
+        f"p95 {p95 * 1000:7.1f} ms"
+    )
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--upstream-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        tran_ids = [
+            row[0] for row in db.query(Transaction.internal_tran_id).limit(1000).all()
+        ] or ["missing"]
+    finally:
+        db.close()
+
+    # Warm both pools before measuring
+    warmup = argparse.Namespace(**{**vars(args), "requests": 50})
+    await run("warmup", sync_request, tran_ids, warmup)
+    await run("warmup", async_request, tran_ids, warmup)
+    await run("sync", sync_request, tran_ids, args)
+    await run("async", async_request, tran_ids, args)
+
+    await async_engine.dispose()
+    engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Compares pricing N (currency, amount) pairs with N calls to
+``/payment/calculate-cost`` against one ``/payment/calculate-cost/batch``
+call, over HTTP against a running API server. Also times the in-process
+pricing pass on its own (``calculate_prices`` vs N ``calculate_price``).
+
+Usage:
+    python benchmarks/batch_pricing_benchmark.py \
+        --base-url http://localhost:8000/api/v1 --pairs 1000 --concurrency 50
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+from typing import List
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+CURRENCIES = ["USD", "EUR", "GBP", "CAD", "AUD", "JPY", "SGD", "AED", "INR", "MYR"]
+
+def make_pairs(count: int) -> List[dict]:
+    rng = random.Random(42)
+    return [
+        {
+            "currency_code": rng.choice(CURRENCIES),
+            "amount": str(Decimal(rng.randint(100, 1_000_000)) / 100)
+        }
+        for _ in range(count)
+    ]
+
+async def single_calls(client: httpx.AsyncClient, pairs: List[dict], concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(pair: dict) -> None:
+        async with semaphore:
+            response = await client.post("/payment/calculate-cost", json=pair)
+            response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(pair) for pair in pairs))
+    return time.perf_counter() - started
+
+async def batch_call(client: httpx.AsyncClient, pairs: List[dict]) -> float:
+    started = time.perf_counter()
+    response = await client.post("/payment/calculate-cost/batch", json={"items": pairs})
+    response.raise_for_status()
+    assert len(response.json()["items"]) == len(pairs)
+    return time.perf_counter() - started
+
+def in_process(pairs: List[dict]) -> None:
+    from app.services.payment_service import calculate_price, calculate_prices
+
+    rate = Decimal("119.12345678")
+    values = [(Decimal(pair["amount"]), rate) for pair in pairs]
+
+    started = time.perf_counter()
+    for amount, pair_rate in values:
+        calculate_price(amount, pair_rate)
+    single = time.perf_counter() - started
+
+    started = time.perf_counter()
+    calculate_prices(values)
+    batch = time.perf_counter() - started
+
+    print(f"in-process: {len(values)} x calculate_price {single * 1000:8.2f} ms  "
+          f"calculate_prices {batch * 1000:8.2f} ms")
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://localhost:8000/api/v1")
+    parser.add_argument("--pairs", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--in-process-only", action="store_true")
+    args = parser.parse_args()
+
+    pairs = make_pairs(args.pairs)
+    in_process(pairs)
+    if args.in_process_only:
+        return
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+        # Warm rate caches and connections
+        await batch_call(client, pairs[:10])
+
+        single = await single_calls(client, pairs, args.concurrency)
+        batch = await batch_call(client, pairs)
+
+    print(f"    single: {args.pairs} calls {single * 1000:10.1f} ms  "
+          f"({args.pairs / single:8.1f} pairs/s)")
+    print(f"     batch: 1 call     {batch * 1000:10.1f} ms  "
+          f"({args.pairs / batch:8.1f} pairs/s)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
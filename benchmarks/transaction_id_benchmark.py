@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Insert throughput and index size of transaction ID schemes: uuid4 strings in
+VARCHAR(255) (the previous scheme), uuid4 in a native uuid column, and
+UUIDv7 from app.core.ids in a native uuid column.
+
+Each scheme gets its own table with a unique B-tree on the ID in a scratch
+schema. Rows are inserted in batches of ``--batch`` and the script reports
+rows/s, index and table size, and, when the pgstattuple extension is
+installed, leaf density and fragmentation of the index.
+
+Usage:
+    DATABASE_URL=postgresql://... python benchmarks/transaction_id_benchmark.py \
+        --rows 5000000 --batch 1000
+"""
+import argparse
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import column, insert, table, text
+from app.core.database import engine
+from app.core.ids import new_transaction_id
+
+SCHEMA = "id_benchmark"
+
+SCHEMES: Dict[str, tuple] = {
+    "varchar_uuid4": ("VARCHAR(255)", lambda: str(uuid.uuid4())),
+    "uuid_uuid4": ("uuid", lambda: str(uuid.uuid4())),
+    "uuid_uuid7": ("uuid", new_transaction_id),
+}
+
+def run_scheme(connection, name: str, column_type: str, generate: Callable[[], str], args) -> dict:
+    qualified = f"{SCHEMA}.{name}"
+    connection.execute(text(f"""
+        CREATE TABLE {qualified} (
+            id BIGSERIAL PRIMARY KEY,
+            internal_tran_id {column_type} NOT NULL,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """))
+    connection.execute(text(f"CREATE UNIQUE INDEX {name}_tran_id ON {qualified} (internal_tran_id)"))
+
+    # Core insert so each batch is sent as multi-row VALUES, committed per batch
+    statement = insert(table(name, column("internal_tran_id"), schema=SCHEMA))
+    started = time.perf_counter()
+    inserted = 0
+    while inserted < args.rows:
+        count = min(args.batch, args.rows - inserted)
+        connection.execute(statement, [{"internal_tran_id": generate()} for _ in range(count)])
+        inserted += count
+    elapsed = time.perf_counter() - started
+
+    sizes = connection.execute(text(
+        "SELECT pg_relation_size(:index), pg_relation_size(:table)"
+    ), {"index": f"{SCHEMA}.{name}_tran_id", "table": qualified}).one()
+    result = {
+        "rows_per_second": args.rows / elapsed,
+        "index_mb": sizes[0] / 2**20,
+        "table_mb": sizes[1] / 2**20,
+        "leaf_density": None,
+        "fragmentation": None,
+    }
+    if args.pgstattuple:
+        result["leaf_density"], result["fragmentation"] = connection.execute(text(
+            "SELECT avg_leaf_density, leaf_fragmentation FROM pgstatindex(:index)"
+        ), {"index": f"{SCHEMA}.{name}_tran_id"}).one()
+    return result
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch schema")
+    args = parser.parse_args()
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        args.pgstattuple = connection.execute(text(
+            "SELECT count(*) > 0 FROM pg_extension WHERE extname = 'pgstattuple'"
+        )).scalar()
+        try:
+            results = {}
+            for name, (column_type, generate) in SCHEMES.items():
+                results[name] = run_scheme(connection, name, column_type, generate, args)
+                print(f"{name}: {results[name]['rows_per_second']:.0f} rows/s")
+        finally:
+            if not args.keep:
+                connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+
+    print(f"\n{'scheme':<15} {'rows/s':>10} {'index MB':>9} {'table MB':>9} {'density %':>10} {'frag %':>7}")
+    for name, result in results.items():
+        density = f"{result['leaf_density']:.1f}" if result["leaf_density"] is not None else "-"
+        fragmentation = f"{result['fragmentation']:.1f}" if result["fragmentation"] is not None else "-"
+        print(f"{name:<15} {result['rows_per_second']:10.0f} {result['index_mb']:9.1f} "
+              f"{result['table_mb']:9.1f} {density:>10} {fragmentation:>7}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Measures the transactions hot-path queries before and after the indexes from
+alembic revision 0002, on a seeded copy of the table in a scratch schema.
+
+For each query the script prints the EXPLAIN (ANALYZE, BUFFERS) plan once and
+the median / p95 latency over ``--repeat`` runs, first with only the primary
+key, then with the indexes built. The scratch schema is dropped at the end
+unless ``--keep`` is given.
+
+Usage:
+    DATABASE_URL=postgresql://... python benchmarks/transaction_index_benchmark.py \
+        --rows 10000000 --users 100000 --repeat 50
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import text
+from app.core.database import engine
+
+SCHEMA = "index_benchmark"
+
+STATUSES = [
+    "PENDING", "IPN_RECEIVED", "VALIDATED", "PAYOUT_PENDING",
+    "COMPLETED", "FAILED", "VALIDATION_FAILED", "PAYOUT_FAILED"
+]
+
+# Same definitions as alembic/versions/0002_transactions_hot_path_indexes.py
+INDEXES = {
+    "ix_transactions_user_id_created_at_id":
+        "ON {schema}.transactions (user_id, created_at DESC, id DESC)",
+    "ix_transactions_user_id_status":
+        "ON {schema}.transactions (user_id, status)",
+    "ix_transactions_pending_status":
+        "ON {schema}.transactions (status, created_at) "
+        "WHERE status IN ('PENDING', 'IPN_RECEIVED', 'PAYOUT_PENDING')",
+    "ix_transactions_payout_next_check_at":
+        "ON {schema}.transactions (payout_next_check_at, id) WHERE status = 'PAYOUT_PENDING'",
+}
+
+QUERIES = {
+    "history page": (
+        "SELECT id, internal_tran_id, status, created_at FROM {schema}.transactions "
+        "WHERE user_id = :user_id ORDER BY created_at DESC, id DESC LIMIT 20"
+    ),
+    "history next page": (
+        "SELECT id, internal_tran_id, status, created_at FROM {schema}.transactions "
+        "WHERE user_id = :user_id AND (created_at, id) < (now() - interval '30 days', 2147483647) "
+        "ORDER BY created_at DESC, id DESC LIMIT 20"
+    ),
+    "user statistics": (
+        "SELECT status, count(*) FROM {schema}.transactions "
+        "WHERE user_id = :user_id GROUP BY status"
+    ),
+    "pending poll": (
+        "SELECT id, internal_tran_id FROM {schema}.transactions "
+        "WHERE status = 'PENDING' AND created_at < now() - interval '30 minutes' "
+        "ORDER BY created_at LIMIT 100"
+    ),
+    "payout status claim": (
+        "SELECT id FROM {schema}.transactions "
+        "WHERE status = 'PAYOUT_PENDING' AND payout_next_check_at <= now() "
+        "ORDER BY payout_next_check_at, id LIMIT 100"
+    ),
+}
+
+def seed(connection, rows: int, users: int) -> None:
+    connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    connection.execute(text(f"""
+        CREATE TABLE {SCHEMA}.transactions (
+            id BIGSERIAL PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            internal_tran_id VARCHAR(255) NOT NULL,
+            status VARCHAR(32) NOT NULL,
+            requested_foreign_amount NUMERIC(12, 2) NOT NULL,
+            payout_next_check_at TIMESTAMPTZ,
+            created_at TIMESTAMPTZ NOT NULL
+        )
+    """))
+    # Skewed like production: almost everything is terminal, a thin slice is in flight
+    started = time.perf_counter()
+    connection.execute(text(f"""
+        INSERT INTO {SCHEMA}.transactions
+            (user_id, internal_tran_id, status, requested_foreign_amount,
+             payout_next_check_at, created_at)
+        SELECT
+            1 + (random() * (:users - 1))::int,
+            'TXN' || g,
+            s.status,
+            round((random() * 5000)::numeric, 2),
+            CASE WHEN s.status = 'PAYOUT_PENDING'
+                 THEN now() + (random() * 600 - 300) * interval '1 second' END,
+            now() - random() * interval '730 days'
+        FROM generate_series(1, :rows) AS g
+        CROSS JOIN LATERAL (
+            SELECT CASE
+                WHEN r < 0.005 THEN 'PENDING'
+                WHEN r < 0.007 THEN 'IPN_RECEIVED'
+                WHEN r < 0.010 THEN 'PAYOUT_PENDING'
+                WHEN r < 0.030 THEN 'FAILED'
+                WHEN r < 0.035 THEN 'PAYOUT_FAILED'
+                ELSE 'COMPLETED'
+            END AS status
+            FROM (SELECT random() + g * 0 AS r) AS x
+        ) AS s
+    """), {"rows": rows, "users": users})
+    connection.execute(text(f"ANALYZE {SCHEMA}.transactions"))
+    print(f"seeded {rows} rows for {users} users in {time.perf_counter() - started:.1f} s")
+
+def build_indexes(connection) -> None:
+    for name, definition in INDEXES.items():
+        started = time.perf_counter()
+        connection.execute(text(f"CREATE INDEX {name} {definition.format(schema=SCHEMA)}"))
+        size = connection.execute(
+            text("SELECT pg_size_pretty(pg_relation_size(:name))"),
+            {"name": f"{SCHEMA}.{name}"}
+        ).scalar()
+        print(f"built {name} in {time.perf_counter() - started:.1f} s ({size})")
+    connection.execute(text(f"ANALYZE {SCHEMA}.transactions"))
+
+def measure(connection, users: int, repeat: int, label: str) -> Dict[str, List[float]]:
+    rng = random.Random(42)
+    results: Dict[str, List[float]] = {}
+    print(f"\n=== {label} ===")
+    for name, sql in QUERIES.items():
+        statement = text(sql.format(schema=SCHEMA))
+        plan = connection.execute(
+            text(f"EXPLAIN (ANALYZE, BUFFERS) {sql.format(schema=SCHEMA)}"),
+            {"user_id": rng.randint(1, users)}
+        ).scalars().all()
+        print(f"\n-- {name}")
+        for line in plan:
+            print(f"   {line}")
+
+        latencies = []
+        for _ in range(repeat):
+            params = {"user_id": rng.randint(1, users)}
+            started = time.perf_counter()
+            connection.execute(statement, params).fetchall()
+            latencies.append(time.perf_counter() - started)
+        results[name] = latencies
+    return results
+
+def summary(before: Dict[str, List[float]], after: Dict[str, List[float]]) -> None:
+    print(f"\n{'query':<22} {'before p50':>11} {'before p95':>11} {'after p50':>10} {'after p95':>10}")
+    for name in QUERIES:
+        b = sorted(before[name])
+        a = sorted(after[name])
+        p95 = lambda values: values[int(len(values) * 0.95) - 1] * 1000
+        print(f"{name:<22} {statistics.median(b) * 1000:9.2f}ms {p95(b):9.2f}ms "
+              f"{statistics.median(a) * 1000:8.2f}ms {p95(a):8.2f}ms")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch schema")
+    args = parser.parse_args()
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        try:
+            seed(connection, args.rows, args.users)
+            before = measure(connection, args.users, args.repeat, "primary key only")
+            build_indexes(connection)
+            after = measure(connection, args.users, args.repeat, "with hot-path indexes")
+            summary(before, after)
+        finally:
+            if not args.keep:
+                connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+
+if __name__ == "__main__":
+    main()
@@ -34,8 +34,8 @@ case "$1" in
         ;;
     worker)
         wait_for_postgres
-        echo "Starting Celery worker..."
-        exec celery -A app.worker.celery_app worker --loglevel=info
+        echo "Starting payout worker..."
+        exec python -m app.worker
         ;;
     *)
         exec "$@"
@@ -9,6 +9,7 @@ setup(
         "uvicorn>=0.15.0",
         "sqlalchemy>=1.4.0",
         "psycopg2-binary>=2.9.0",
+        "asyncpg>=0.27.0",
         "pydantic>=1.8.0",
         "python-jose[cryptography]>=3.3.0",
         "passlib[bcrypt]>=1.7.4",
@@ -0,0 +1,47 @@
+import asyncio
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.models.admin_config import AdminConfig
+from app.models.system_setting import SystemSetting
+from app.services import admin_config_cache as admin_config_cache_module
+from app.services.admin_config_cache import VERSION_SETTING_KEY, AdminConfigCache
+
+@pytest.mark.asyncio
+async def test_get_async_loads_once_for_concurrent_callers(async_sqlite_session, monkeypatch):
+    async with async_sqlite_session(AdminConfig, SystemSetting) as session:
+        session.add_all([
+            AdminConfig(
+                admin_paypal_email="admin@example.com",
+                admin_paypal_client_id="client-id",
+                admin_paypal_client_secret="client-secret",
+                sslcz_store_id="store",
+                sslcz_store_passwd="passwd",
+                is_active=True
+            ),
+            SystemSetting(setting_key=VERSION_SETTING_KEY, setting_value="1", setting_type="int")
+        ])
+        await session.commit()
+
+        engine = session.bind
+        monkeypatch.setattr(
+            admin_config_cache_module,
+            "AsyncSessionLocal",
+            async_sessionmaker(engine, expire_on_commit=False)
+        )
+        statements = []
+        event.listen(
+            engine.sync_engine,
+            "before_cursor_execute",
+            lambda *args: statements.append(args[2])
+        )
+
+        cache = AdminConfigCache()
+        configs = await asyncio.gather(*(cache.get_async() for _ in range(5)))
+
+        assert {config.admin_paypal_client_id for config in configs} == {"client-id"}
+        # One version check and one config load, shared by every caller
+        assert len(statements) == 2
+
+        await cache.get_async()
+        assert len(statements) == 2
@@ -0,0 +1,98 @@
+import asyncio
+import pytest
+from app.core import cache as cache_module
+from app.core.cache import TTLCache
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.monotonic for expiry tests"""
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    return now
+
+def test_entries_expire(clock):
+    cache: TTLCache[str] = TTLCache(ttl=10)
+    cache.set("a", "x")
+    cache.set("b", "y", ttl=1)
+
+    clock[0] += 5
+    assert cache.get("a") == "x"
+    assert cache.get("b") is None
+
+    clock[0] += 5
+    assert cache.get("a") is None
+
+def test_replace_and_invalidate():
+    cache: TTLCache[int] = TTLCache(ttl=60)
+    cache.set("stale", 0)
+    cache.replace({"a": 1, "b": 2})
+
+    assert cache.get("stale") is None
+    assert (cache.get("a"), cache.get("b")) == (1, 2)
+
+    cache.invalidate("a")
+    assert cache.get("a") is None
+    cache.invalidate()
+    assert cache.get("b") is None
+
+@pytest.mark.asyncio
+async def test_load_is_single_flight():
+    cache: TTLCache[int] = TTLCache(ttl=60)
+    calls = 0
+    release = asyncio.Event()
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        cache.set("key", 42)
+        return 42
+
+    waiters = [asyncio.ensure_future(cache.load("key", loader)) for _ in range(10)]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*waiters) == [42] * 10
+    assert calls == 1
+    assert cache.get("key") == 42
+
+@pytest.mark.asyncio
+async def test_load_failure_reaches_every_caller_and_is_not_kept():
+    cache: TTLCache[int] = TTLCache(ttl=60)
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0)
+        raise RuntimeError("upstream down")
+
+    results = await asyncio.gather(
+        *(cache.load("key", loader) for _ in range(3)), return_exceptions=True
+    )
+    assert calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    # The next miss starts a fresh load
+    with pytest.raises(RuntimeError):
+        await cache.load("key", loader)
+    assert calls == 2
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_the_load():
+    cache: TTLCache[int] = TTLCache(ttl=60)
+    release = asyncio.Event()
+
+    async def loader():
+        await release.wait()
+        return 7
+
+    cancelled = asyncio.ensure_future(cache.load("key", loader))
+    survivor = asyncio.ensure_future(cache.load("key", loader))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    release.set()
+
+    assert await survivor == 7
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
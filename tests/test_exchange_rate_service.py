@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+import httpx
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.models.exchange_rate import ExchangeRate
+from app.services import exchange_rate_service
+from app.services.exchange_rate_service import (
+    ExchangeRateService,
+    ExchangeRateSnapshot,
+    ExchangeRateUnavailableError,
+    UnknownCurrencyError
+)
+
+@pytest.fixture(autouse=True)
+def empty_caches(monkeypatch):
+    monkeypatch.setattr(exchange_rate_service, "_currency_catalog", None)
+    exchange_rate_service._rate_cache.invalidate()
+    exchange_rate_service._negative_cache.invalidate()
+    yield
+    exchange_rate_service._rate_cache.invalidate()
+    exchange_rate_service._negative_cache.invalidate()
+
+@pytest.fixture
+def failing_loader(monkeypatch):
+    """Replace the per-currency load with one raising the given error; returns the call log"""
+    calls = []
+
+    def install(error: Exception):
+        async def load(self, currency_code):
+            calls.append(currency_code)
+            raise error
+
+        monkeypatch.setattr(ExchangeRateService, "_load_exchange_rate", load)
+        return calls
+
+    return install
+
+@pytest.mark.asyncio
+async def test_provider_failure_is_typed_and_negative_cached(failing_loader):
+    calls = failing_loader(httpx.ConnectError("connection refused"))
+    service = ExchangeRateService(db=None)
+
+    with pytest.raises(ExchangeRateUnavailableError):
+        await service.get_exchange_rate("USD")
+    # Served from the negative cache with the same type, without another load
+    with pytest.raises(ExchangeRateUnavailableError, match="connection refused"):
+        await service.get_exchange_rate("USD")
+    assert calls == ["USD"]
+
+@pytest.mark.asyncio
+async def test_unknown_currency_stays_unknown_in_negative_cache(failing_loader):
+    calls = failing_loader(UnknownCurrencyError("Currency XYZ not found"))
+    service = ExchangeRateService(db=None)
+
+    for _ in range(2):
+        with pytest.raises(UnknownCurrencyError):
+            await service.get_exchange_rate("XYZ")
+    assert calls == ["XYZ"]
+
+@pytest.mark.asyncio
+async def test_malformed_code_is_rejected_without_loading(failing_loader):
+    calls = failing_loader(AssertionError("must not load"))
+
+    with pytest.raises(UnknownCurrencyError):
+        await ExchangeRateService(db=None).get_exchange_rate("usd1")
+    assert calls == []
+
+@pytest.mark.asyncio
+async def test_get_exchange_rates_reads_misses_in_one_query(async_sqlite_session, monkeypatch):
+    now = datetime.now(timezone.utc)
+    async with async_sqlite_session(ExchangeRate) as session:
+        session.add_all([
+            ExchangeRate(
+                currency_code=currency_code,
+                rate_to_bdt=rate_to_bdt,
+                last_updated=now,
+                expires_at=now + timedelta(seconds=expires_in)
+            )
+            for currency_code, rate_to_bdt, expires_in in [
+                ("USD", Decimal("110.00000000"), 3600),
+                ("EUR", Decimal("120.00000000"), 3600),
+                ("GBP", Decimal("140.00000000"), -60)
+            ]
+        ])
+        await session.commit()
+
+        loaded = []
+
+        async def load(self, currency_code):
+            loaded.append(currency_code)
+            return ExchangeRateSnapshot(currency_code, Decimal("1.5"), now, now + timedelta(hours=1))
+
+        monkeypatch.setattr(ExchangeRateService, "_load_exchange_rate", load)
+        statements = []
+        event.listen(
+            session.bind.sync_engine,
+            "before_cursor_execute",
+            lambda *args: statements.append(args[2])
+        )
+
+        rates = await ExchangeRateService(session).get_exchange_rates(
+            ["USD", "EUR", "USD", "GBP", "JPY"]
+        )
+
+        assert list(rates) == ["USD", "EUR", "GBP", "JPY"]
+        assert rates["USD"].rate_to_bdt == Decimal("110")
+        assert rates["EUR"].rate_to_bdt == Decimal("120")
+        # Expired and unknown rows fall through to the per-currency path
+        assert loaded == ["GBP", "JPY"]
+        assert len(statements) == 1
+
+@pytest.mark.asyncio
+async def test_shared_load_runs_on_its_own_session(async_sqlite_session, monkeypatch):
+    now = datetime.now(timezone.utc)
+    async with async_sqlite_session(ExchangeRate) as session:
+        session.add(ExchangeRate(
+            currency_code="USD",
+            rate_to_bdt=Decimal("110.00000000"),
+            last_updated=now,
+            expires_at=now + timedelta(hours=1)
+        ))
+        await session.commit()
+        monkeypatch.setattr(
+            exchange_rate_service,
+            "AsyncSessionLocal",
+            async_sessionmaker(session.bind, expire_on_commit=False)
+        )
+
+        # No request session at all: the loader must not touch it
+        rate = await ExchangeRateService(db=None).get_exchange_rate("USD")
+
+        assert rate.rate_to_bdt == Decimal("110")
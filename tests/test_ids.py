@@ -0,0 +1,60 @@
+import uuid
+from datetime import datetime, timezone
+import pytest
+from app.core import ids
+from app.core.ids import new_transaction_id, parse_transaction_id, transaction_id_timestamp, uuid7
+
+def test_uuid7_layout():
+    value = uuid7()
+
+    assert value.version == 7
+    assert value.variant == uuid.RFC_4122
+    assert abs((value.int >> 80) - ids.time.time_ns() // 1_000_000) < 1000
+
+def test_uuid7_is_strictly_increasing():
+    values = [uuid7() for _ in range(10_000)]
+
+    assert values == sorted(values)
+    assert len(set(values)) == len(values)
+    # The text form sorts the same way, which archive lookups rely on
+    texts = [str(value) for value in values]
+    assert texts == sorted(texts)
+
+def test_uuid7_counter_overflow_borrows_the_next_millisecond(monkeypatch):
+    frozen_ns = 1_760_000_000_000 * 1_000_000
+    monkeypatch.setattr(ids.time, "time_ns", lambda: frozen_ns)
+    monkeypatch.setattr(ids, "_last_ms", 0)
+
+    values = [uuid7() for _ in range(5000)]
+
+    assert values == sorted(values)
+    assert values[0].int >> 80 == frozen_ns // 1_000_000
+    assert values[-1].int >> 80 > frozen_ns // 1_000_000
+
+def test_new_transaction_id_is_canonical_text():
+    transaction_id = new_transaction_id()
+
+    assert transaction_id == str(uuid.UUID(transaction_id))
+    assert transaction_id[14] == "7"
+
+@pytest.mark.parametrize("value", [
+    "0190D6C2-5A4E-7A1B-8C3D-4E5F60718293",
+    "{0190d6c2-5a4e-7a1b-8c3d-4e5f60718293}",
+    "0190d6c25a4e7a1b8c3d4e5f60718293",
+    uuid.UUID("0190d6c2-5a4e-7a1b-8c3d-4e5f60718293")
+])
+def test_parse_transaction_id_canonicalizes(value):
+    assert parse_transaction_id(value) == "0190d6c2-5a4e-7a1b-8c3d-4e5f60718293"
+
+@pytest.mark.parametrize("value", ["", "TXN-123", "0190d6c2-5a4e-7a1b-8c3d", None])
+def test_parse_transaction_id_rejects_non_uuids(value):
+    assert parse_transaction_id(value) is None
+
+def test_transaction_id_timestamp_of_uuid7():
+    before = datetime.now(timezone.utc).replace(microsecond=0)
+    created_at = transaction_id_timestamp(str(uuid7()))
+
+    assert before <= created_at <= datetime.now(timezone.utc)
+
+def test_transaction_id_timestamp_of_uuid4_is_none():
+    assert transaction_id_timestamp(str(uuid.uuid4())) is None
@@ -0,0 +1,72 @@
+import os
+from datetime import datetime, timedelta, timezone
+import uuid
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, text
+
+# Each test drops and recreates the public schema of this database
+MIGRATIONS_DATABASE_URL = os.environ.get("MIGRATIONS_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(
+    not MIGRATIONS_DATABASE_URL,
+    reason="set MIGRATIONS_DATABASE_URL to a disposable Postgres database"
+)
+
+@pytest.fixture
+def migrate(monkeypatch):
+    """alembic upgrade against an empty MIGRATIONS_DATABASE_URL; yields (upgrade, engine)"""
+    monkeypatch.setenv("DATABASE_URL", MIGRATIONS_DATABASE_URL)
+    engine = create_engine(MIGRATIONS_DATABASE_URL)
+    with engine.begin() as connection:
+        connection.execute(text("DROP SCHEMA public CASCADE"))
+        connection.execute(text("CREATE SCHEMA public"))
+    config = Config(os.path.join(os.path.dirname(os.path.dirname(__file__)), "alembic.ini"))
+
+    yield lambda revision: command.upgrade(config, revision), engine
+    engine.dispose()
+
+def test_upgrade_head_on_an_empty_database(migrate):
+    upgrade, engine = migrate
+
+    upgrade("head")
+
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT version_num FROM alembic_version")).scalar() == "0008"
+        assert connection.execute(text(
+            "SELECT count(*) FROM information_schema.columns "
+            "WHERE table_name = 'payout_jobs' AND column_name = 'sender_batch_id'"
+        )).scalar() == 1
+
+def test_partitioning_keeps_existing_transactions(migrate):
+    upgrade, engine = migrate
+    upgrade("0004")
+    now = datetime.now(timezone.utc)
+    with engine.begin() as connection:
+        user_id = connection.execute(text(
+            "INSERT INTO users (username, email, password_hash, role) "
+            "VALUES ('user', 'user@example.com', 'x', 'USER') RETURNING id"
+        )).scalar()
+        for created_at in (now - timedelta(days=400), now):
+            connection.execute(
+                text(
+                    "INSERT INTO transactions (user_id, internal_tran_id, status, "
+                    "requested_foreign_currency, requested_foreign_amount, exchange_rate_bdt, "
+                    "calculated_bdt_amount, recipient_paypal_email, created_at) "
+                    "VALUES (:user_id, :internal_tran_id, 'COMPLETED', 'USD', 10, 110, 1100, "
+                    "'recipient@example.com', :created_at)"
+                ),
+                {"user_id": user_id, "internal_tran_id": str(uuid.uuid4()), "created_at": created_at}
+            )
+
+    upgrade("head")
+
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT count(*) FROM transactions")).scalar() == 2
+        # The old row stays where it was, in the attached legacy partition
+        assert connection.execute(text("SELECT count(*) FROM ONLY transactions_legacy")).scalar() == 1
+        assert connection.execute(text(
+            "SELECT pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = 'transactions_legacy'::regclass AND contype = 'p'"
+        )).scalar() == "PRIMARY KEY (id, created_at)"
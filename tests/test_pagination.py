@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from fastapi.testclient import TestClient
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, keyset_paginate
+from app.models.user import User
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 10, 18, 12, 30, 15, 123456, tzinfo=timezone.utc)
+
+    cursor = encode_cursor(created_at, 42)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, 42)
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", encode_cursor(datetime(2026, 1, 1), 1)[:-3]])
+def test_decode_cursor_rejects_garbage(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
+
+def test_keyset_paginate_walks_every_row_once(sqlite_session):
+    session = sqlite_session(User)
+    start = datetime(2026, 10, 1)
+    # Pairs of rows share a created_at, so the id breaks the tie
+    session.add_all([
+        User(
+            id=index + 1,
+            username=f"user{index}",
+            email=f"user{index}@example.com",
+            password_hash="x",
+            created_at=start + timedelta(minutes=index // 2)
+        )
+        for index in range(7)
+    ])
+    session.commit()
+
+    seen = []
+    cursor = None
+    while True:
+        page, cursor = keyset_paginate(session.query(User), User, cursor, limit=3)
+        seen.extend(user.id for user in page)
+        if cursor is None:
+            break
+
+    assert seen == [7, 6, 5, 4, 3, 2, 1]
+
+def test_next_cursor_header_is_exposed_to_browsers():
+    from app.main import app
+
+    response = TestClient(app).get(
+        "/api/v1/users/", headers={"Origin": "http://localhost:3000"}
+    )
+
+    assert NEXT_CURSOR_HEADER in response.headers["access-control-expose-headers"]
@@ -0,0 +1,47 @@
+from datetime import date
+from app.core import partitions
+from app.core.partitions import add_months, ensure_partitions, monthly_partition_statements
+
+class RecordingConnection:
+    """Answers the pg_partitioned_table check and records the DDL"""
+
+    def __init__(self, partitioned):
+        self.partitioned = partitioned
+        self.statements = []
+
+    def execute(self, statement, parameters=None):
+        if parameters and "table_name" in parameters:
+            return FakeResult(parameters["table_name"] in self.partitioned)
+        self.statements.append(str(statement))
+        return FakeResult(None)
+
+class FakeResult:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar(self):
+        return self.value
+
+def test_add_months_crosses_years():
+    assert add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+
+def test_monthly_partition_statements():
+    statements = monthly_partition_statements("transactions", 1, today=date(2026, 12, 15))
+
+    assert statements == [
+        "CREATE TABLE IF NOT EXISTS transactions_default PARTITION OF transactions DEFAULT",
+        "CREATE TABLE IF NOT EXISTS transactions_y2026m12 PARTITION OF transactions "
+        "FOR VALUES FROM ('2026-12-01') TO ('2027-01-01')",
+        "CREATE TABLE IF NOT EXISTS transactions_y2027m01 PARTITION OF transactions "
+        "FOR VALUES FROM ('2027-01-01') TO ('2027-02-01')"
+    ]
+
+def test_ensure_partitions_skips_unpartitioned_tables(monkeypatch):
+    monkeypatch.setattr(partitions, "MONTHLY_PARTITIONED_TABLES", ["exchange_rate_history", "transactions"])
+    connection = RecordingConnection(partitioned={"exchange_rate_history"})
+
+    ensure_partitions(connection)
+
+    assert connection.statements
+    assert all("exchange_rate_history" in statement for statement in connection.statements)
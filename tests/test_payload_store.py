@@ -0,0 +1,79 @@
+import hashlib
+import pytest
+from sqlalchemy import select
+from app.models.transaction_payload import PayloadBlob, PayloadKind, TransactionPayload
+from app.services import payload_store
+from app.services.payload_store import (
+    CODEC_RAW,
+    CODEC_ZLIB,
+    CODEC_ZSTD,
+    PayloadStore,
+    decode_payload,
+    encode_payload
+)
+
+IPN_PAYLOAD = {
+    "tran_id": "0190d6c2-5a4e-7a1b-8c3d-4e5f60718293",
+    "status": "VALID",
+    "amount": "1122.00",
+    "card_type": "VISA-Dutch Bangla",
+    "risk_title": "Safe",
+    "value_a": None,
+    "extra": {"notes": ["x" * 40] * 10}
+}
+
+def test_digest_is_sha256_of_canonical_json():
+    digest, _, _, raw_size = encode_payload({"b": 1, "a": [1, 2]})
+
+    canonical = b'{"a":[1,2],"b":1}'
+    assert digest == hashlib.sha256(canonical).hexdigest()
+    assert raw_size == len(canonical)
+
+def test_digest_ignores_key_order():
+    reordered = dict(reversed(list(IPN_PAYLOAD.items())))
+    assert encode_payload(reordered)[0] == encode_payload(IPN_PAYLOAD)[0]
+
+@pytest.mark.parametrize("codec", [CODEC_RAW, CODEC_ZLIB, CODEC_ZSTD])
+def test_round_trip(codec, monkeypatch):
+    if codec == CODEC_ZSTD:
+        pytest.importorskip("zstandard")
+    monkeypatch.setattr(payload_store.settings, "PAYLOAD_COMPRESSION", codec)
+
+    digest, written_codec, data, _ = encode_payload(IPN_PAYLOAD)
+
+    assert written_codec == codec
+    assert decode_payload(written_codec, data) == IPN_PAYLOAD
+    # The digest names the content, not its encoding
+    assert digest == encode_payload(IPN_PAYLOAD)[0]
+
+def test_small_payload_is_stored_raw(monkeypatch):
+    monkeypatch.setattr(payload_store.settings, "PAYLOAD_COMPRESSION", CODEC_ZLIB)
+
+    _, codec, data, raw_size = encode_payload({"a": 1})
+
+    assert codec == CODEC_RAW
+    assert data == b'{"a":1}'
+    assert raw_size == len(data)
+
+@pytest.mark.asyncio
+async def test_save_and_load_round_trip(async_sqlite_session, monkeypatch):
+    monkeypatch.setattr(payload_store.settings, "PAYLOAD_COMPRESSION", CODEC_ZLIB)
+    payout_response = {"batch_header": {"payout_batch_id": "5UXD2E8A7EBQJ"}, "items": []}
+    async with async_sqlite_session(PayloadBlob, TransactionPayload) as session:
+        store = PayloadStore(session)
+        await store.save(1, PayloadKind.SSLCZ_IPN, IPN_PAYLOAD)
+        # One batch response shared by two transactions
+        await store.save_many([
+            (1, PayloadKind.PAYPAL_PAYOUT, payout_response),
+            (2, PayloadKind.PAYPAL_PAYOUT, payout_response)
+        ])
+        await session.commit()
+
+        assert await store.load(1, PayloadKind.SSLCZ_IPN) == IPN_PAYLOAD
+        assert await store.load(1, PayloadKind.SSLCZ_VALIDATION) is None
+        assert await store.load_all(1) == {
+            PayloadKind.SSLCZ_IPN: IPN_PAYLOAD,
+            PayloadKind.PAYPAL_PAYOUT: payout_response
+        }
+        assert await store.load_all(2) == {PayloadKind.PAYPAL_PAYOUT: payout_response}
+        assert len((await session.execute(select(PayloadBlob.digest))).all()) == 2
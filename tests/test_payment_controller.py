@@ -0,0 +1,79 @@
+from decimal import Decimal
+import pytest
+from app.controllers.payment_controller import PaymentController
+from app.models.transaction import Transaction, TransactionStatus
+from app.schemas.transaction import PaymentCalculation, PaymentCalculationBatch
+
+TRAN_ID = "0190d6c2-5a4e-7a1b-8c3d-4e5f60718293"
+
+class FakeRequest:
+    async def form(self):
+        return {"tran_id": TRAN_ID, "val_id": "VAL-1"}
+
+class FakeSession:
+    def __init__(self):
+        self.commits = 0
+
+    async def commit(self):
+        self.commits += 1
+
+@pytest.fixture
+def success_callback(monkeypatch):
+    """handle_success on a validated payment for a transaction in the given status"""
+    async def call(transaction_status: TransactionStatus):
+        db = FakeSession()
+        controller = PaymentController(db)
+        transaction = Transaction(
+            id=42, internal_tran_id=TRAN_ID, status=transaction_status,
+            calculated_bdt_amount=Decimal("1122.00")
+        )
+        enqueued, saved = [], []
+
+        async def get_transaction(tran_id):
+            return transaction
+
+        async def validate_transaction(val_id):
+            return {"status": "VALID", "tran_id": TRAN_ID, "amount": "1122.00", "currency": "BDT"}
+
+        async def save(*args):
+            saved.append(args)
+
+        monkeypatch.setattr(controller.payment_service, "get_transaction", get_transaction)
+        monkeypatch.setattr(controller.sslcommerz_service, "validate_transaction", validate_transaction)
+        monkeypatch.setattr(controller.payload_store, "save", save)
+        monkeypatch.setattr(controller.payout_service, "enqueue", enqueued.append)
+
+        response = await controller.handle_success(FakeRequest())
+        return response, transaction, enqueued, saved, db
+
+    return call
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("transaction_status", [TransactionStatus.PENDING, TransactionStatus.IPN_RECEIVED])
+async def test_success_completes_and_queues_the_payout(success_callback, transaction_status):
+    response, transaction, enqueued, saved, db = await success_callback(transaction_status)
+
+    assert response["status"] == "success"
+    assert transaction.status == TransactionStatus.COMPLETED
+    assert enqueued == [transaction]
+    assert db.commits == 1
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("transaction_status", [
+    TransactionStatus.COMPLETED,
+    TransactionStatus.PAYOUT_PENDING,
+    TransactionStatus.PAYOUT_COMPLETED
+])
+async def test_repeated_success_callback_writes_nothing(success_callback, transaction_status):
+    response, transaction, enqueued, saved, db = await success_callback(transaction_status)
+
+    assert response["status"] == "success"
+    assert transaction.status == transaction_status
+    assert enqueued == [] and saved == []
+    assert db.commits == 0
+
+def test_calculation_currency_code_is_upper_cased():
+    batch = PaymentCalculationBatch(items=[{"currency_code": "usd", "amount": "10"}])
+
+    assert PaymentCalculation(currency_code="eur", amount=Decimal("1")).currency_code == "EUR"
+    assert batch.items[0].currency_code == "USD"
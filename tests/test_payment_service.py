@@ -0,0 +1,26 @@
+from decimal import Decimal
+from app.services.payment_service import calculate_price, calculate_prices
+
+def test_calculate_prices_matches_calculate_price_in_order():
+    pairs = [
+        (Decimal("10.0000"), Decimal("110.00000000")),
+        (Decimal("0.0100"), Decimal("0.00917431")),
+        (Decimal("99999999.9999"), Decimal("1234567.12345678"))
+    ]
+
+    prices = calculate_prices(pairs)
+
+    assert prices == [
+        tuple(calculate_price(amount, rate).values()) for amount, rate in pairs
+    ]
+    assert prices[0] == (Decimal("27.50"), Decimal("1127.50"))
+
+def test_calculate_prices_rounds_half_up_to_the_paisa():
+    # 1 x 0.2 = 0.20 BDT; the 2.5% fee is 0.005 and rounds up
+    service_fee, total = calculate_prices([(Decimal("1"), Decimal("0.2"))])[0]
+
+    assert service_fee == Decimal("0.01")
+    assert total == Decimal("0.21")
+
+def test_calculate_prices_empty():
+    assert calculate_prices([]) == []
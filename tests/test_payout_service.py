@@ -0,0 +1,294 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+import httpx
+import pytest
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, insert, select
+from app.models.payout_job import PayoutJob, PayoutJobStatus
+from app.models.transaction import Transaction, TransactionStatus
+from app.services import payout_service
+from app.services.payout_service import PayoutService, payout_item_transition
+
+# The transactions columns the status poller writes. SQLite cannot create the
+# real table (serial id inside a composite key, native uuid).
+transactions_table = Table(
+    "transactions",
+    MetaData(),
+    Column("id", Integer, primary_key=True, autoincrement=False),
+    Column("created_at", DateTime(timezone=True), primary_key=True),
+    Column("status", String(20), nullable=False),
+    Column("paypal_payout_status", String(50)),
+    Column("payout_next_check_at", DateTime(timezone=True)),
+    Column("payout_check_count", Integer, nullable=False),
+    Column("updated_at", DateTime(timezone=True))
+)
+
+def make_transaction(**overrides) -> Transaction:
+    values = dict(
+        id=42,
+        user_id=1,
+        internal_tran_id="0190d6c2-5a4e-7a1b-8c3d-4e5f60718293",
+        status=TransactionStatus.COMPLETED,
+        requested_foreign_currency="USD",
+        requested_foreign_amount=Decimal("10.0000"),
+        exchange_rate_bdt=Decimal("110.00000000"),
+        calculated_bdt_amount=Decimal("1122.00"),
+        recipient_paypal_email="recipient@example.com"
+    )
+    values.update(overrides)
+    return Transaction(**values)
+
+def test_enqueue_sets_transaction_id(sqlite_session):
+    session = sqlite_session(PayoutJob)
+
+    job = PayoutService(session).enqueue(make_transaction())
+    session.flush()
+
+    stored = session.get(PayoutJob, job.id)
+    assert stored.transaction_id == 42
+    assert stored.status == PayoutJobStatus.PENDING
+
+@pytest.mark.asyncio
+async def test_apply_status_checks_updates_by_full_primary_key(async_sqlite_session):
+    created_at = datetime(2026, 9, 30, 23, 59, tzinfo=timezone.utc)
+    async with async_sqlite_session(transactions_table) as session:
+        await session.execute(insert(transactions_table), [
+            {"id": 1, "created_at": created_at, "status": "PAYOUT_PENDING", "payout_check_count": 0},
+            {"id": 2, "created_at": created_at, "status": "PAYOUT_PENDING", "payout_check_count": 3}
+        ])
+        await session.commit()
+
+        rows = [
+            SimpleNamespace(
+                id=1, created_at=created_at, internal_tran_id="a",
+                paypal_payout_tran_id="BATCH", payout_check_count=0
+            ),
+            SimpleNamespace(
+                id=2, created_at=created_at, internal_tran_id="b",
+                paypal_payout_tran_id="BATCH", payout_check_count=3
+            )
+        ]
+        finished = await PayoutService(session).apply_status_checks(rows, {
+            "BATCH": {
+                "a": {"transaction_status": "SUCCESS"},
+                "b": {"transaction_status": "PENDING"}
+            }
+        })
+
+        assert finished == {
+            TransactionStatus.PAYOUT_COMPLETED: 1,
+            TransactionStatus.PAYOUT_FAILED: 0
+        }
+        result = await session.execute(
+            select(
+                transactions_table.c.id,
+                transactions_table.c.status,
+                transactions_table.c.payout_check_count,
+                transactions_table.c.payout_next_check_at
+            ).order_by(transactions_table.c.id)
+        )
+        completed, rescheduled = result.all()
+        assert completed.status == "PAYOUT_COMPLETED"
+        assert completed.payout_next_check_at is None
+        assert rescheduled.status == "PAYOUT_PENDING"
+        assert rescheduled.payout_check_count == 4
+        assert rescheduled.payout_next_check_at is not None
+
+def test_sender_batch_id_single_transaction_uses_its_id():
+    transaction = make_transaction()
+    assert PayoutService._sender_batch_id([transaction]) == transaction.internal_tran_id
+
+def test_sender_batch_id_is_order_independent():
+    first = make_transaction(internal_tran_id="0190d6c2-5a4e-7a1b-8c3d-4e5f60718293")
+    second = make_transaction(internal_tran_id="0190d6c2-5a4f-7c2d-9e4f-506172839405")
+
+    sender_batch_id = PayoutService._sender_batch_id([first, second])
+    assert sender_batch_id == PayoutService._sender_batch_id([second, first])
+    assert sender_batch_id.startswith("batch-")
+    assert len(sender_batch_id) <= 64
+
+def paypal_error(status_code: int, body) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://api-m.sandbox.paypal.com/v1/payments/payouts")
+    response = httpx.Response(status_code, json=body, request=request)
+    return httpx.HTTPStatusError("PayPal error", request=request, response=response)
+
+def test_rejected_items_from_validation_details():
+    error = paypal_error(400, {
+        "name": "VALIDATION_ERROR",
+        "details": [
+            {"field": "items[2].receiver", "issue": "Receiver is invalid"},
+            {"field": "items[0].amount.value", "issue": "Amount is invalid"},
+            {"field": "items[9].receiver", "issue": "Out of range"},
+            {"field": "sender_batch_header.email_subject", "issue": "Too long"}
+        ]
+    })
+    assert PayoutService._rejected_items(error, 3) == {0, 2}
+
+@pytest.mark.parametrize("error", [
+    paypal_error(429, {"details": [{"field": "items[0].receiver"}]}),
+    paypal_error(503, {"details": [{"field": "items[0].receiver"}]}),
+    paypal_error(422, {"name": "INSUFFICIENT_FUNDS"}),
+    paypal_error(400, ["not", "an", "object"]),
+    httpx.ConnectError("connection refused")
+])
+def test_rejected_items_empty_for_batch_wide_errors(error):
+    assert PayoutService._rejected_items(error, 3) == set()
+
+@pytest.mark.parametrize("item_status, expected", [
+    ("SUCCESS", TransactionStatus.PAYOUT_COMPLETED),
+    ("RETURNED", TransactionStatus.PAYOUT_FAILED),
+    ("BLOCKED", TransactionStatus.PAYOUT_FAILED),
+    ("UNCLAIMED", None),
+    ("PENDING", None),
+    (None, None)
+])
+def test_payout_item_transition(item_status, expected):
+    assert payout_item_transition(item_status) == expected
+
+def test_status_check_delay_backs_off_to_the_cap(monkeypatch):
+    monkeypatch.setattr(payout_service.random, "uniform", lambda low, high: high)
+    monkeypatch.setattr(payout_service.settings, "PAYPAL_WEBHOOK_ID", None)
+    monkeypatch.setattr(payout_service.settings, "PAYOUT_STATUS_CHECK_BASE_SECONDS", 60.0)
+    monkeypatch.setattr(payout_service.settings, "PAYOUT_STATUS_CHECK_MAX_SECONDS", 600.0)
+
+    delays = [PayoutService._status_check_delay(count) for count in range(7)]
+
+    assert delays == [60.0, 60.0, 120.0, 240.0, 480.0, 600.0, 600.0]
+
+def test_status_check_delay_with_webhooks_only_reconciles(monkeypatch):
+    monkeypatch.setattr(payout_service.random, "uniform", lambda low, high: high)
+    monkeypatch.setattr(payout_service.settings, "PAYPAL_WEBHOOK_ID", "WH-1")
+    monkeypatch.setattr(payout_service.settings, "PAYOUT_STATUS_CHECK_FALLBACK_SECONDS", 3600.0)
+    monkeypatch.setattr(payout_service.settings, "PAYOUT_STATUS_CHECK_MAX_SECONDS", 600.0)
+
+    assert PayoutService._status_check_delay(0) == 3600.0
+    assert PayoutService._status_check_delay(5) == 3600.0
+
+def test_backoff_seconds_is_capped(monkeypatch):
+    monkeypatch.setattr(payout_service.random, "uniform", lambda low, high: high)
+    monkeypatch.setattr(payout_service.settings, "PAYOUT_JOB_BACKOFF_BASE_SECONDS", 30.0)
+    monkeypatch.setattr(payout_service.settings, "PAYOUT_JOB_BACKOFF_MAX_SECONDS", 200.0)
+
+    assert [PayoutService._backoff_seconds(attempts) for attempts in range(1, 6)] == [
+        30.0, 60.0, 120.0, 200.0, 200.0
+    ]
+
+@pytest.mark.parametrize("error, attempts, expected", [
+    (httpx.ConnectError("connection refused"), 1, PayoutJobStatus.PENDING),
+    (paypal_error(429, {"name": "RATE_LIMIT_REACHED"}), 1, PayoutJobStatus.PENDING),
+    (paypal_error(500, {"name": "INTERNAL_SERVICE_ERROR"}), 1, PayoutJobStatus.PENDING),
+    (paypal_error(422, {"name": "INSUFFICIENT_FUNDS"}), 1, PayoutJobStatus.FAILED),
+    (httpx.ConnectError("connection refused"), 8, PayoutJobStatus.FAILED)
+])
+def test_record_failure_retries_until_permanent_or_exhausted(error, attempts, expected, monkeypatch):
+    monkeypatch.setattr(payout_service.settings, "PAYOUT_JOB_MAX_ATTEMPTS", 8)
+    job = PayoutJob(status=PayoutJobStatus.IN_PROGRESS, attempts=attempts)
+    transaction = make_transaction()
+    next_attempt_at = datetime(2026, 10, 18, 12, 5, tzinfo=timezone.utc)
+
+    PayoutService(db=None)._record_failure(job, transaction, error, next_attempt_at)
+
+    assert job.status == expected
+    assert job.locked_until is None
+    assert job.last_error == str(error)
+    if expected == PayoutJobStatus.PENDING:
+        assert job.next_attempt_at == next_attempt_at
+        assert transaction.status == TransactionStatus.COMPLETED
+    else:
+        assert transaction.status == TransactionStatus.PAYOUT_FAILED
+
+DUPLICATE_BATCH_ERROR = paypal_error(400, {
+    "name": "USER_BUSINESS_ERROR",
+    "details": [{
+        "field": "SENDER_BATCH_ID",
+        "location": "body",
+        "issue": "Batch with given sender_batch_id already exists",
+        "link": [{
+            "href": "https://api-m.sandbox.paypal.com/v1/payments/payouts/5UXD2E8A7EBQJ",
+            "rel": "self",
+            "method": "GET"
+        }]
+    }]
+})
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+class FakeSession:
+    """Just enough AsyncSession for process_jobs on already loaded rows"""
+    def __init__(self, rows):
+        self.rows = rows
+        self.commits = 0
+
+    async def execute(self, statement):
+        return FakeResult(self.rows)
+
+    async def commit(self):
+        self.commits += 1
+
+@pytest.mark.asyncio
+async def test_resent_batch_records_the_existing_payout(monkeypatch):
+    job = PayoutJob(
+        id=7, transaction_id=42, status=PayoutJobStatus.IN_PROGRESS, attempts=2,
+        sender_batch_id="0190d6c2-5a4e-7a1b-8c3d-4e5f60718293"
+    )
+    transaction = make_transaction()
+    service = PayoutService(FakeSession([(job, transaction)]))
+    fetched = []
+
+    async def create_batch_payout(**kwargs):
+        raise DUPLICATE_BATCH_ERROR
+
+    async def get_payout_details(payout_batch_id):
+        fetched.append(payout_batch_id)
+        return {"batch_header": {
+            "payout_batch_id": payout_batch_id,
+            "sender_batch_header": {"sender_batch_id": job.sender_batch_id}
+        }}
+
+    saved = []
+
+    class FakePayloadStore:
+        def __init__(self, db):
+            pass
+
+        async def save_many(self, payloads):
+            saved.extend(payloads)
+
+    monkeypatch.setattr(service.paypal_service, "create_batch_payout", create_batch_payout)
+    monkeypatch.setattr(service.paypal_service, "get_payout_details", get_payout_details)
+    monkeypatch.setattr(payout_service, "PayloadStore", FakePayloadStore)
+
+    await service.process_jobs([7])
+
+    assert fetched == ["5UXD2E8A7EBQJ"]
+    assert job.status == PayoutJobStatus.SUCCEEDED
+    assert transaction.status == TransactionStatus.PAYOUT_PENDING
+    assert transaction.paypal_payout_tran_id == "5UXD2E8A7EBQJ"
+    assert [payload[0] for payload in saved] == [42]
+
+@pytest.mark.asyncio
+async def test_existing_batch_must_match_the_sender_batch_id(monkeypatch):
+    service = PayoutService(db=None)
+
+    async def get_payout_details(payout_batch_id):
+        return {"batch_header": {
+            "payout_batch_id": payout_batch_id,
+            "sender_batch_header": {"sender_batch_id": "someone-elses-batch"}
+        }}
+
+    monkeypatch.setattr(service.paypal_service, "get_payout_details", get_payout_details)
+
+    assert await service._existing_batch("our-batch", DUPLICATE_BATCH_ERROR) is None
+    assert await service._existing_batch("our-batch", paypal_error(422, {"name": "INSUFFICIENT_FUNDS"})) is None
+
+def test_duplicate_batch_error_is_not_permanent():
+    assert not PayoutService._is_permanent(DUPLICATE_BATCH_ERROR)
+    assert PayoutService._duplicate_batch_id(DUPLICATE_BATCH_ERROR) == "5UXD2E8A7EBQJ"
+    assert PayoutService._duplicate_batch_id(paypal_error(400, {"details": [
+        {"field": "sender_batch_header.sender_batch_id", "issue": "Exceeds maximum length"}
+    ]})) is None
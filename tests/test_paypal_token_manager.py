@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.models.oauth_token import OAuthToken
+from app.services import paypal_token_manager as paypal_token_manager_module
+from app.services.paypal_token_manager import PROVIDER, PayPalTokenManager
+
+@pytest.fixture
+def token_store(async_sqlite_session, monkeypatch):
+    """oauth_tokens on SQLite, seeded with the given (client_id, token, expires_in) rows"""
+    async def seed(session, *tokens):
+        monkeypatch.setattr(
+            paypal_token_manager_module,
+            "AsyncSessionLocal",
+            async_sessionmaker(session.bind, expire_on_commit=False)
+        )
+        now = datetime.now(timezone.utc)
+        session.add_all([
+            OAuthToken(
+                provider=PROVIDER,
+                client_id=client_id,
+                access_token=access_token,
+                expires_at=now + timedelta(seconds=expires_in)
+            )
+            for client_id, access_token, expires_in in tokens
+        ])
+        await session.commit()
+
+    return seed
+
+@pytest.mark.asyncio
+async def test_load_persisted_adopts_shared_token(async_sqlite_session, token_store):
+    async with async_sqlite_session(OAuthToken) as session:
+        await token_store(session, ("client-id", "shared-token", 3600))
+
+        token = await PayPalTokenManager()._load_persisted("client-id")
+
+        assert token.access_token == "shared-token"
+
+@pytest.mark.asyncio
+async def test_load_persisted_skips_expiring_and_rejected_tokens(async_sqlite_session, token_store):
+    async with async_sqlite_session(OAuthToken) as session:
+        await token_store(
+            session,
+            ("expiring-client", "expiring-token", 60),
+            ("rejected-client", "rejected-token", 3600)
+        )
+        manager = PayPalTokenManager()
+        manager._rejected["rejected-client"] = "rejected-token"
+
+        assert await manager._load_persisted("expiring-client") is None
+        assert await manager._load_persisted("rejected-client") is None
+        assert await manager._load_persisted("unknown-client") is None
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+import pytest
+from fastapi import HTTPException
+from app.controllers.payment_controller import PaymentController
+from app.core.security import create_access_token, create_quote_token, decode_quote_token
+from app.schemas.transaction import PaymentInitiate
+
+QUOTE = {"cur": "USD", "amt": "10.00", "rate": "110.00000000", "fee": "27.50", "total": "1127.50"}
+
+def quote_token(expires_in: float = 900, **overrides) -> str:
+    return create_quote_token(
+        {**QUOTE, **overrides},
+        datetime.now(timezone.utc) + timedelta(seconds=expires_in)
+    )
+
+def test_round_trip():
+    quote = decode_quote_token(quote_token())
+
+    assert {key: quote[key] for key in QUOTE} == QUOTE
+    assert quote["typ"] == "quote"
+
+def test_expired_quote_is_rejected():
+    assert decode_quote_token(quote_token(expires_in=-1)) is None
+
+def test_tampered_quote_is_rejected():
+    header, _, signature = quote_token().split(".")
+    forged = quote_token(rate="1.00000000").split(".")[1]
+
+    assert decode_quote_token(f"{header}.{forged}.{signature}") is None
+
+def test_access_token_is_not_a_quote():
+    assert decode_quote_token(create_access_token({"sub": "user"})) is None
+
+def payment(**overrides) -> PaymentInitiate:
+    values = dict(
+        foreign_currency_code="usd",
+        foreign_amount=Decimal("10"),
+        recipient_paypal_email="recipient@example.com",
+        quote_token=quote_token()
+    )
+    values.update(overrides)
+    return PaymentInitiate(**values)
+
+def test_verify_quote_returns_the_locked_price():
+    controller = PaymentController(db=None)
+
+    assert controller._verify_quote(payment()) == (Decimal("110.00000000"), Decimal("1127.50"))
+
+@pytest.mark.parametrize("overrides", [
+    {"foreign_currency_code": "EUR"},
+    {"foreign_amount": Decimal("10.01")},
+    {"quote_token": "not-a-token"}
+])
+def test_verify_quote_rejects_a_different_payment(overrides):
+    with pytest.raises(HTTPException) as error:
+        PaymentController(db=None)._verify_quote(payment(**overrides))
+
+    assert error.value.status_code == 400
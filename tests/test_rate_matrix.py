@@ -0,0 +1,51 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+import pytest
+from app.services.rate_matrix import BASE_CURRENCY, RateMatrix
+
+RATES_TO_BDT = {
+    "USD": Decimal("110.00000000"),
+    "EUR": Decimal("120.00000000"),
+    "KWD": Decimal("358.50000000")
+}
+
+@pytest.fixture
+def matrix() -> RateMatrix:
+    return RateMatrix.from_rates_to_bdt(
+        RATES_TO_BDT, last_updated=datetime(2026, 10, 18, tzinfo=timezone.utc)
+    )
+
+def test_includes_base_currency_sorted(matrix):
+    assert matrix.currencies == ("BDT", "EUR", "KWD", "USD")
+    assert len(matrix.rates) == 16
+
+def test_rates_to_and_from_bdt(matrix):
+    assert matrix.rate("USD", BASE_CURRENCY) == Decimal("110")
+    # 18 significant digits
+    assert matrix.rate(BASE_CURRENCY, "USD") == Decimal("0.00909090909090909091")
+
+def test_cross_rate(matrix):
+    assert matrix.rate("EUR", "USD") == Decimal("1.09090909090909091")
+    assert matrix.rate("USD", "USD") == Decimal(1)
+
+def test_small_rates_keep_significant_digits(matrix):
+    # Fixed decimal places would round this to a handful of digits
+    assert matrix.rate(BASE_CURRENCY, "KWD") == Decimal("0.00278940027894002789")
+
+def test_convert(matrix):
+    assert matrix.convert(Decimal("10"), "EUR", BASE_CURRENCY) == Decimal("1200")
+
+def test_unknown_currency(matrix):
+    with pytest.raises(ValueError, match="Currency JPY not found"):
+        matrix.rate("USD", "JPY")
+    with pytest.raises(ValueError, match="Currency JPY not found"):
+        matrix.rows(["USD", "JPY"])
+
+def test_rows_sub_matrix(matrix):
+    codes, rates = matrix.rows(["USD", "BDT"])
+
+    assert codes == ["USD", "BDT"]
+    assert rates == [
+        [Decimal(1), Decimal("110")],
+        [matrix.rate("BDT", "USD"), Decimal(1)]
+    ]
@@ -0,0 +1,59 @@
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import insert
+from app.models.transaction_archive import TransactionArchive
+from app.services.transaction_archive import candidate_archives
+
+def uuid7_at(moment: datetime) -> str:
+    milliseconds = int(moment.timestamp() * 1000)
+    return str(uuid.UUID(int=(milliseconds << 80) | (0x7 << 76) | (0b10 << 62) | 1))
+
+def utc(year: int, month: int, day: int = 1, hour: int = 0) -> datetime:
+    return datetime(year, month, day, hour, tzinfo=timezone.utc)
+
+def archived_paths(session, internal_tran_id):
+    return [path for path, _ in candidate_archives(session, internal_tran_id)]
+
+def make_archives(sqlite_session):
+    session = sqlite_session(TransactionArchive)
+    session.execute(insert(TransactionArchive), [
+        {
+            "partition_name": "transactions_legacy", "path": "legacy.arrow",
+            "range_start": None, "range_end": utc(2026, 1),
+            "row_count": 1, "batch_first_keys": [], "has_legacy_ids": True
+        },
+        {
+            "partition_name": "transactions_y2026m01", "path": "2026-01.arrow",
+            "range_start": utc(2026, 1), "range_end": utc(2026, 2),
+            "row_count": 1, "batch_first_keys": [], "has_legacy_ids": True
+        },
+        {
+            "partition_name": "transactions_y2026m02", "path": "2026-02.arrow",
+            "range_start": utc(2026, 2), "range_end": utc(2026, 3),
+            "row_count": 1, "batch_first_keys": [], "has_legacy_ids": False
+        }
+    ])
+    return session
+
+def test_uuid7_picks_the_archive_covering_its_time(sqlite_session):
+    session = make_archives(sqlite_session)
+
+    assert archived_paths(session, uuid7_at(utc(2026, 2, 15))) == ["2026-02.arrow"]
+
+def test_uuid7_near_a_month_boundary_checks_both_neighbours(sqlite_session):
+    session = make_archives(sqlite_session)
+
+    assert archived_paths(session, uuid7_at(datetime(2026, 1, 31, 23, 59, 59, tzinfo=timezone.utc))) == [
+        "2026-02.arrow",
+        "2026-01.arrow"
+    ]
+
+def test_recent_uuid7_searches_no_archive(sqlite_session):
+    session = make_archives(sqlite_session)
+
+    assert archived_paths(session, uuid7_at(utc(2026, 10, 18))) == []
+
+def test_uuid4_searches_only_archives_with_legacy_ids(sqlite_session):
+    session = make_archives(sqlite_session)
+
+    assert archived_paths(session, str(uuid.uuid4())) == ["2026-01.arrow", "legacy.arrow"]
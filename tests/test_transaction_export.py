@@ -0,0 +1,62 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+from app.models.transaction import TransactionStatus
+from app.services import transaction_service
+from app.services.transaction_service import EXPORT_FIELDS, export_csv, export_ndjson
+
+def export_row(id: int, **overrides) -> tuple:
+    values = dict(
+        id=id,
+        user_id=1,
+        internal_tran_id="0190d6c2-5a4e-7a1b-8c3d-4e5f60718293",
+        status=TransactionStatus.PAYOUT_COMPLETED,
+        requested_foreign_currency="USD",
+        requested_foreign_amount=Decimal("10.0000"),
+        exchange_rate_bdt=Decimal("110.12345678"),
+        calculated_bdt_amount=Decimal("1128.77"),
+        sslcz_received_bdt_amount=None,
+        sslcz_store_amount_bdt=None,
+        recipient_paypal_email="recipient@example.com",
+        paypal_payout_status="COMPLETED",
+        created_at=datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc),
+        updated_at=None
+    )
+    values.update(overrides)
+    return tuple(values[field] for field in EXPORT_FIELDS)
+
+def test_export_csv_header_and_values():
+    output = "".join(export_csv([export_row(1)]))
+
+    header, row = list(csv.reader(io.StringIO(output)))
+    assert header == EXPORT_FIELDS
+    record = dict(zip(header, row))
+    assert record["status"] == "PAYOUT_COMPLETED"
+    assert record["exchange_rate_bdt"] == "110.12345678"
+    assert record["created_at"] == "2026-10-18T12:00:00+00:00"
+    assert record["sslcz_received_bdt_amount"] == ""
+
+def test_export_ndjson_keeps_amounts_as_strings():
+    output = "".join(export_ndjson([export_row(1), export_row(2)]))
+
+    records = [json.loads(line) for line in output.splitlines()]
+    assert [record["id"] for record in records] == [1, 2]
+    assert records[0]["requested_foreign_amount"] == "10.0000"
+    assert records[0]["updated_at"] is None
+
+def test_exports_are_chunked_by_batch_size(monkeypatch):
+    monkeypatch.setattr(transaction_service.settings, "TRANSACTION_EXPORT_BATCH_SIZE", 2)
+    rows = [export_row(id) for id in range(1, 6)]
+
+    ndjson_chunks = list(export_ndjson(rows))
+    csv_chunks = list(export_csv(rows))
+
+    assert [chunk.count("\n") for chunk in ndjson_chunks] == [2, 2, 1]
+    # The header rides with the first chunk
+    assert [chunk.count("\n") for chunk in csv_chunks] == [3, 2, 1]
+
+def test_empty_exports():
+    assert list(export_ndjson([])) == []
+    assert list(csv.reader(io.StringIO("".join(export_csv([]))))) == [EXPORT_FIELDS]